@@ -64,7 +64,7 @@ import platform
 import math
 
 import bpy
-from bpy.props import StringProperty, EnumProperty, BoolProperty
+from bpy.props import StringProperty, EnumProperty, BoolProperty, IntProperty
 
 
 # TODO: verify installation during addon activation
@@ -79,6 +79,9 @@ class MaxwellRenderPreferences(bpy.types.AddonPreferences):
     advanced = BoolProperty(name="Advanced Settings", default=False, )
     tmp_dir_use = EnumProperty(name="Temp Files", items=[('BLEND_DIRECTORY', "Blend File Directory (Default)", ""), ('SPECIFIC_DIRECTORY', "Specific Directory", ""), ], default='BLEND_DIRECTORY', description="", )
     tmp_dir_path = StringProperty(name="Temp Files Directory", default="//", subtype='DIR_PATH', description="", )
+    reference_cache_use = BoolProperty(name="Cache MXS Reference Points", default=True, description="Keep point clouds of referenced MXS files on disk, so they are not read again after restart", )
+    reference_cache_path = StringProperty(name="Cache Directory", default="", subtype='DIR_PATH', description="Empty for directory in Blender user data files", )
+    reference_cache_size = IntProperty(name="Cache Size (MB)", default=512, min=1, max=100000, description="Oldest cached point clouds are removed when cache is larger", )
     
     default_new_world_type = EnumProperty(name="Default World Type", items=[('NONE', "None", ""), ('PHYSICAL_SKY', "Physical Sky", ""), ('IMAGE_BASED', "Image Based", "")], default='PHYSICAL_SKY', )
     default_new_material_type = EnumProperty(name="Default Material Type", items=[('REFERENCE', "Reference", ""), ('CUSTOM', "Custom", ""), ('EMITTER', "Emitter", ""), ('AGS', "AGS", ""), ('OPAQUE', "Opaque", ""), ('TRANSPARENT', "Transparent", ""), ('METAL', "Metal", ""), ('TRANSLUCENT', "Translucent", ""), ('CARPAINT', "Carpaint", ""), ('HAIR', "Hair", ""), ], default='CUSTOM', )
@@ -106,6 +109,14 @@ class MaxwellRenderPreferences(bpy.types.AddonPreferences):
             s.prop(self, "tmp_dir_path", )
             if(self.tmp_dir_use != 'SPECIFIC_DIRECTORY'):
                 s.enabled = False
+            
+            l.prop(self, "reference_cache_use")
+            r = l.row()
+            s = r.split(percentage=0.666)
+            s.prop(self, "reference_cache_path", )
+            s = s.split(percentage=1.0)
+            s.prop(self, "reference_cache_size", )
+            r.enabled = self.reference_cache_use
 
 
 def get_selected_panels():
@@ -27,6 +27,12 @@ import threading
 import traceback
 import shlex
 import subprocess
+import json
+import hashlib
+import queue
+import collections
+import select
+import struct
 
 import bpy
 from bpy.types import RenderEngine
@@ -97,10 +103,13 @@ class ViewportRenderThread(threading.Thread):
         self.cmd = cmd
         self.tmp_dir = tmp_dir
         self.p = None
+        # called after stop, i.e. to wake up update thread
+        self.on_stop = None
         threading.Thread.__init__(self)
         self._stop = threading.Event()
     
     def stop(self):
+        # called from ui thread, only kill, process is reaped by communicate() in run()
         if(self.p is not None):
             if(self.p.poll() is None):
                 if(system.PLATFORM == 'Darwin'):
@@ -109,41 +118,401 @@ class ViewportRenderThread(threading.Thread):
                     self.p.kill()
                 elif(system.PLATFORM == 'Windows'):
                     os.popen('taskkill /pid ' + str(self.p.pid) + ' /f')
-                    time.sleep(1)
         self._stop.set()
+        if(self.on_stop is not None):
+            self.on_stop()
     
     def stopped(self):
         return self._stop.isSet()
     
     def run(self):
         self.p = subprocess.Popen(self.cmd, cwd=self.tmp_dir, )
+        if(self.stopped()):
+            # stopped while starting, p was not there to kill yet
+            self.p.kill()
         self.p.communicate()
         self.stop()
 
 
+class InotifyWatch():
+    """Linux inotify on a directory through ctypes, wait() returns names of files written and closed or moved in."""
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    
+    def __init__(self, path, ):
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True, )
+        self.fd = libc.inotify_init1(os.O_NONBLOCK)
+        if(self.fd < 0):
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed", )
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(path), self.IN_CLOSE_WRITE | self.IN_MOVED_TO, )
+        if(wd < 0):
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed", path, )
+        # pipe to interrupt waiting from another thread
+        self.wake_r, self.wake_w = os.pipe()
+        # wake() can come from other threads even after close(), closed fd numbers might be reused by then
+        self._lock = threading.Lock()
+    
+    def wake(self):
+        with self._lock:
+            if(self.wake_w < 0):
+                return
+            try:
+                os.write(self.wake_w, b'\x00')
+            except OSError:
+                pass
+    
+    def wait(self, timeout, ):
+        r, _, _ = select.select([self.fd, self.wake_r, ], [], [], timeout, )
+        if(self.wake_r in r):
+            os.read(self.wake_r, 1024)
+        names = []
+        if(self.fd in r):
+            try:
+                b = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return names
+            i = 0
+            while(i < len(b)):
+                # struct inotify_event {int wd; uint32_t mask; uint32_t cookie; uint32_t len; char name[]; };
+                _, _, _, l = struct.unpack_from("iIII", b, i, )
+                i += 16
+                names.append(b[i:i + l].rstrip(b'\x00').decode('utf-8', 'replace', ))
+                i += l
+        return names
+    
+    def close(self):
+        with self._lock:
+            for fd in (self.fd, self.wake_r, self.wake_w, ):
+                if(fd < 0):
+                    continue
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+            self.fd = self.wake_r = self.wake_w = -1
+
+
 class ViewportUpdateThread(threading.Thread):
-    def __init__(self, f, rt, t=1.0, ):
+    def __init__(self, f, rt, t=1.0, path=None, ):
+        """Calls f(True) when maxwell saves new image to path, or when render thread is stopped, and f(False) every t seconds, so f can check if rendering is still needed.
+        Uses inotify on linux, elsewhere (or if inotify fails) polls path mtime and size."""
         self.f = f
         self.rt = rt
         self.t = t
+        self.path = path
         threading.Thread.__init__(self)
         self._stop = threading.Event()
+        self._wake = threading.Event()
+        self.watch = None
+        if(path is not None and system.PLATFORM == 'Linux'):
+            try:
+                self.watch = InotifyWatch(os.path.dirname(path))
+            except Exception as e:
+                log("inotify is not available ({}), polling instead..".format(e), 1, LogStyles.WARNING, )
     
     def stop(self):
         self._stop.set()
+        self._interrupt()
     
     def stopped(self):
         return self._stop.isSet()
     
+    def wake(self):
+        # nothing is waiting anymore
+        if(self.stopped()):
+            return
+        self._interrupt()
+    
+    def _interrupt(self):
+        self._wake.set()
+        if(self.watch is not None):
+            self.watch.wake()
+    
+    def _stamp(self):
+        try:
+            s = os.stat(self.path)
+        except (OSError, TypeError, ):
+            return None
+        return (s.st_mtime, s.st_size, )
+    
+    def _changed(self, stamp, ):
+        if(self.watch is not None):
+            names = self.watch.wait(self.t)
+            return (os.path.basename(self.path) in names), stamp
+        # poll once per interval, stop and render thread end wake it up earlier
+        self._wake.wait(self.t)
+        self._wake.clear()
+        s = self._stamp()
+        return (s is not None and s != stamp), s
+    
     def run(self):
+        stamp = self._stamp()
+        last = time.time()
+        try:
+            while True:
+                if(self.rt.stopped()):
+                    self._stop.set()
+                    # last redraw call
+                    self.f(True)
+                    return
+                if(self._stop.is_set()):
+                    return
+                changed, stamp = self._changed(stamp)
+                now = time.time()
+                if(changed or now - last >= self.t):
+                    self.f(changed)
+                    last = now
+        finally:
+            if(self.watch is not None):
+                self.watch.close()
+
+
+class MaterialPreviewCache():
+    """Rendered material preview pixels keyed by material data and preview settings, least recently used are dropped when full."""
+    __cache = collections.OrderedDict()
+    __lock = threading.Lock()
+    size = 32
+    
+    @classmethod
+    def key(cls, data, settings, ):
+        s = json.dumps([data, settings, ], sort_keys=True, default=str, )
+        return hashlib.sha1(s.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def get(cls, key, ):
+        with cls.__lock:
+            a = cls.__cache.get(key)
+            if(a is not None):
+                cls.__cache.move_to_end(key)
+            return a
+    
+    @classmethod
+    def put(cls, key, a, ):
+        with cls.__lock:
+            cls.__cache[key] = a
+            cls.__cache.move_to_end(key)
+            while(len(cls.__cache) > cls.size):
+                cls.__cache.popitem(last=False)
+    
+    @classmethod
+    def clear(cls):
+        with cls.__lock:
+            cls.__cache.clear()
+
+
+class MaterialPreviewJob():
+    def __init__(self, key, data, ):
+        self.key = key
+        self.data = data
+        self.result = None
+        self.abort = threading.Event()
+        self.done = threading.Event()
+        self.started = False
+        self.__lock = threading.Lock()
+    
+    def start(self):
+        """Called by worker when job is taken from queue, False if it was cancelled while waiting."""
+        with self.__lock:
+            if(self.abort.is_set()):
+                return False
+            self.started = True
+            return True
+    
+    def cancel(self):
+        """Abort job, returns True if worker never started it, then there is nothing to wait for."""
+        with self.__lock:
+            self.abort.set()
+            if(not self.started):
+                self.done.set()
+                return True
+            return False
+
+
+class MaterialPreviewQueue():
+    """Single background worker rendering material previews one by one from bounded queue.
+    renderer is called as renderer(data, abort) and returns pixels array or None, it must not touch bpy."""
+    __queue = queue.Queue(maxsize=4)
+    __worker = None
+    __lock = threading.Lock()
+    # default renderer for submit, None is render_material_preview, set FakeMaterialPreviewRenderer instance to run without Maxwell
+    renderer = None
+    
+    @classmethod
+    def submit(cls, key, data, renderer=None, ):
+        """Put new job to queue, return MaterialPreviewJob or None when queue is full."""
+        if(renderer is None):
+            renderer = cls.renderer
+        if(renderer is None):
+            renderer = render_material_preview
+        j = MaterialPreviewJob(key, data, )
+        with cls.__lock:
+            if(cls.__worker is None or not cls.__worker.is_alive()):
+                cls.__worker = threading.Thread(target=cls._run, daemon=True, )
+                cls.__worker.start()
+        try:
+            cls.__queue.put_nowait((j, renderer, ))
+        except queue.Full:
+            log("material preview queue is full..", 1, LogStyles.WARNING, )
+            return None
+        return j
+    
+    @classmethod
+    def _run(cls):
         while True:
-            if(self.rt.stopped()):
-                self.stop()
-                # last redraw call
-                self.f()
-                return
-            self.f()
-            self._stop.wait(self.t)
+            j, renderer = cls.__queue.get()
+            try:
+                if(not j.start()):
+                    # cancelled while waiting in queue
+                    continue
+                # the same preview might got rendered while this one was waiting
+                a = MaterialPreviewCache.get(j.key)
+                if(a is None):
+                    a = renderer(j.data, j.abort, )
+                    if(a is not None):
+                        MaterialPreviewCache.put(j.key, a, )
+                j.result = a
+            except Exception as e:
+                log(traceback.format_exc(), 0, LogStyles.ERROR, )
+            finally:
+                j.done.set()
+                cls.__queue.task_done()
+
+
+class FakeMaterialPreviewRenderer():
+    """Stand-in for render_material_preview to test preview queue and cache without Maxwell. Returns flat color pixels
+    (d['size'], d['size'], 3) after delay seconds, or None when aborted meanwhile, calls is number of renders asked for."""
+    def __init__(self, color=(0.5, 0.5, 0.5, ), delay=0.0, ):
+        self.color = color
+        self.delay = delay
+        self.calls = 0
+        self.__lock = threading.Lock()
+    
+    def __call__(self, d, abort, ):
+        with self.__lock:
+            self.calls += 1
+        if(abort.wait(self.delay)):
+            return None
+        a = np.zeros((d['size'], d['size'], 3), dtype=np.float32, )
+        a[:] = self.color
+        return a
+
+
+def render_material_preview(d, abort, ):
+    """Render prepared material preview, d is dict from MaxwellRenderExportEngine._render_mat_preview, abort is threading.Event.
+    Runs in MaterialPreviewQueue worker, so everything from blender is already in d. Returns pixels array or None."""
+    tmp_dir = d['tmp_dir']
+    render_sc = d['scene']
+    
+    def wait(process_render, ):
+        while(process_render.poll() is None):
+            if(abort.is_set()):
+                try:
+                    if(system.PLATFORM == 'Windows'):
+                        os.popen('taskkill /pid ' + str(process_render.pid) + ' /f')
+                        time.sleep(1)
+                    else:
+                        process_render.kill()
+                    log('aborting..', 1, )
+                except Exception as e:
+                    log(traceback.format_exc(), 0, LogStyles.ERROR)
+                return False
+            
+            log('rendering..', 1, )
+            abort.wait(1)
+        return True
+    
+    def command(executable, ):
+        q = shlex.quote
+        p = [q(executable),
+             q(os.path.join(tmp_dir, 'scene.mxs')),
+             q(os.path.join(tmp_dir, 'render.mxi')),
+             q(os.path.join(tmp_dir, 'render.exr')),
+             q(os.path.split(render_sc)[0]),
+             q(str(d['size'])),
+             q(str(d['size'])),
+             q(str(d['time'])),
+             q(str(d['sl'])),
+             q(str(d['verbosity'])), ]
+        line = "{} -mxs:{} -mxi:{} -o:{} -dep:{} -res:{}x{} -time:{} -sl:{} -nowait -nogui -hide -verbose:{}".format(*p)
+        return shlex.split(line)
+    
+    if(system.PLATFORM == 'Darwin'):
+        PY = d['python']
+        PYMAXWELL_PATH = d['pymaxwell']
+        NUMPY_PATH = os.path.split(os.path.split(np.__file__)[0])[0]
+        
+        log("make preview scene..", 1, )
+        script_path = os.path.join(tmp_dir, "scene.py")
+        shutil.copyfile(system.check_for_material_preview_scene_template(), script_path, )
+        
+        q = shlex.quote
+        p = [q(PY), q(script_path), q(PYMAXWELL_PATH), q(LOG_FILE_PATH), q(render_sc), q(tmp_dir), q(d['quality']), ]
+        cmd = "{} {} {} {} {} {} {}".format(*p)
+        log("command:", 2)
+        log("{0}".format(cmd), 0, LogStyles.MESSAGE, prefix="")
+        args = shlex.split(cmd)
+        process_scene = subprocess.Popen(args, cwd=tmp_dir, )
+        process_scene.wait()
+        if(process_scene.returncode != 0):
+            return None
+        
+        log("render preview scene..", 1, )
+        executable = os.path.join(d['maxwell'], 'Maxwell.app', "Contents/MacOS/Maxwell")
+        process_render = subprocess.Popen(command(executable), cwd=tmp_dir, )
+        if(not wait(process_render)):
+            return None
+        
+        log("read preview render..", 1, )
+        script_path = os.path.join(tmp_dir, "preview.py")
+        shutil.copyfile(system.check_for_material_preview_mxi_template(), script_path, )
+        
+        q = shlex.quote
+        p = [q(PY), q(script_path), q(PYMAXWELL_PATH), q(NUMPY_PATH), q(LOG_FILE_PATH), q(tmp_dir), ]
+        cmd = "{} {} {} {} {} {}".format(*p)
+        log("command:", 2)
+        log("{0}".format(cmd), 0, LogStyles.MESSAGE, prefix="")
+        args = shlex.split(cmd)
+        process_scene = subprocess.Popen(args, cwd=tmp_dir, )
+        process_scene.wait()
+        if(process_scene.returncode != 0):
+            return None
+        
+        a = None
+        npy = os.path.join(tmp_dir, "preview.npy")
+        if(os.path.exists(npy)):
+            a = np.load(npy)
+    else:
+        log("make preview scene..", 1, )
+        scene = mxs.material_preview_scene(render_sc, tmp_dir, d['quality'], )
+        
+        log("render preview scene..", 1, )
+        if(system.PLATFORM == 'Linux'):
+            executable = os.path.join(d['maxwell'], 'maxwell', )
+        elif(system.PLATFORM == 'Windows'):
+            executable = os.path.join(d['maxwell'], 'maxwell.exe', )
+        else:
+            raise OSError("Unknown platform: {}.".format(system.PLATFORM))
+        
+        process_render = subprocess.Popen(command(executable), cwd=tmp_dir, )
+        if(not wait(process_render)):
+            return None
+        
+        log("read preview render..", 1, )
+        a = mxs.material_preview_mxi(tmp_dir)
+    
+    if(a is not None):
+        if(a.shape == (1, 1, 3)):
+            # there was an error
+            log('preview render failed..', 1, LogStyles.ERROR, )
+            return None
+    else:
+        log('preview render pixels read failed..', 1, LogStyles.ERROR, )
+        return None
+    
+    return a
 
 
 class MaxwellRenderExportEngine(RenderEngine):
@@ -175,12 +544,29 @@ class MaxwellRenderExportEngine(RenderEngine):
     vr_previous_buffer = None
     # previous raw array, used for slicing when in CAMERA
     vr_previous_array = None
+    # (mtime, size) of render.exr when it was last read, buffers are reloaded only when it changes
+    vr_buffer_stamp = None
+    # ((x, y), bgl.Buffer) sliced previous buffer for negative draw offset in CAMERA
+    vr_sliced_buffer = None
     # context.space_data
     vr_space_data = None
     # camera 2d screen coordinates [[int x, int y (top right)], [int x, int y (bottom right)], [int x, int y (bottom left)], int [x, int y (top left)], ]
     vr_camera_frame_points_on_screen = None
     # width and height of 3d viewport region
     vr_space_dimensions = None
+    # camera signature and object transformations at last export, used for live updates
+    vr_snapshot = None
+    # blender object name > object name in exported scene at last export
+    vr_object_names = None
+    # ignore is_updated flags on next live update, they were set by export
+    vr_live_skip_flags = False
+    # live update is applied only when scene did not change for this long (seconds), so dragging does not restart renderer on each step
+    vr_live_delay = 0.3
+    # waiting changes: last seen snapshot, time of last change, full export needed and timer which asks for view_update when delay is over
+    vr_live_seen = None
+    vr_live_time = None
+    vr_live_full = False
+    vr_live_timer = None
     
     def _get_preview_material(self, scene):
         materials = {}
@@ -392,250 +778,103 @@ class MaxwellRenderExportEngine(RenderEngine):
     def _render_mat_preview(self, mat, ):
         log("render preview..", 1)
         
-        smx = bpy.context.scene.maxwell_render
-        render_sl = smx.material_preview_sl
-        render_t = smx.material_preview_time
-        render_s = smx.material_preview_scale
-        render_q = smx.material_preview_quality
-        render_v = smx.material_preview_verbosity
+        with self.lock:
+            # blender data and mxm export, one preview at a time, rendering itself is queued
+            r = self._prepare_mat_preview(mat)
+        if(r is None):
+            return False
+        key, d, a = r
+        
+        if(a is None):
+            j = MaterialPreviewQueue.submit(key, d, )
+            if(j is None):
+                return False
+            while(not j.done.wait(0.1)):
+                if(self.test_break()):
+                    if(not j.cancel()):
+                        # already rendering, wait for worker to kill renderer, temp directory is removed after
+                        j.done.wait()
+                    return False
+            a = j.result
+            if(a is None):
+                return False
+        else:
+            log("cached..", 1)
         
+        log("drawing..", 1)
+        self._draw_array(a, mxi_buffer=True, )
+        return True
+    
+    def _prepare_mat_preview(self, mat, ):
+        """Returns (cache key, renderer data, cached pixels or None) or None if preview can't be rendered."""
+        smx = bpy.context.scene.maxwell_render
         m = mat.maxwell_render
         render_sc = os.path.abspath(m.preview_scene)
-        render_sz = int(m.preview_size)
         
         # blend path, temp directory must be saved next to it
         p = bpy.data.filepath
         if(p == ""):
             # if file is not saved, draw warning in ui and skip rendering
-            return False
+            return None
+        
+        log("preview scene: {}".format(render_sc), 1, )
+        if(not os.path.exists(render_sc)):
+            # if missing, fill black and skip rendering
+            log("preview scene '{}' is missing..".format(render_sc), 0, LogStyles.ERROR, )
+            return None
+        
+        def stat(p):
+            s = os.stat(p)
+            return (p, s.st_mtime, s.st_size, )
+        
+        d = {'scene': render_sc,
+             'size': int(m.preview_size),
+             'time': smx.material_preview_time,
+             'sl': smx.material_preview_sl,
+             'scale': smx.material_preview_scale,
+             'quality': smx.material_preview_quality,
+             'verbosity': smx.material_preview_verbosity, }
+        
+        # same material data rendered with the same preview settings looks always the same
+        if(m.use == 'REFERENCE'):
+            ref = os.path.realpath(bpy.path.abspath(m.mxm_file))
+            if(not os.path.exists(ref)):
+                log("mxm '{}' is missing..".format(ref), 0, LogStyles.ERROR, )
+                return None
+            md = stat(ref)
+        else:
+            if(m.use == 'CUSTOM'):
+                exmat = export.MXSMaterialCustom(mat.name)
+            else:
+                exmat = export.MXSMaterialExtension(mat.name)
+            md = exmat._repr()
+        key = MaterialPreviewCache.key(md, [stat(render_sc), d['size'], d['time'], d['sl'], d['scale'], d['quality'], ], )
+        
+        a = MaterialPreviewCache.get(key)
+        if(a is not None):
+            return key, d, a
         
         tmp_dir = utils.tmp_dir(purpose='material_preview', uid=self.uuid, use_blend_name=True, )
         self.tmp_dir = tmp_dir
+        d['tmp_dir'] = tmp_dir
         
         mxm = os.path.join(tmp_dir, "material.mxm")
         
         log("export mxm to: {}".format(mxm), 1, )
         # save mxm to temp directory
-        if(m.use == 'CUSTOM'):
-            exmat = export.MXSMaterialCustom(mat.name)
-            d = exmat._repr()
-            system.mxed_create_and_edit_custom_material_helper(mxm, d, False, "", False, )
-        elif(m.use == 'REFERENCE'):
+        if(m.use == 'REFERENCE'):
             # when referenced mxm has no saved preview inside
-            shutil.copyfile(os.path.realpath(bpy.path.abspath(m.mxm_file)), mxm)
+            shutil.copyfile(ref, mxm)
         else:
-            exmat = export.MXSMaterialExtension(mat.name)
-            d = exmat._repr()
-            system.mxed_create_and_edit_custom_material_helper(mxm, d, False, "", False, )
+            system.mxed_create_and_edit_custom_material_helper(mxm, md, False, "", False, )
         
-        log("preview scene: {}".format(render_sc), 1, )
-        # copy preview scene mxs to temp directory
-        if(not os.path.exists(render_sc)):
-            # if missing, fill black and skip rendering
-            log("preview scene '{}' is missing..".format(render_sc), 0, LogStyles.ERROR, )
-            return False
-        
-        scene = os.path.join(tmp_dir, "scene.mxs")
-        result = os.path.join(tmp_dir, "render.mxi")
-        
-        # start rendering..
+        # resolve everything from blender here, renderer runs in another thread
+        d['maxwell'] = os.path.abspath(bpy.path.abspath(system.prefs().maxwell_path))
         if(system.PLATFORM == 'Darwin'):
-            PY = os.path.abspath(os.path.join(bpy.path.abspath(system.prefs().python_path), 'bin', 'python3.5', ))
-            PYMAXWELL_PATH = os.path.abspath(os.path.join(bpy.path.abspath(system.prefs().maxwell_path), 'Libs', 'pymaxwell', 'python3.5', ))
-            TEMPLATE_SCENE = system.check_for_material_preview_scene_template()
-            TEMPLATE_MXI = system.check_for_material_preview_mxi_template()
-            NUMPY_PATH = os.path.split(os.path.split(np.__file__)[0])[0]
-            
-            log("make preview scene..", 1, )
-            script_path = os.path.join(tmp_dir, "scene.py")
-            with open(script_path, mode='w', encoding='utf-8') as f:
-                # read template
-                with open(TEMPLATE_SCENE, encoding='utf-8') as t:
-                    code = "".join(t.readlines())
-                # write template to a new file
-                f.write(code)
-            
-            q = shlex.quote
-            p = [q(PY), q(script_path), q(PYMAXWELL_PATH), q(LOG_FILE_PATH), q(render_sc), q(tmp_dir), q(render_q), ]
-            cmd = "{} {} {} {} {} {} {}".format(*p)
-            log("command:", 2)
-            log("{0}".format(cmd), 0, LogStyles.MESSAGE, prefix="")
-            args = shlex.split(cmd)
-            process_scene = subprocess.Popen(args, cwd=tmp_dir, )
-            process_scene.wait()
-            if(process_scene.returncode != 0):
-                return False
-            
-            log("render preview scene..", 1, )
-            app = os.path.abspath(os.path.join(bpy.path.abspath(system.prefs().maxwell_path), 'Maxwell.app', ))
-            executable = os.path.join(app, "Contents/MacOS/Maxwell")
-            
-            q = shlex.quote
-            p = [q(executable),
-                 q(os.path.join(tmp_dir, 'scene.mxs')),
-                 q(os.path.join(tmp_dir, 'render.mxi')),
-                 q(os.path.join(tmp_dir, 'render.exr')),
-                 q(os.path.split(render_sc)[0]),
-                 q(str(render_sz)),
-                 q(str(render_sz)),
-                 q(str(render_t)),
-                 q(str(render_sl)),
-                 q(str(render_v)), ]
-            line = "{} -mxs:{} -mxi:{} -o:{} -dep:{} -res:{}x{} -time:{} -sl:{} -nowait -nogui -hide -verbose:{}".format(*p)
-            cmd = shlex.split(line)
-            
-            abort = False
-            process_render = subprocess.Popen(cmd, cwd=tmp_dir, )
-            while(process_render.poll() is None):
-                if(self.test_break()):
-                    try:
-                        process_render.kill()
-                        abort = True
-                        log('aborting..', 1, )
-                    except Exception as e:
-                        log(traceback.format_exc(), 0, LogStyles.ERROR)
-                    break
-                
-                log('rendering..', 1, )
-                time.sleep(1)
-            
-            if(abort):
-                return False
-            
-            log("read preview render..", 1, )
-            script_path = os.path.join(tmp_dir, "preview.py")
-            with open(script_path, mode='w', encoding='utf-8') as f:
-                # read template
-                with open(TEMPLATE_MXI, encoding='utf-8') as t:
-                    code = "".join(t.readlines())
-                # write template to a new file
-                f.write(code)
-            
-            q = shlex.quote
-            p = [q(PY), q(script_path), q(PYMAXWELL_PATH), q(NUMPY_PATH), q(LOG_FILE_PATH), q(tmp_dir), ]
-            cmd = "{} {} {} {} {} {}".format(*p)
-            log("command:", 2)
-            log("{0}".format(cmd), 0, LogStyles.MESSAGE, prefix="")
-            args = shlex.split(cmd)
-            process_scene = subprocess.Popen(args, cwd=tmp_dir, )
-            process_scene.wait()
-            if(process_scene.returncode != 0):
-                return False
-            
-            a = None
-            npy = os.path.join(tmp_dir, "preview.npy")
-            if(os.path.exists(npy)):
-                a = np.load(npy)
-            if(a is not None):
-                if(a.shape == (1, 1, 3)):
-                    # there was an error
-                    log('preview render failed..', 1, LogStyles.ERROR, )
-                    return False
-            else:
-                log('preview render pixels read failed..', 1, LogStyles.ERROR, )
-                return False
-            
-            log("drawing..", 1)
-            self._draw_array(a, mxi_buffer=True, )
-            
-            return True
-        else:
-            log("make preview scene..", 1, )
-            scene = mxs.material_preview_scene(render_sc, tmp_dir, render_q, )
-            
-            log("render preview scene..", 1, )
-            if(system.PLATFORM == 'Linux'):
-                executable = os.path.abspath(os.path.join(bpy.path.abspath(system.prefs().maxwell_path), 'maxwell', ))
-                
-                q = shlex.quote
-                p = [q(executable),
-                     q(os.path.join(tmp_dir, 'scene.mxs')),
-                     q(os.path.join(tmp_dir, 'render.mxi')),
-                     q(os.path.join(tmp_dir, 'render.exr')),
-                     q(os.path.split(render_sc)[0]),
-                     q(str(render_sz)),
-                     q(str(render_sz)),
-                     q(str(render_t)),
-                     q(str(render_sl)),
-                     q(str(render_v)), ]
-                line = "{} -mxs:{} -mxi:{} -o:{} -dep:{} -res:{}x{} -time:{} -sl:{} -nowait -nogui -hide -verbose:{}".format(*p)
-                cmd = shlex.split(line)
-                
-                abort = False
-                process_render = subprocess.Popen(cmd, cwd=tmp_dir, )
-                while(process_render.poll() is None):
-                    if(self.test_break()):
-                        try:
-                            process_render.kill()
-                            abort = True
-                            log('aborting..', 1, )
-                        except Exception as e:
-                            log(traceback.format_exc(), 0, LogStyles.ERROR)
-                        break
-                    
-                    log('rendering..', 1, )
-                    time.sleep(1)
-                
-                if(abort):
-                    return False
-                
-            elif(system.PLATFORM == 'Windows'):
-                executable = os.path.abspath(os.path.join(bpy.path.abspath(system.prefs().maxwell_path), 'maxwell.exe', ))
-                
-                q = shlex.quote
-                p = [q(executable),
-                     q(os.path.join(tmp_dir, 'scene.mxs')),
-                     q(os.path.join(tmp_dir, 'render.mxi')),
-                     q(os.path.join(tmp_dir, 'render.exr')),
-                     q(os.path.split(render_sc)[0]),
-                     q(str(render_sz)),
-                     q(str(render_sz)),
-                     q(str(render_t)),
-                     q(str(render_sl)),
-                     q(str(render_v)), ]
-                line = "{} -mxs:{} -mxi:{} -o:{} -dep:{} -res:{}x{} -time:{} -sl:{} -nowait -nogui -hide -verbose:{}".format(*p)
-                cmd = shlex.split(line)
-                
-                abort = False
-                process_render = subprocess.Popen(cmd, cwd=tmp_dir, )
-                while(process_render.poll() is None):
-                    if(self.test_break()):
-                        try:
-                            os.popen('taskkill /pid ' + str(process_render.pid) + ' /f')
-                            time.sleep(1)
-                            abort = True
-                            log('aborting..', 1, )
-                        except Exception as e:
-                            log(traceback.format_exc(), 0, LogStyles.ERROR)
-                        break
-                    
-                    log('rendering..', 1, )
-                    time.sleep(1)
-                
-                if(abort):
-                    return False
-                
-            else:
-                raise OSError("Unknown platform: {}.".format(system.platform))
-            
-            log("read preview render..", 1, )
-            a = mxs.material_preview_mxi(tmp_dir)
-            
-            if(a is not None):
-                if(a.shape == (1, 1, 3)):
-                    # there was an error
-                    log('preview render failed..', 1, LogStyles.ERROR, )
-                    return False
-            else:
-                log('preview render pixels read failed..', 1, LogStyles.ERROR, )
-                return False
-            
-            log("drawing..", 1)
-            self._draw_array(a, mxi_buffer=True, )
-            
-            return True
+            d['python'] = os.path.abspath(os.path.join(bpy.path.abspath(system.prefs().python_path), 'bin', 'python3.5', ))
+            d['pymaxwell'] = os.path.join(d['maxwell'], 'Libs', 'pymaxwell', 'python3.5', )
         
-        return False
+        return key, d, None
     
     def _render_mat_preview_cleanup(self, finished=True, ):
         log("cleanup.. (finished: {})".format(finished), 1)
@@ -891,7 +1130,19 @@ class MaxwellRenderExportEngine(RenderEngine):
         # pr = cProfile.Profile()
         # pr.enable()
         
-        ex = export.MXSExport(mxs_path=p, engine=self, )
+        if(m.exporting_animation_now and m.export_animation_split_static):
+            # objects without animation are exported once to shared scene and referenced from each frame
+            sh, st = os.path.split(bp)
+            sn, se = os.path.splitext(st)
+            sp = os.path.join(sh, "{}_static{}".format(sn, se))
+            keep_log = False
+            if(scene.frame_current == scene.frame_start or not os.path.exists(sp)):
+                sx = export.MXSExport(mxs_path=sp, engine=self, split='STATIC', )
+                sx.stats.pprint()
+                keep_log = True
+            ex = export.MXSExport(mxs_path=p, engine=self, split='DYNAMIC', static_path=sp, keep_log=keep_log, )
+        else:
+            ex = export.MXSExport(mxs_path=p, engine=self, )
         
         ex.stats.pprint()
         
@@ -980,70 +1231,70 @@ class MaxwellRenderExportEngine(RenderEngine):
             self._update(data, scene)
     
     def render(self, scene, ):
-        with self.lock:
-            abort = False
+        abort = False
+        
+        if(self.is_preview):
+            if(not bpy.context.scene.maxwell_render.material_preview_enable):
+                return
             
-            if(self.is_preview):
-                if(not bpy.context.scene.maxwell_render.material_preview_enable):
-                    return
+            mat = self._get_preview_material(scene)
+            
+            if(self.resolution_x <= 96):
+                # skip icon rendering..
+                pass
+            else:
+                log("material preview (render): '{}'".format(mat.name), 0, )
                 
-                mat = self._get_preview_material(scene)
+                # fill with grid to indicate rendering..
+                self._fill_grid()
                 
-                if(self.resolution_x <= 96):
-                    # skip icon rendering..
-                    pass
-                else:
-                    log("material preview (render): '{}'".format(mat.name), 0, )
-                    
-                    # fill with grid to indicate rendering..
-                    self._fill_grid()
-                    
-                    mx = mat.maxwell_render
-                    smx = bpy.context.scene.maxwell_render
-                    
-                    ref = False
-                    ok = False
-                    try:
-                        if(smx.material_preview_external and mx.use == 'REFERENCE'):
+                mx = mat.maxwell_render
+                smx = bpy.context.scene.maxwell_render
+                
+                ref = False
+                ok = False
+                try:
+                    if(smx.material_preview_external and mx.use == 'REFERENCE'):
+                        with self.lock:
                             ok = self._read_mxm_preview(mat)
-                            ref = True
-                            if(not ok):
-                                log("failed to get mxm preview..", 1)
-                                ok = self._render_mat_preview(mat)
-                                ref = False
-                        else:
-                            # always render new material preview
+                        ref = True
+                        if(not ok):
+                            log("failed to get mxm preview..", 1)
                             ok = self._render_mat_preview(mat)
-                    except Exception as e:
-                        # log(traceback.format_exc())
-                        log(traceback.format_exc(), 0, LogStyles.ERROR, )
-                        ok = False
-                        # self.report({'ERROR'}, '{}'.format(e))
-                    
-                    if(not ref):
-                        # cleanup after loading preview from referenced material is done somewhere else. and on windows/linux is not even needed
-                        self._render_mat_preview_cleanup(ok)
-                    
-                    if(not ok):
-                        self._fill_grid()
-                    
-                    log("done.", 1)
-            else:
-                # no direct rendering, better to use maxwell itself..
-                pass
+                            ref = False
+                    else:
+                        # render new material preview or use cached one
+                        ok = self._render_mat_preview(mat)
+                except Exception as e:
+                    # log(traceback.format_exc())
+                    log(traceback.format_exc(), 0, LogStyles.ERROR, )
+                    ok = False
+                    # self.report({'ERROR'}, '{}'.format(e))
                 
-                # process = subprocess.Popen(shlex.split('sleep 10'))
-                # while(process.poll() is None):
-                #     if(self.test_break()):
-                #         try:
-                #             process.terminate()
-                #             abort = True
-                #             log('aborting..', 1, )
-                #         except Exception as e:
-                #             log(traceback.format_exc(), 0, LogStyles.ERROR)
-                #         break
-                #     log('rendering..', 1, )
-                #     time.sleep(1)
+                if(not ref):
+                    # cleanup after loading preview from referenced material is done somewhere else. and on windows/linux is not even needed
+                    self._render_mat_preview_cleanup(ok)
+                
+                if(not ok):
+                    self._fill_grid()
+                
+                log("done.", 1)
+        else:
+            # no direct rendering, better to use maxwell itself..
+            pass
+            
+            # process = subprocess.Popen(shlex.split('sleep 10'))
+            # while(process.poll() is None):
+            #     if(self.test_break()):
+            #         try:
+            #             process.terminate()
+            #             abort = True
+            #             log('aborting..', 1, )
+            #         except Exception as e:
+            #             log(traceback.format_exc(), 0, LogStyles.ERROR)
+            #         break
+            #     log('rendering..', 1, )
+            #     time.sleep(1)
     
     def __del__(self):
         # if(self.vr_ut is not None):
@@ -1052,7 +1303,9 @@ class MaxwellRenderExportEngine(RenderEngine):
         #     self.vr_rt.stop()
         pass
     
-    def _vr_render_start(self):
+    def _vr_render_start(self, patch=None, ):
+        """Set scene parameters and start renderer, patch is dict with live update changes from _vr_live_update or None.
+        Returns False if patch could not be applied to scene, renderer is not started then."""
         self.update_stats("Starting render..", "")
         
         m = bpy.context.scene.maxwell_render
@@ -1084,11 +1337,22 @@ class MaxwellRenderExportEngine(RenderEngine):
             q = shlex.quote
             p = [q(PY), q(script_path), q(PYMAXWELL_PATH), q(LOG_FILE_PATH), q(self.vr_tmp_dir), q(vr_quality), ]
             cmd = "{} {} {} {} {} {}".format(*p)
+            patch_path = None
+            if(patch is not None):
+                patch_path = os.path.join(self.vr_tmp_dir, 'patch.json')
+                with open(patch_path, mode='w', encoding='utf-8', ) as f:
+                    json.dump(patch, f, )
+                cmd = "{} --patch {}".format(cmd, q(patch_path))
             # log("command:", 2)
             # log("{0}".format(cmd), 0, LogStyles.MESSAGE, prefix="")
             args = shlex.split(cmd)
             process_scene = subprocess.Popen(args, cwd=self.vr_tmp_dir, )
             process_scene.wait()
+            if(patch_path is not None):
+                os.remove(patch_path)
+            if(patch is not None and process_scene.returncode == 2):
+                # something from patch is missing in scene
+                return False
             if(process_scene.returncode != 0):
                 self.update_stats("Something went wrong. Check console log.", "")
                 raise Exception("Something went wrong. Check console log.")
@@ -1112,12 +1376,15 @@ class MaxwellRenderExportEngine(RenderEngine):
             
             m = bpy.context.scene.maxwell_render
             
-            self.vr_ut = ViewportUpdateThread(self._vr_update_timer, self.vr_rt, m.viewport_render_update_interval, )
+            self.vr_ut = ViewportUpdateThread(self._vr_update_timer, self.vr_rt, m.viewport_render_update_interval, os.path.join(self.vr_tmp_dir, 'render.exr'), )
+            self.vr_rt.on_stop = self.vr_ut.wake
             self.vr_rt.start()
             self.vr_ut.start()
         elif(system.PLATFORM in ['Windows', 'Linux', ]):
             # set scene parameters and result paths
-            mxs.viewport_render_scene(self.vr_tmp_dir, vr_quality, )
+            ok = mxs.viewport_render_scene(self.vr_tmp_dir, vr_quality, patch, )
+            if(patch is not None and not ok):
+                return False
             
             executable = os.path.abspath(os.path.join(bpy.path.abspath(system.prefs().maxwell_path), 'maxwell.exe', ))
             
@@ -1136,11 +1403,14 @@ class MaxwellRenderExportEngine(RenderEngine):
             
             m = bpy.context.scene.maxwell_render
             
-            self.vr_ut = ViewportUpdateThread(self._vr_update_timer, self.vr_rt, m.viewport_render_update_interval, )
+            self.vr_ut = ViewportUpdateThread(self._vr_update_timer, self.vr_rt, m.viewport_render_update_interval, os.path.join(self.vr_tmp_dir, 'render.exr'), )
+            self.vr_rt.on_stop = self.vr_ut.wake
             self.vr_rt.start()
             self.vr_ut.start()
+        
+        return True
     
-    def _vr_update_timer(self):
+    def _vr_update_timer(self, changed=True, ):
         try:
             if(self.vr_space_data.viewport_shade != 'RENDERED'):
                 log('stopping viewport render thread', 1, )
@@ -1150,7 +1420,8 @@ class MaxwellRenderExportEngine(RenderEngine):
             ViewportRenderManager.killall()
             return
         
-        self.tag_redraw()
+        if(changed):
+            self.tag_redraw()
     
     def view_update(self, context=None, ):
         if(not bpy.context.scene.maxwell_render.viewport_render_enabled):
@@ -1175,8 +1446,26 @@ class MaxwellRenderExportEngine(RenderEngine):
         # but how to do it in non-blocking way?
         
         if(self.vr):
+            if(bpy.context.scene.maxwell_render.viewport_render_live):
+                self._vr_live_update(context)
             return
         
+        # check before anything is changed in scene
+        p = bpy.data.filepath
+        if(p == ""):
+            self.update_stats("Save file first.", "")
+            log("save file first.", 1, LogStyles.ERROR)
+            return
+        
+        if(not self._vr_export(context)):
+            return
+        
+        # mxs is ready, all changes reverted, now start rendering
+        self._vr_render_start()
+    
+    def _vr_setup_camera(self, context, ):
+        """Put temporary camera made from viewport to scene and set render resolution and region for it.
+        Returns (camera object, restore function) or None if view can't be rendered, restore() removes camera and puts all settings back."""
         # viewport properties
         region = context.region
         region_data = context.region_data
@@ -1187,7 +1476,7 @@ class MaxwellRenderExportEngine(RenderEngine):
         if(perspective == 'ORTHO'):
             self.update_stats("Orthographic camera is not supported.", "")
             log("orthographic camera is not supported.", 1, LogStyles.ERROR)
-            return
+            return None
         elif(perspective == 'CAMERA'):
             log("Viewport Render:", 1, LogStyles.MESSAGE, )
             self.vr = True
@@ -1425,19 +1714,50 @@ class MaxwellRenderExportEngine(RenderEngine):
             self.vr_draw_dimensions = [w, h]
             self.vr_space_dimensions = [w, h]
         
-        # export..
-        p = bpy.data.filepath
-        if(p == ""):
-            self.update_stats("Save file first.", "")
-            log("save file first.", 1, LogStyles.ERROR)
-            return
+        def restore():
+            if(perspective == 'CAMERA'):
+                utils.wipe_out_object(cam, and_data=True, )
+                bpy.context.scene.camera = scene_camera
+                
+                bpy.ops.view3d.viewnumpad(type='CAMERA')
+                
+                # restore settings
+                rs.resolution_x = orx
+                rs.resolution_y = ory
+                rs.resolution_percentage = orp
+                
+                rs.use_border = oborder[0]
+                rs.border_min_x = oborder[1]
+                rs.border_min_y = oborder[2]
+                rs.border_max_x = oborder[3]
+                rs.border_max_y = oborder[4]
+                
+            elif(perspective == 'PERSP'):
+                # then remove it again, it is no longer needed
+                utils.wipe_out_object(cam, and_data=True, )
+                # and restore settings
+                rs.resolution_x = orx
+                rs.resolution_y = ory
+                rs.resolution_percentage = orp
+                bpy.context.scene.camera = scene_camera
+            
+        return cam, restore
+    
+    def _vr_export(self, context, ):
+        r = self._vr_setup_camera(context)
+        if(r is None):
+            return False
+        cam, restore = r
         
         self.update_stats("Exporting scene..", "")
         log("exporting scene..", 1, )
         
-        self.vr_tmp_dir = utils.tmp_dir(purpose='viewport_render', uid=self.uuid, use_blend_name=True, )
+        if(self.vr_tmp_dir is None):
+            self.vr_tmp_dir = utils.tmp_dir(purpose='viewport_render', uid=self.uuid, use_blend_name=True, )
         
         # set output image and mxi to something if empty
+        h, t = os.path.split(bpy.path.abspath(bpy.data.filepath))
+        n, _ = os.path.splitext(t)
         mx = bpy.context.scene.maxwell_render
         if(mx.output_image == ''):
             mx.output_depth = 'RGB32'
@@ -1447,39 +1767,209 @@ class MaxwellRenderExportEngine(RenderEngine):
         
         # and export mxs
         p = bpy.path.abspath(os.path.join(self.vr_tmp_dir, 'scene.mxs'))
-        ex = export.MXSExport(mxs_path=p, )
+        try:
+            ex = export.MXSExport(mxs_path=p, )
+        finally:
+            restore()
+        
+        self.vr_object_names = ex.object_names
+        self.vr_snapshot = self._vr_snapshot(context)
+        self.vr_live_seen = self.vr_snapshot
+        # export itself might touch objects (motion blur steps, temporary camera), do not take that as user changes
+        self.vr_live_skip_flags = True
+        return True
+    
+    def _vr_camera_signature(self, context, ):
+        rd = context.region_data
+        r = [rd.view_perspective, tuple(tuple(v) for v in rd.view_matrix), context.space_data.lens, context.region.width, context.region.height, ]
+        c = bpy.context.scene.camera
+        if(c is not None):
+            r.append(tuple(tuple(v) for v in c.matrix_world))
+        return r
+    
+    def _vr_snapshot(self, context, ):
+        """What was exported, so live update can find out what has changed since. Objects instanced by dupli groups
+        and particles are included even when hidden, their instances are made from them."""
+        scene = bpy.context.scene
+        sources = set()
+        for o in scene.objects:
+            for so in export.instance_sources(o):
+                sources.add(so.name)
+        obs = {}
+        for o in scene.objects:
+            if(o.type == 'CAMERA'):
+                continue
+            if((not o.is_visible(scene) or o.hide_render) and o.name not in sources):
+                continue
+            obs[o.name] = tuple(tuple(v) for v in o.matrix_world)
+        return {'camera': self._vr_camera_signature(context), 'objects': obs, 'sources': sources, }
+    
+    def _vr_live_schedule(self):
+        if(self.vr_live_timer is not None):
+            self.vr_live_timer.cancel()
+        self.vr_live_timer = threading.Timer(self.vr_live_delay, self._vr_live_timer_call, )
+        self.vr_live_timer.daemon = True
+        self.vr_live_timer.start()
+    
+    def _vr_live_timer_call(self):
+        try:
+            # blender calls view_update on main thread then
+            self.tag_update()
+        except ReferenceError:
+            pass
+    
+    def _vr_live_update(self, context, ):
+        """Camera and object transform changes are patched into exported scene, anything else is exported again, then rendering is restarted.
+        Changes are coalesced, each call only remembers what is changing, everything is applied at once when nothing changed for vr_live_delay seconds."""
+        scene = bpy.context.scene
         
-        if(perspective == 'ORTHO'):
+        check_flags = not self.vr_live_skip_flags
+        self.vr_live_skip_flags = False
+        
+        # is_updated flags are valid only during this call, remember them until changes are applied
+        updated = False
+        if(not check_flags):
             pass
-        elif(perspective == 'CAMERA'):
-            utils.wipe_out_object(cam, and_data=True, )
-            bpy.context.scene.camera = scene_camera
-            
-            bpy.ops.view3d.viewnumpad(type='CAMERA')
-            
-            # restore settings
-            rs.resolution_x = orx
-            rs.resolution_y = ory
-            rs.resolution_percentage = orp
-            
-            rs.use_border = oborder[0]
-            rs.border_min_x = oborder[1]
-            rs.border_min_y = oborder[2]
-            rs.border_max_x = oborder[3]
-            rs.border_max_y = oborder[4]
-            
-        elif(perspective == 'PERSP'):
-            # then remove it again, it is no longer needed
-            utils.wipe_out_object(cam, and_data=True, )
-            # and restore settings
-            rs.resolution_x = orx
-            rs.resolution_y = ory
-            rs.resolution_percentage = orp
-            bpy.context.scene.camera = scene_camera
+        elif(bpy.data.materials.is_updated or bpy.data.textures.is_updated or bpy.data.images.is_updated or bpy.data.worlds.is_updated):
+            updated = True
+        else:
+            for o in scene.objects:
+                # geometry, modifiers, object properties, camera properties
+                if(o.is_updated_data):
+                    updated = True
+                    break
         
-        # mxs is ready, all changes reverted, now start rendering
+        snapshot = self._vr_snapshot(context)
+        if(updated or snapshot != self.vr_live_seen):
+            # still changing, wait until it settles down
+            self.vr_live_full = (self.vr_live_full or updated)
+            self.vr_live_seen = snapshot
+            self.vr_live_time = time.time()
+            self._vr_live_schedule()
+            return
+        if(self.vr_live_time is None):
+            # nothing is waiting
+            return
+        if(time.time() - self.vr_live_time < self.vr_live_delay):
+            self._vr_live_schedule()
+            return
+        full = self.vr_live_full
+        self.vr_live_full = False
+        self.vr_live_time = None
+        
+        changed = []
+        if(not full):
+            if(set(snapshot['objects'].keys()) != set(self.vr_snapshot['objects'].keys())):
+                # added, removed, hidden or shown objects
+                full = True
+            else:
+                changed = [n for n, m in snapshot['objects'].items() if self.vr_snapshot['objects'][n] != m]
+                for n in changed:
+                    o = scene.objects[n]
+                    if(o.dupli_type != 'NONE' or len(o.particle_systems) > 0):
+                        # duplis and particles are generated from transformation
+                        full = True
+                        break
+                    if(n not in self.vr_object_names):
+                        # not in scene under its own name, e.g. instance base
+                        full = True
+                        break
+                    if(n in snapshot['sources']):
+                        # instances follow their source, they are not in patch
+                        full = True
+                        break
+        camera = (snapshot['camera'] != self.vr_snapshot['camera'])
+        
+        if(not full and not changed and not camera):
+            return
+        
+        patch = None
+        if(not full):
+            log("live update: patching {} object(s){}..".format(len(changed), " and camera" if camera else ""), 1, )
+            patch = {'camera': None, 'objects': [], }
+            for n in changed:
+                o = scene.objects[n]
+                m = o.matrix_world.copy()
+                if(o.parent):
+                    m = o.parent.matrix_world.inverted() * m
+                m *= export.ROTATE_X_90
+                b, p, l, r, s = export.matrices_to_base_and_pivot(np.array(m, dtype=np.float64, ).reshape(1, 4, 4))
+                patch['objects'].append({'name': self.vr_object_names[n],
+                                         'base': b[0].tolist(),
+                                         'pivot': p[0].tolist(),
+                                         'location': l[0].tolist(),
+                                         'rotation': r[0].tolist(),
+                                         'scale': s[0].tolist(), })
+            if(camera):
+                r = self._vr_setup_camera(context)
+                if(r is None):
+                    return
+                cam, restore = r
+                try:
+                    d = export.MXSCamera({'object': cam, })._repr()
+                finally:
+                    restore()
+                region = None
+                if(d['screen_region'] != 'NONE'):
+                    region = list(d['screen_region_xywh']) + [d['screen_region'], ]
+                patch['camera'] = {'name': d['name'],
+                                   'steps': d['steps'],
+                                   'resolution': (d['resolution_x'], d['resolution_y'], ),
+                                   'film': (d['film_width'], d['film_height'], ),
+                                   'region': region, }
+            
+            # patch is complete, only now renderer can be stopped
+            self._vr_stop()
+            if(camera):
+                # image size might change, previous one can't be drawn anymore
+                self.vr_previous_buffer = None
+                self.vr_previous_array = None
+                self.vr_sliced_buffer = None
+            self.vr_snapshot = snapshot
+            self.vr_live_skip_flags = True
+            if(self._vr_render_start(patch)):
+                return
+            log("live update: scene can't be patched, exporting again..", 1, LogStyles.WARNING, )
+        else:
+            log("live update: exporting again..", 1, )
+            self._vr_stop()
+        
+        self.vr_previous_buffer = None
+        self.vr_previous_array = None
+        self.vr_sliced_buffer = None
+        if(not self._vr_export(context)):
+            # nothing was exported, previous scene is still there, keep rendering it
+            self._vr_render_start()
+            return
         self._vr_render_start()
     
+    def _vr_stop(self):
+        """Stop renderer and update thread before scene is changed, so nothing gets cleaned up."""
+        if(self.vr_ut is not None):
+            self.vr_ut.stop()
+        if(self.vr_rt is not None):
+            self.vr_rt.on_stop = None
+            self.vr_rt.stop()
+        p = os.path.join(self.vr_tmp_dir, 'render.exr')
+        if(os.path.exists(p)):
+            os.remove(p)
+        self.vr_buffer_stamp = None
+    
+    def _vr_render_stamp(self):
+        p = os.path.join(self.vr_tmp_dir, 'render.exr')
+        try:
+            s = os.stat(p)
+        except OSError:
+            return None
+        return (s.st_mtime, s.st_size, )
+    
+    def _vr_buffer_changed(self):
+        """True if maxwell saved new image since last successful read."""
+        s = self._vr_render_stamp()
+        if(s is None):
+            return False
+        return (s != self.vr_buffer_stamp)
+    
     def _vr_get_buffer(self):
         p = os.path.join(self.vr_tmp_dir, 'render.exr')
         pp = os.path.join(self.vr_tmp_dir, 'render2.exr')
@@ -1488,6 +1978,9 @@ class MaxwellRenderExportEngine(RenderEngine):
                 # skip if not accessible (maxwell is writing to it?)
                 return None
             
+            # stamp before copy, if maxwell writes again in between, it will be read again next time
+            stamp = self._vr_render_stamp()
+            
             # copy to skip possible conflict
             shutil.copyfile(p, pp)
             
@@ -1551,18 +2044,18 @@ class MaxwellRenderExportEngine(RenderEngine):
                     log('preview render pixels read failed..', 1, LogStyles.ERROR, )
                     return None
             
-            # gamma uncorrect
-            g = 1 / 2.2
-            a = a[:] ** g
+            # gamma uncorrect, once per new image, bgl wants floats anyway
+            a = a.astype(np.float32)
+            g = np.float32(1 / 2.2)
+            a **= g
             # flip
             a = np.flipud(a)
             # flip dimensions
             h, w, d = a.shape
             # flatten
             sz = w * h * d
-            a = np.reshape(a, (sz))
-            # gl_buffer = bgl.Buffer(bgl.GL_FLOAT, [sz], a)
-            # return gl_buffer
+            a = np.ascontiguousarray(a).reshape(sz)
+            self.vr_buffer_stamp = stamp
             return a, sz, w, h, d
         
         # leave it as it is. upon render finish and last draw, tmp files should be removed. or not?
@@ -1592,26 +2085,31 @@ class MaxwellRenderExportEngine(RenderEngine):
                 log("rendering stopped..", 1, )
                 self.update_stats("Stopped", "")
         
-        log("getting buffer..", 1)
         a = None
         gl_buffer = None
-        r = self._vr_get_buffer()
-        if(r is not None):
-            a, sz, _, _, _ = r
-            if(a is not None):
-                gl_buffer = bgl.Buffer(bgl.GL_FLOAT, [sz], a)
+        if(self._vr_buffer_changed()):
+            # new image from maxwell, otherwise just redraw what is already there (viewport navigation etc.)
+            log("getting buffer..", 1)
+            r = self._vr_get_buffer()
+            if(r is not None):
+                a, sz, _, _, _ = r
+                if(a is not None):
+                    gl_buffer = bgl.Buffer(bgl.GL_FLOAT, [sz], a)
+            if(gl_buffer is None):
+                if(self.vr_previous_buffer is not None):
+                    log("something went wrong, using previous buffer..", 1, LogStyles.WARNING)
+            else:
+                self.vr_previous_buffer = gl_buffer
+                self.vr_previous_array = a
+                self.vr_sliced_buffer = None
         
         draw = True
         if(gl_buffer is None):
             if(self.vr_previous_buffer is None):
                 draw = False
             else:
-                log("something went wrong, using previous buffer..", 1, LogStyles.WARNING)
                 gl_buffer = self.vr_previous_buffer
                 a = self.vr_previous_array
-        else:
-            self.vr_previous_buffer = gl_buffer
-            self.vr_previous_array = a
         
         if(not draw):
             log("nothing to draw..", 1)
@@ -1631,21 +2129,30 @@ class MaxwellRenderExportEngine(RenderEngine):
         if(self.vr_view == 'CAMERA'):
             # camera can be moved to negative coordinates
             if(x < 0 or y < 0):
-                # negative offset, nothing will be drawn, so slice array and make new buffer
-                a = np.reshape(a, (h, w, 3))
-                # slice
-                if(x < 0):
-                    a = a[:, abs(x):, :, ]
-                    x = 0
-                if(y < 0):
-                    a = a[abs(y):, :, :, ]
-                    y = 0
-                h, w, _ = a.shape
-                # flatten
-                sz = w * h * 3
-                a = np.reshape(a, (sz))
-                # and create new buffer
-                gl_buffer = bgl.Buffer(bgl.GL_FLOAT, [sz], a)
+                # negative offset, nothing will be drawn, so slice array and make new buffer, unless it was made already for this offset
+                o = (x, y, )
+                if(self.vr_sliced_buffer is not None and self.vr_sliced_buffer[0] == o):
+                    gl_buffer = self.vr_sliced_buffer[1]
+                    x = max(x, 0)
+                    y = max(y, 0)
+                    w = w - (x - o[0])
+                    h = h - (y - o[1])
+                else:
+                    a = np.reshape(a, (h, w, 3))
+                    # slice
+                    if(x < 0):
+                        a = a[:, abs(x):, :, ]
+                        x = 0
+                    if(y < 0):
+                        a = a[abs(y):, :, :, ]
+                        y = 0
+                    h, w, _ = a.shape
+                    # flatten
+                    sz = w * h * 3
+                    a = np.reshape(a, (sz))
+                    # and create new buffer
+                    gl_buffer = bgl.Buffer(bgl.GL_FLOAT, [sz], a)
+                    self.vr_sliced_buffer = (o, gl_buffer, )
         
         bgl.glRasterPos2i(x, y)
         bgl.glDrawPixels(w, h, bgl.GL_RGB, bgl.GL_FLOAT, gl_buffer)
@@ -1657,6 +2164,10 @@ class MaxwellRenderExportEngine(RenderEngine):
                 self._vr_cleanup()
     
     def _vr_cleanup(self):
+        if(self.vr_live_timer is not None):
+            self.vr_live_timer.cancel()
+            self.vr_live_timer = None
+        
         if(self.vr_tmp_dir is None):
             return
         
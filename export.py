@@ -50,6 +50,355 @@ ROTATE_X_90 = Matrix.Rotation(math.radians(90.0), 4, 'X')
 ROTATE_X_MINUS_90 = Matrix.Rotation(math.radians(-90.0), 4, 'X')
 
 
+def matrices_to_base_and_pivot(ms, ):
+    """Convert (N, 4, 4) array of matrices to Base and Pivot and Position, Rotation and Scale for Studio at once,
+    same as MXSObject._matrix_to_base_and_pivot, but vectorised. Follows what mathutils does step by step in single
+    precision (decompose, to_euler, Euler.rotate, to_matrix), results match the per matrix version.
+    Returns arrays base (N, 4, 3), pivot (N, 4, 3), location (N, 3), rotation (N, 3) in degrees and scale (N, 3)."""
+    f = numpy.float32
+    d = numpy.float64
+    ms = numpy.asarray(ms, dtype=f, ).reshape(-1, 4, 4)
+    n = len(ms)
+    # matrices as mathutils stores them, by columns, c[:, i] is i-th column
+    c = numpy.transpose(ms[:, :3, :3], (0, 2, 1, ))
+    loc = ms[:, :3, 3]
+    
+    def normalize(v):
+        # normalize_v3_v3 on last axis, returns normalized vectors and lengths
+        dd = v[..., 0] * v[..., 0] + v[..., 1] * v[..., 1] + v[..., 2] * v[..., 2]
+        ok = dd > f(1.0e-35)
+        l = numpy.where(ok, numpy.sqrt(dd), f(0.0), )
+        with numpy.errstate(divide='ignore', invalid='ignore', ):
+            r = v * (f(1.0) / l)[..., None]
+        r = numpy.where(ok[..., None], r, f(0.0), )
+        l = numpy.where(ok, l, f(0.0), )
+        return r, l
+    
+    def normalize_qt(q):
+        l = numpy.sqrt(q[:, 0] * q[:, 0] + q[:, 1] * q[:, 1] + q[:, 2] * q[:, 2] + q[:, 3] * q[:, 3])
+        ok = l != f(0.0)
+        with numpy.errstate(divide='ignore', invalid='ignore', ):
+            r = q * (f(1.0) / l)[:, None]
+        r[~ok] = (0.0, 1.0, 0.0, 0.0, )
+        return r
+    
+    def atan2(y, x):
+        # atan2f, in double rounded to single, math libraries differ in last bit anyway, this is the closest to exact result
+        return numpy.arctan2(y.astype(d), x.astype(d)).astype(f)
+    
+    def to_eul2(m):
+        # mat3_normalized_to_eul2, two possible eulers
+        cy = numpy.hypot(m[:, 0, 0], m[:, 0, 1])
+        big = cy > f(16.0) * numpy.finfo(f).eps
+        e1 = numpy.zeros((len(m), 3), dtype=f, )
+        e2 = numpy.zeros((len(m), 3), dtype=f, )
+        e1[:, 0] = numpy.where(big, atan2(m[:, 1, 2], m[:, 2, 2]), atan2(-m[:, 2, 1], m[:, 1, 1]), )
+        e1[:, 1] = atan2(-m[:, 0, 2], cy)
+        e1[:, 2] = numpy.where(big, atan2(m[:, 0, 1], m[:, 0, 0]), f(0.0), )
+        e2[:, 0] = numpy.where(big, atan2(-m[:, 1, 2], -m[:, 2, 2]), e1[:, 0], )
+        e2[:, 1] = numpy.where(big, atan2(-m[:, 0, 2], -cy), e1[:, 1], )
+        e2[:, 2] = numpy.where(big, atan2(-m[:, 0, 1], -m[:, 0, 0]), e1[:, 2], )
+        return e1, e2
+    
+    def eul_to_mat3(e):
+        # eulO_to_mat3 in XYZ order, computed in double
+        t = e.astype(d)
+        ci, cj, ch = numpy.cos(t[:, 0]), numpy.cos(t[:, 1]), numpy.cos(t[:, 2])
+        si, sj, sh = numpy.sin(t[:, 0]), numpy.sin(t[:, 1]), numpy.sin(t[:, 2])
+        cc = ci * ch
+        cs = ci * sh
+        sc = si * ch
+        ss = si * sh
+        m = numpy.zeros((len(e), 3, 3), dtype=f, )
+        m[:, 0, 0] = cj * ch
+        m[:, 1, 0] = sj * sc - cs
+        m[:, 2, 0] = sj * cc + ss
+        m[:, 0, 1] = cj * sh
+        m[:, 1, 1] = sj * ss + cc
+        m[:, 2, 1] = sj * cs - sc
+        m[:, 0, 2] = -sj
+        m[:, 1, 2] = cj * si
+        m[:, 2, 2] = cj * ci
+        return m
+    
+    def compatible_eul(e, o):
+        e = e.copy()
+        pi_thresh = f(5.1)
+        pi_x2 = f(2.0) * f(math.pi)
+        de = e - o
+        for i in range(3):
+            a = de[:, i] > pi_thresh
+            e[a, i] -= numpy.floor((de[a, i] / pi_x2) + f(0.5)) * pi_x2
+            b = de[:, i] < -pi_thresh
+            e[b, i] += numpy.floor((-de[b, i] / pi_x2) + f(0.5)) * pi_x2
+            de[:, i] = numpy.where(a | b, e[:, i] - o[:, i], de[:, i], )
+        ade = numpy.abs(de)
+        for i, j, k in ((0, 1, 2, ), (1, 2, 0, ), (2, 0, 1, ), ):
+            a = (ade[:, i] > f(3.2)) & (ade[:, j] < f(1.6)) & (ade[:, k] < f(1.6))
+            e[a, i] = numpy.where(de[a, i] > f(0.0), e[a, i] - pi_x2, e[a, i] + pi_x2, )
+        return e
+    
+    # decompose, mat3_to_rot_size
+    rot, size = normalize(c)
+    x = rot[:, 0]
+    y = rot[:, 1]
+    cross = numpy.stack((x[:, 1] * y[:, 2] - x[:, 2] * y[:, 1],
+                         x[:, 2] * y[:, 0] - x[:, 0] * y[:, 2],
+                         x[:, 0] * y[:, 1] - x[:, 1] * y[:, 0], ), axis=1, )
+    z = rot[:, 2]
+    neg = (cross[:, 0] * z[:, 0] + cross[:, 1] * z[:, 1] + cross[:, 2] * z[:, 2]) < f(0.0)
+    rot[neg] = -rot[neg]
+    size[neg] = -size[neg]
+    
+    # mat3_to_quat
+    m, _ = normalize(rot)
+    q = numpy.zeros((n, 4), dtype=f, )
+    tr = 0.25 * (f(1.0) + m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2]).astype(d)
+    with numpy.errstate(divide='ignore', invalid='ignore', ):
+        a = tr > d(f(1e-4))
+        s = numpy.sqrt(tr)
+        si = 1.0 / (4.0 * s)
+        q[a, 0] = s[a]
+        q[a, 1] = (m[a, 1, 2] - m[a, 2, 1]).astype(d) * si[a]
+        q[a, 2] = (m[a, 2, 0] - m[a, 0, 2]).astype(d) * si[a]
+        q[a, 3] = (m[a, 0, 1] - m[a, 1, 0]).astype(d) * si[a]
+        
+        b = ~a & (m[:, 0, 0] > m[:, 1, 1]) & (m[:, 0, 0] > m[:, 2, 2])
+        s = (f(2.0) * numpy.sqrt(f(1.0) + m[b, 0, 0] - m[b, 1, 1] - m[b, 2, 2])).astype(d)
+        q[b, 1] = 0.25 * s
+        si = 1.0 / s
+        q[b, 0] = (m[b, 1, 2] - m[b, 2, 1]).astype(d) * si
+        q[b, 2] = (m[b, 1, 0] + m[b, 0, 1]).astype(d) * si
+        q[b, 3] = (m[b, 2, 0] + m[b, 0, 2]).astype(d) * si
+        
+        b2 = ~a & ~b & (m[:, 1, 1] > m[:, 2, 2])
+        s = (f(2.0) * numpy.sqrt(f(1.0) + m[b2, 1, 1] - m[b2, 0, 0] - m[b2, 2, 2])).astype(d)
+        q[b2, 2] = 0.25 * s
+        si = 1.0 / s
+        q[b2, 0] = (m[b2, 2, 0] - m[b2, 0, 2]).astype(d) * si
+        q[b2, 1] = (m[b2, 1, 0] + m[b2, 0, 1]).astype(d) * si
+        q[b2, 3] = (m[b2, 2, 1] + m[b2, 1, 2]).astype(d) * si
+        
+        b3 = ~a & ~b & ~b2
+        s = (f(2.0) * numpy.sqrt(f(1.0) + m[b3, 2, 2] - m[b3, 0, 0] - m[b3, 1, 1])).astype(d)
+        q[b3, 3] = 0.25 * s
+        si = 1.0 / s
+        q[b3, 0] = (m[b3, 0, 1] - m[b3, 1, 0]).astype(d) * si
+        q[b3, 1] = (m[b3, 2, 0] + m[b3, 0, 2]).astype(d) * si
+        q[b3, 2] = (m[b3, 2, 1] + m[b3, 1, 2]).astype(d) * si
+    q = normalize_qt(q)
+    
+    # Quaternion.to_euler, normalizes once more, quat_to_mat3, mat3_normalized_to_eul
+    q = normalize_qt(q)
+    qd = math.sqrt(2.0) * q.astype(d)
+    q0, q1, q2, q3 = qd[:, 0], qd[:, 1], qd[:, 2], qd[:, 3]
+    qda = q0 * q1
+    qdb = q0 * q2
+    qdc = q0 * q3
+    qaa = q1 * q1
+    qab = q1 * q2
+    qac = q1 * q3
+    qbb = q2 * q2
+    qbc = q2 * q3
+    qcc = q3 * q3
+    m = numpy.zeros((n, 3, 3), dtype=f, )
+    m[:, 0, 0] = 1.0 - qbb - qcc
+    m[:, 0, 1] = qdc + qab
+    m[:, 0, 2] = -qdb + qac
+    m[:, 1, 0] = -qdc + qab
+    m[:, 1, 1] = 1.0 - qaa - qcc
+    m[:, 1, 2] = qda + qbc
+    m[:, 2, 0] = qdb + qac
+    m[:, 2, 1] = -qda + qbc
+    m[:, 2, 2] = 1.0 - qaa - qbb
+    e1, e2 = to_eul2(m)
+    a = (numpy.abs(e1[:, 0]) + numpy.abs(e1[:, 1]) + numpy.abs(e1[:, 2])) > (numpy.abs(e2[:, 0]) + numpy.abs(e2[:, 1]) + numpy.abs(e2[:, 2]))
+    e = numpy.where(a[:, None], e2, e1, )
+    
+    # Euler.rotate(AXIS_CONVERSION), mul_m3_m3m3 and mat3_to_compatible_eulO
+    cm = numpy.array(AXIS_CONVERSION.to_3x3(), dtype=f, ).T
+    em = eul_to_mat3(e)
+    rm = numpy.zeros((n, 3, 3), dtype=f, )
+    for i in range(3):
+        for j in range(3):
+            rm[:, i, j] = em[:, i, 0] * cm[0, j] + em[:, i, 1] * cm[1, j] + em[:, i, 2] * cm[2, j]
+    rm, _ = normalize(rm)
+    e1, e2 = to_eul2(rm)
+    e1 = compatible_eul(e1, e)
+    e2 = compatible_eul(e2, e)
+    d1 = numpy.abs(e1[:, 0] - e[:, 0]) + numpy.abs(e1[:, 1] - e[:, 1]) + numpy.abs(e1[:, 2] - e[:, 2])
+    d2 = numpy.abs(e2[:, 0] - e[:, 0]) + numpy.abs(e2[:, 1] - e[:, 1]) + numpy.abs(e2[:, 2] - e[:, 2])
+    e = numpy.where((d1 > d2)[:, None], e2, e1, )
+    
+    # to_matrix, multiplied by scale, mathutils sums products from 0.0, that is why + 0.0, it keeps zeros positive
+    mr = eul_to_mat3(e)
+    base = numpy.zeros((n, 4, 3), dtype=d, )
+    base[:, 0] = numpy.stack((loc[:, 0], loc[:, 2], -loc[:, 1], ), axis=1, ) + f(0.0)
+    base[:, 1:] = mr * size[:, :, None] + f(0.0)
+    pivot = numpy.zeros((n, 4, 3), dtype=d, )
+    pivot[:, 1:] = numpy.identity(3, dtype=d, )
+    location = base[:, 0].copy()
+    rotation = e.astype(d) * (180.0 / math.pi)
+    scale = size.astype(d)
+    return base, pivot, location, rotation, scale
+
+
+def layers_mask(ls, ):
+    """Layer flags (sequence of bools) as int bitmask, bit i is set when layer i is enabled."""
+    m = 0
+    for i, l in enumerate(ls):
+        if(l):
+            m |= 1 << i
+    return m
+
+
+# modifiers that change mesh over time even when nothing is keyed on object itself
+DEFORMING_MODIFIERS = ('ARMATURE', 'CAST', 'CLOTH', 'COLLISION', 'CURVE', 'DYNAMIC_PAINT', 'EXPLODE', 'FLUID_SIMULATION', 'HOOK', 'LAPLACIANDEFORM',
+                       'LATTICE', 'MESH_CACHE', 'MESH_DEFORM', 'MESH_SEQUENCE_CACHE', 'OCEAN', 'PARTICLE_INSTANCE', 'SHRINKWRAP', 'SIMPLE_DEFORM',
+                       'SMOKE', 'SOFT_BODY', 'SURFACE', 'WARP', 'WAVE', )
+
+
+def is_animated(ob, ):
+    """True if object can change during animation, i.e. it or its data, shape keys or materials have animation or drivers,
+    it has constraints, deforming or simulation modifiers or particle systems. Cameras and lamps are always treated as animated."""
+    def has_animation(idb):
+        if(idb is None):
+            return False
+        ad = getattr(idb, 'animation_data', None)
+        if(ad is None):
+            return False
+        return (ad.action is not None or len(ad.drivers) > 0 or len(ad.nla_tracks) > 0)
+    
+    if(ob.type in ('CAMERA', 'LAMP', )):
+        return True
+    if(has_animation(ob) or has_animation(ob.data)):
+        return True
+    if(has_animation(getattr(ob.data, 'shape_keys', None))):
+        return True
+    for s in ob.material_slots:
+        if(has_animation(s.material)):
+            return True
+    if(len(ob.constraints) > 0 or len(ob.particle_systems) > 0):
+        return True
+    for m in ob.modifiers:
+        if(m.type in DEFORMING_MODIFIERS):
+            return True
+    if(ob.dupli_type == 'GROUP' and ob.dupli_group is not None):
+        for o in ob.dupli_group.objects:
+            if(is_animated(o)):
+                return True
+    return False
+
+
+def instance_sources(o, ):
+    """Objects instanced by o, members of its dupli group and dupli objects and groups of its particle systems (also used by cloner)."""
+    r = []
+    if(o.dupli_type == 'GROUP' and o.dupli_group is not None):
+        r.extend(o.dupli_group.objects)
+    for ps in o.particle_systems:
+        pset = ps.settings
+        if(pset.dupli_object is not None):
+            r.append(pset.dupli_object)
+        if(pset.dupli_group is not None):
+            r.extend(pset.dupli_group.objects)
+    return r
+
+
+def dynamic_objects(objs, ):
+    """Names of objects which have to be exported on each animation frame. Hierarchy is never split, if any object in hierarchy is animated,
+    whole tree from its root is dynamic, so children follow animated parents and no object loses its parent in either file.
+    Objects instanced by dynamic dupli groups, particle systems and cloners are dynamic too (with their trees), instances need them in the same file."""
+    def tree(o):
+        r = [o, ]
+        for c in o.children:
+            r.extend(tree(c))
+        return r
+    
+    def root(o):
+        while(o.parent is not None):
+            o = o.parent
+        return o
+    
+    r = set()
+    todo = []
+    for o in objs:
+        if(o.parent is None):
+            t = tree(o)
+            if(any([is_animated(c) for c in t])):
+                r.update([c.name for c in t])
+                todo.extend(t)
+    
+    # source can be duplicator or emitter as well, repeat until nothing new is added
+    while(len(todo) > 0):
+        o = todo.pop()
+        for so in instance_sources(o):
+            if(so.name not in r):
+                t = tree(root(so))
+                r.update([c.name for c in t])
+                todo.extend(t)
+    return r
+
+
+def particle_buffers(ps, mat=None, use_velocity=False, use_size=False, size=1.0, scale=1.0, axes=ROTATE_X_90, ):
+    """Alive particles of particle system as numpy arrays, shared by MXSParticles and MXSCloner. Everything is read with foreach_get
+    and transformed at once, the same as `Vector((mat * v) * axes)` for each particle. Size is part.size * scale if use_size, otherwise size.
+    Returns dict with 'locations', 'velocities' and 'normals' (normalized velocities) as (n, 3) float64 and 'sizes' (n, ) float64."""
+    n = len(ps.particles)
+    alive = numpy.array([p.alive_state == "ALIVE" for p in ps.particles], dtype=numpy.bool_, )
+    
+    def read(attr, c, ):
+        a = numpy.zeros(n * c, dtype=numpy.float32, )
+        ps.particles.foreach_get(attr, a)
+        return a.reshape(-1, c)[alive].astype(numpy.float64)
+    
+    locs = read('location', 3, )
+    if(use_velocity):
+        vels = read('velocity', 3, )
+    else:
+        vels = numpy.zeros(locs.shape, dtype=numpy.float64, )
+    if(use_size):
+        sizes = read('size', 1, ).reshape(-1) * scale
+    else:
+        sizes = numpy.full(len(locs), size, dtype=numpy.float64, )
+    
+    if(mat is not None):
+        m = numpy.array(mat, dtype=numpy.float64, )
+        locs = numpy.dot(locs, m[:3, :3].T) + m[:3, 3]
+        if(use_velocity):
+            # multiplied as points, like it always was
+            vels = numpy.dot(vels, m[:3, :3].T) + m[:3, 3]
+    # vector * matrix, rotation part only
+    a = numpy.array(axes, dtype=numpy.float64, )[:3, :3]
+    locs = numpy.dot(locs, a)
+    if(use_velocity):
+        vels = numpy.dot(vels, a)
+    
+    # normal from velocity, zero velocity gives zero normal
+    l = numpy.sqrt((vels * vels).sum(axis=1))
+    nors = numpy.zeros(vels.shape, dtype=numpy.float64, )
+    ok = l > 0.0
+    nors[ok] = vels[ok] / l[ok, numpy.newaxis]
+    
+    return {'locations': locs,
+            'velocities': vels,
+            'normals': nors,
+            'sizes': sizes, }
+
+
+def particle_records(b, uvs=None, ):
+    """Particle buffers as (n, 14) array of (id, location, normal, velocity, size, uv) rows for rfbin.RFBinWriter, uvs is (n, 3) or None for zeros."""
+    n = len(b['locations'])
+    r = numpy.zeros((n, 14), dtype=numpy.float64, )
+    r[:, 0] = numpy.arange(n)
+    r[:, 1:4] = b['locations']
+    r[:, 4:7] = b['normals']
+    r[:, 7:10] = b['velocities']
+    r[:, 10] = b['sizes']
+    if(uvs is not None):
+        r[:, 11:14] = uvs
+    return r
+
+
 # FIXME: (IMPORTANT) simple cube with default subdivision modifier refuses to render (An edge connecting two vertices was specified more than once. It's likely that an incident face was flipped)
 #        - 2.76 order of faces is different than in 2.77. this might be the problem because from 2.76 it renders fine
 #        - creating mesh again from data (bot orders), the result is the same too.. and this is the same for polygons/tessfaces/bmesh.faces
@@ -104,6 +453,8 @@ class MXSExportStats():
             self.triangles += len(o.m_triangles)
         elif(o.m_type == 'MESH_INSTANCE'):
             self.instances += 1
+        elif(o.m_type == 'MESH_INSTANCES'):
+            self.instances += len(o.m_names)
         elif(o.m_type == 'SCENE'):
             pass
         elif(o.m_type == 'ENVIRONMENT'):
@@ -179,12 +530,14 @@ class MXSExportStats():
 
 
 class MXSExport():
-    def __init__(self, mxs_path, engine=None, ):
+    def __init__(self, mxs_path, engine=None, split=None, static_path=None, keep_log=False, ):
         # clear db, before we start, previous error will cause more errors
         MXSDatabase.clear()
         MXSMotionBlurHelper.clear()
         
-        clear_log()
+        if(not keep_log):
+            # keep_log: continue log of previous export, e.g. static and dynamic part of the same animation frame
+            clear_log()
         log("{0} {1} {0}".format("-" * 30, self.__class__.__name__), 0, LogStyles.MESSAGE, prefix="", )
         
         ok = system.check_pymaxwell_version()
@@ -195,6 +548,12 @@ class MXSExport():
         log("exporting mxs: '{}'".format(self.mxs_path), 1, LogStyles.MESSAGE, )
         self.engine = engine
         
+        # animation export: 'STATIC' exports only objects that do not change, 'DYNAMIC' the rest plus reference to static_path, None all
+        self.split = split
+        self.static_path = static_path
+        if(self.split is not None):
+            log("exporting {} objects only".format(self.split.lower()), 1, )
+        
         self.progress_current = 0
         self.progress_count = 0
         
@@ -211,6 +570,9 @@ class MXSExport():
         self._export()
         self._finish()
         
+        # blender name > maxwell name, for anything that needs to find objects in written scene later (viewport render live update)
+        self.object_names = MXSDatabase.export_names()
+        
         MXSDatabase.clear()
         MXSMotionBlurHelper.clear()
         
@@ -256,6 +618,7 @@ class MXSExport():
             self.hair_data_paths = []
             self.part_data_paths = []
             self.wire_data_paths = []
+            self.inst_data_paths = []
             self.scene_data_name = "{0}-{1}.json".format(n, self.uuid)
             self.script_name = "{0}-{1}.py".format(n, self.uuid)
             
@@ -319,11 +682,9 @@ class MXSExport():
                     instance_groups[o.data.name] = [o, ]
                 else:
                     instance_groups[o.data.name].append(o)
-            bases_names = []
+            bases_names = set()
             for n, g in instance_groups.items():
-                nms = [o.name for o in g]
-                ls = sorted(nms)
-                bases_names.append(ls[0])
+                bases_names.add(min([o.name for o in g]))
             insts = instances[:]
             instances = []
             for o in insts:
@@ -338,11 +699,9 @@ class MXSExport():
                     convertible_instance_groups[o.data.name] = [o, ]
                 else:
                     convertible_instance_groups[o.data.name].append(o)
-            convertible_bases_names = []
+            convertible_bases_names = set()
             for n, g in convertible_instance_groups.items():
-                nms = [o.name for o in g]
-                ls = sorted(nms)
-                convertible_bases_names.append(ls[0])
+                convertible_bases_names.add(min([o.name for o in g]))
             convertible_insts = convertible_instances[:]
             convertible_instances = []
             for o in convertible_insts:
@@ -351,13 +710,14 @@ class MXSExport():
                 else:
                     convertible_instances.append(o)
             
+            # bases are used only for membership tests
             return {'meshes': meshes,
                     'empties': empties,
                     'cameras': cameras,
-                    'bases': bases,
+                    'bases': set(bases),
                     'instances': instances,
                     'convertible_meshes': convertible_meshes,
-                    'convertible_bases': convertible_bases,
+                    'convertible_bases': set(convertible_bases),
                     'convertible_instances': convertible_instances,
                     'others': others, }
         
@@ -365,37 +725,17 @@ class MXSExport():
         
         # visibility
         mx = self.context.scene.maxwell_render
-        layers = self.context.scene.layers
-        render_layers = self.context.scene.render.layers.active.layers
+        # layers as bitmasks, object is visible if its mask shares at least one bit with both
+        layers = layers_mask(self.context.scene.layers)
+        render_layers = layers_mask(self.context.scene.render.layers.active.layers)
         
         def check_visibility(o):
             """Objects which are in visible layers and have hide_render: False are considered visible,
                objects which are only hidden from viewport are renderable, therefore visible."""
-            # if(mx.render_use_layers == 'RENDER'):
-            #     for i, l in enumerate(o.layers):
-            #         if(render_layers[i] is True and l is True and o.hide_render is False):
-            #             return True
-            # else:
-            #     for i, l in enumerate(o.layers):
-            #         if(layers[i] is True and l is True and o.hide_render is False):
-            #             return True
-            
             if(o.hide_render is True):
                 return False
-            
-            s = None
-            r = None
-            for i, l in enumerate(o.layers):
-                if(layers[i] is True and l is True):
-                    s = True
-                    break
-            for i, l in enumerate(o.layers):
-                if(render_layers[i] is True and l is True):
-                    r = True
-                    break
-            if(s and r):
-                return True
-            return False
+            m = layers_mask(o.layers)
+            return ((m & layers) != 0 and (m & render_layers) != 0)
         
         # export type
         might_be_renderable = ['CURVE', 'SURFACE', 'FONT', ]
@@ -564,59 +904,45 @@ class MXSExport():
         for _, me in c_instance_meshes:
             bpy.data.meshes.remove(me)
         
-        # particle instances with hidden bases
-        class KillRecursiveFunctions(Exception):
-            pass
+        # particle instances with hidden bases, objects used by particle systems of exported objects, collected in one pass
+        marked = set()
         
-        def is_psys_instances_marked_to_export(obj):
-            def walk(o):
-                for c in o['children']:
-                    walk(c)
-                ob = o['object']
-                if(ob == obj):
-                    if(o['export']):
-                        raise KillRecursiveFunctions("here it is!")
-            try:
-                for o in h:
-                    walk(o)
-            except KillRecursiveFunctions:
-                return True
+        def walk(o):
+            for c in o['children']:
+                walk(c)
+            if(o['export']):
+                marked.add(o['object'].name)
         
-        def is_hidden_base(hob):
-            for ob in objs:
-                if(len(ob.particle_systems) > 0):
-                    for ps in ob.particle_systems:
-                        marked = is_psys_instances_marked_to_export(ob)
-                        if(marked):
-                            pset = ps.settings
-                            
-                            # check if there are any alive particles
-                            ok = False
-                            for p in ps.particles:
-                                if(p.alive_state == "ALIVE"):
-                                    ok = True
-                                    break
-                            if(not ok):
-                                # if there are no alive particles, it can't be hidden base because it can't be swapped to one of instances
-                                return False
-                            
-                            if(pset.maxwell_render.use == 'PARTICLE_INSTANCES'):
-                                if(pset.render_type in ['OBJECT', 'GROUP', ]):
-                                    if(pset.render_type == 'GROUP' and pset.dupli_group is not None):
-                                        for do in pset.dupli_group.objects:
-                                            if(do == hob):
-                                                return True
-                                    elif(pset.render_type == 'OBJECT' and pset.dupli_object is not None):
-                                        if(pset.dupli_object == hob):
-                                            return True
-            return False
+        for o in h:
+            walk(o)
+        
+        hidden_bases = set()
+        for ob in objs:
+            if(len(ob.particle_systems) == 0 or ob.name not in marked):
+                continue
+            for ps in ob.particle_systems:
+                pset = ps.settings
+                if(pset.maxwell_render.use != 'PARTICLE_INSTANCES' or pset.render_type not in ['OBJECT', 'GROUP', ]):
+                    continue
+                # check if there are any alive particles
+                ok = False
+                for p in ps.particles:
+                    if(p.alive_state == "ALIVE"):
+                        ok = True
+                        break
+                if(not ok):
+                    # if there are no alive particles, it can't be hidden base because it can't be swapped to one of instances
+                    continue
+                if(pset.render_type == 'GROUP' and pset.dupli_group is not None):
+                    hidden_bases.update([do.name for do in pset.dupli_group.objects])
+                elif(pset.render_type == 'OBJECT' and pset.dupli_object is not None):
+                    hidden_bases.add(pset.dupli_object.name)
         
         def walk(o):
             for c in o['children']:
                 walk(c)
             ob = o['object']
-            hidden_base = is_hidden_base(ob)
-            if(hidden_base):
+            if(ob.name in hidden_bases):
                 o['export'] = True
                 o['extra_options'] = {'hidden_base': True, }
         
@@ -706,6 +1032,19 @@ class MXSExport():
         for o in h:
             walk(o)
         
+        # static / dynamic part of animation
+        if(self.split is not None):
+            dynamic = dynamic_objects(objs)
+            
+            def walk(o):
+                for c in o['children']:
+                    walk(c)
+                if((o['object'].name in dynamic) == (self.split == 'STATIC')):
+                    o['export'] = False
+            
+            for o in h:
+                walk(o)
+        
         # split objects to lists
         instances = []
         meshes = []
@@ -762,8 +1101,8 @@ class MXSExport():
         # self._asset_references = asset_references
         self._volumetrics = volumetrics
         
-        # no visible camera
-        if(len(self._cameras) == 0):
+        # no visible camera, static part of animation has no cameras by design, they are always exported with each frame
+        if(len(self._cameras) == 0 and self.split != 'STATIC'):
             log("no visible and active camera in scene!", 2, LogStyles.WARNING)
             log("trying to find hidden active camera..", 3)
             ac = self.context.scene.camera
@@ -784,21 +1123,21 @@ class MXSExport():
         # dupliverts / duplifaces
         self._duplicates = []
         
+        # exported meshes and bases by object name, entries can only move from meshes to bases, so lookup stays valid
+        dupli_objects = {}
+        for o in self._meshes + self._bases:
+            dupli_objects.setdefault(o['object'].name, o)
+        # ids of entries in bases, dicts can't be in set and list search compares whole dicts
+        in_bases = set([id(o) for o in self._bases])
+        
         def find_dupli_object(obj):
-            for o in self._meshes:
-                ob = o['object']
-                if(ob == obj):
-                    return o
-            for o in self._bases:
-                ob = o['object']
-                if(ob == obj):
-                    return o
-            return None
+            return dupli_objects.get(obj.name)
         
         def put_to_bases(o):
-            if(o not in self._bases and o in self._meshes):
+            if(o is not None and id(o) not in in_bases):
                 self._meshes.remove(o)
                 self._bases.append(o)
+                in_bases.add(id(o))
         
         # duplicate list, because i might modify it while looping it..
         
@@ -820,20 +1159,43 @@ class MXSExport():
                 return str(self.value)
         
         unique = Unique()
+        
+        # group name > (objects, indices, (n, 4, 4) matrices relative to duplicator), group is expanded only by its first duplicator
+        group_cache = {}
+        
+        def dupli_list(ob):
+            """Duplis of object as list of (object, index, world matrix). Group contents are expanded once,
+            other duplicators of the same group just compose their matrix with cached local matrices."""
+            g = None
+            if(ob.dupli_type == 'GROUP' and ob.dupli_group is not None):
+                g = ob.dupli_group
+            mw = numpy.array(ob.matrix_world, dtype=numpy.float64, )
+            if(g is not None and g.name in group_cache):
+                dos, dis, ls = group_cache[g.name]
+                ms = numpy.einsum('ij,njk->nik', mw, ls, )
+                return [(do, di, Matrix(m.tolist()), ) for do, di, m in zip(dos, dis, ms)]
+            
+            ob.dupli_list_create(self.context.scene, settings='RENDER')
+            # i've just spent half an hour trying to understand why these lousy matrices does not work
+            # then suddenly i realized that calling dupli_list_clear might remove them from memory
+            # and i am just getting some garbage data..
+            # remember this in future, and do NOT use data after freeing them from memory
+            r = [(dli.object, dli.index, dli.matrix.copy(), ) for dli in ob.dupli_list]
+            ob.dupli_list_clear()
+            
+            # duplicator with zero scale can't be used to get local matrices, next one will try again
+            if(g is not None and abs(numpy.linalg.det(mw)) > 1e-12):
+                ms = numpy.array([m for _, _, m in r], dtype=numpy.float64, ).reshape(-1, 4, 4)
+                ls = numpy.einsum('ij,njk->nik', numpy.linalg.inv(mw), ms, )
+                group_cache[g.name] = ([do for do, _, _ in r], [di for _, di, _ in r], ls, )
+            return r
+        
         meshes = self._meshes[:]
         for o in meshes:
             ob = o['object']
             if(ob.dupli_type != 'NONE'):
                 if(ob.dupli_type == 'FACES' or ob.dupli_type == 'VERTS' or ob.dupli_type == 'GROUP'):
-                    ob.dupli_list_create(self.context.scene, settings='RENDER')
-                    for dli in ob.dupli_list:
-                        do = dli.object
-                        # i've just spent half an hour trying to understand why these lousy matrices does not work
-                        # then suddenly i realized that calling dupli_list_clear might remove them from memory
-                        # and i am just getting some garbage data..
-                        # remember this in future, and do NOT use data after freeing them from memory
-                        dm = dli.matrix.copy()
-                        di = dli.index
+                    for do, di, dm in dupli_list(ob):
                         io = find_dupli_object(do)
                         if(self.use_instances):
                             put_to_bases(io)
@@ -851,7 +1213,6 @@ class MXSExport():
                                  'parent': o,
                                  'type': 'MESH', }
                             self._duplicates.append(d)
-                    ob.dupli_list_clear()
             
             if(len(ob.particle_systems) > 0):
                 for ps in ob.particle_systems:
@@ -906,11 +1267,7 @@ class MXSExport():
             # check for objects that are exported as empty (eg real empty or mesh without faces), those cas still carry duplis
             # or check for meshes with zero faces but vertex duplis
             if((ob.dupli_type == 'GROUP' and ob.dupli_group) or (ob.type == 'MESH' and len(ob.data.polygons) == 0 and ob.dupli_type == 'VERTS')):
-                ob.dupli_list_create(self.context.scene, settings='RENDER')
-                for dli in ob.dupli_list:
-                    do = dli.object
-                    dm = dli.matrix.copy()
-                    di = dli.index
+                for do, di, dm in dupli_list(ob):
                     io = find_dupli_object(do)
                     if(self.use_instances):
                         put_to_bases(io)
@@ -927,22 +1284,20 @@ class MXSExport():
                              'parent': o,
                              'type': 'MESH', }
                         self._duplicates.append(d)
-                ob.dupli_list_clear()
         
         # find instances without base and change first one to base, quick and dirty..
         # this case happens when object (by name chosen as base) is on hidden layer and marked to be not exported
         # also, hope this is the last change of this nasty piece of code..
-        def find_base_object_name(mnm):
-            for bo in self._bases:
-                if(bo['mesh'].name == mnm):
-                    return bo['object'].name
-        
-        instances2 = self._instances[:]
-        for o in instances2:
-            if(find_base_object_name(o['mesh'].name) is None):
+        base_mesh_names = set([bo['mesh'].name for bo in self._bases])
+        instances2 = []
+        for o in self._instances:
+            if(o['mesh'].name not in base_mesh_names):
                 o['export_type'] = 'BASE_INSTANCE'
                 self._bases.append(o)
-                self._instances.remove(o)
+                base_mesh_names.add(o['mesh'].name)
+            else:
+                instances2.append(o)
+        self._instances = instances2
         
         # overriden instances
         instances2 = self._instances[:]
@@ -1117,6 +1472,64 @@ class MXSExport():
         
         return h
     
+    def _material_usage(self):
+        """Material name > list of (object name, role) for everything collected to export, made in single pass over objects.
+        Roles: 'SLOT' material slot of exported mesh, 'BACKFACE', 'MATERIAL' (extension / reference material), 'WIREFRAME'."""
+        usage = {}
+        
+        def add(n, o, role, ):
+            if(n != ''):
+                usage.setdefault(n, []).append((o.name, role, ))
+        
+        # slots, duplicates of the same object are counted once
+        seen = set()
+        for ls in (self._meshes, self._bases, self._instances, self._duplicates, ):
+            for d in ls:
+                o = d['object']
+                if(o.name in seen):
+                    continue
+                seen.add(o.name)
+                for ms in o.material_slots:
+                    if(ms.material is not None):
+                        add(ms.material.name, o, 'SLOT', )
+        
+        for ls in (self._empties, self._meshes, self._bases, ):
+            for d in ls:
+                add(d['object'].maxwell_render.backface_material, d['object'], 'BACKFACE', )
+        for d in self._references:
+            m = d['object'].maxwell_render.reference
+            add(m.material, d['object'], 'MATERIAL', )
+            add(m.backface_material, d['object'], 'BACKFACE', )
+        for d in self._particles:
+            m = None
+            if(d['export_type'] == 'HAIR'):
+                m = d['psys'].settings.maxwell_render.hair
+            elif(d['export_type'] == 'PARTICLES'):
+                m = d['psys'].settings.maxwell_render.particles
+            if(m is not None):
+                add(m.material, d['object'], 'MATERIAL', )
+                add(m.backface_material, d['object'], 'BACKFACE', )
+        for d in self._volumetrics:
+            m = d['object'].maxwell_render.volumetrics
+            add(m.material, d['object'], 'MATERIAL', )
+            add(m.backface_material, d['object'], 'BACKFACE', )
+        for d in self._modifiers:
+            m = None
+            if(d['export_type'] == 'GRASS'):
+                m = d['object'].maxwell_render.grass
+            elif(d['export_type'] == 'SEA'):
+                m = d['object'].maxwell_render.sea
+            if(m is not None):
+                add(m.material, d['object'], 'MATERIAL', )
+                add(m.backface_material, d['object'], 'BACKFACE', )
+        
+        if(self.use_wireframe):
+            mx = self.context.scene.maxwell_render
+            add(mx.export_wire_wire_material, self.context.scene, 'WIREFRAME', )
+            add(mx.export_wire_clay_material, self.context.scene, 'WIREFRAME', )
+        
+        return usage
+    
     def _export(self):
         # init stats
         self.stats = MXSExportStats()
@@ -1193,54 +1606,21 @@ class MXSExport():
             self.wireframe_base_name = wb.m_name
         
         log("writing materials:", 1, LogStyles.MESSAGE, )
+        usage = self._material_usage()
+        used_only = self.context.scene.maxwell_render.export_used_materials_only
         for mat in bpy.data.materials:
             mx = mat.maxwell_render
-            # only materials with (users - fake_user) > 0
-            u = mat.users
-            if(mat.use_fake_user):
-                u -= 1
-            # count material usage as backface material and in extensions
-            for d in self._empties:
-                if(d['object'].maxwell_render.backface_material == mat.name):
-                    u += 1
-            for d in self._meshes:
-                if(d['object'].maxwell_render.backface_material == mat.name):
-                    u += 1
-            for d in self._bases:
-                if(d['object'].maxwell_render.backface_material == mat.name):
-                    u += 1
-            for d in self._references:
-                if(d['object'].maxwell_render.reference.material == mat.name):
-                    u += 1
-                if(d['object'].maxwell_render.reference.backface_material == mat.name):
-                    u += 1
-            for d in self._particles:
-                if(d['export_type'] == 'HAIR'):
-                    if(d['psys'].settings.maxwell_render.hair.material == mat.name):
-                        u += 1
-                    if(d['psys'].settings.maxwell_render.hair.backface_material == mat.name):
-                        u += 1
-                if(d['export_type'] == 'PARTICLES'):
-                    if(d['psys'].settings.maxwell_render.particles.material == mat.name):
-                        u += 1
-                    if(d['psys'].settings.maxwell_render.particles.backface_material == mat.name):
-                        u += 1
-            for d in self._volumetrics:
-                if(d['object'].maxwell_render.volumetrics.material == mat.name):
-                    u += 1
-                if(d['object'].maxwell_render.volumetrics.backface_material == mat.name):
-                    u += 1
-            for d in self._modifiers:
-                if(d['export_type'] == 'GRASS'):
-                    if(d['object'].maxwell_render.grass.material == mat.name):
-                        u += 1
-                    if(d['object'].maxwell_render.grass.backface_material == mat.name):
-                        u += 1
-                if(d['export_type'] == 'SEA'):
-                    if(d['object'].maxwell_render.sea.material == mat.name):
-                        u += 1
-                    if(d['object'].maxwell_render.sea.backface_material == mat.name):
-                        u += 1
+            uses = usage.get(mat.name, [])
+            if(used_only):
+                # only what exported objects really reference
+                u = len(uses)
+            else:
+                # only materials with (users - fake_user) > 0
+                u = mat.users
+                if(mat.use_fake_user):
+                    u -= 1
+                # count material usage as backface material and in extensions, slots are already in users
+                u += len([r for r in uses if r[1] in ('BACKFACE', 'MATERIAL', )])
             
             if(u > 0):
                 if(mx.use == 'REFERENCE'):
@@ -1283,12 +1663,13 @@ class MXSExport():
                     self._write(mod)
         
         log("writing instance bases:", 1, LogStyles.MESSAGE, )
-        bases = []
+        # mesh datablock name > base object, first one wins
+        bases = {}
         for d in self._bases:
             o = MXSMesh(d)
             self._write(o)
             
-            bases.append(o)
+            bases.setdefault(o.mesh_name, o)
             meshes.append(o)
             
             if(self.use_wireframe):
@@ -1301,45 +1682,80 @@ class MXSExport():
                 if(mod is not None):
                     self._write(mod)
         
-        def find_base(mnm):
-            for b in bases:
-                if(b.mesh_name == mnm):
-                    return b
+        def batch(ls, key, ):
+            # group by base mesh name, instances of one base are written together, order of bases is kept
+            r = {}
+            order = []
+            for d in ls:
+                k = key(d)
+                if(k not in r):
+                    r[k] = []
+                    order.append(k)
+                r[k].append(d)
+            return [(k, r[k], ) for k in order]
         
         log("writing instances:", 1, LogStyles.MESSAGE, )
-        for d in self._instances:
+        
+        def instance_mesh_name(d):
             if(d['converted']):
-                b = find_base(d['object'].data.name)
-            else:
-                b = find_base(d['mesh'].name)
-            o = MXSMeshInstance(d, b, )
-            self._write(o)
-            
-            if(self.use_wireframe):
-                w = MXSWireframeInstances(o, self.wireframe_base_name)
-                w.m_parent = self.wireframe_container_name
-                self._write(w)
+                return d['object'].data.name
+            return d['mesh'].name
+        
+        for mnm, ds in batch(self._instances, instance_mesh_name, ):
+            b = bases.get(mnm)
+            for d in ds:
+                o = MXSMeshInstance(d, b, )
+                self._write(o)
+                
+                if(self.use_wireframe):
+                    w = MXSWireframeInstances(o, self.wireframe_base_name)
+                    w.m_parent = self.wireframe_container_name
+                    self._write(w)
         
         log("writing duplicates:", 1, LogStyles.MESSAGE, )
-        for d in self._duplicates:
-            if(not self.use_instances):
+        if(not self.use_instances):
+            for d in self._duplicates:
                 o = MXSMesh(d)
                 self._write(o)
-            else:
-                b = find_base(d['mesh'].name)
-                o = MXSMeshInstance(d, b, )
+                
+                if(self.use_wireframe):
+                    w = MXSWireframeInstances(o, self.wireframe_base_name)
+                    w.m_parent = self.wireframe_container_name
+                    self._write(w)
+        elif(self.use_wireframe):
+            # wireframe needs each instance as separate object
+            for mnm, ds in batch(self._duplicates, lambda d: d['mesh'].name, ):
+                b = bases.get(mnm)
+                for d in ds:
+                    o = MXSMeshInstance(d, b, )
+                    self._write(o)
+                    
+                    w = MXSWireframeInstances(o, self.wireframe_base_name)
+                    w.m_parent = self.wireframe_container_name
+                    self._write(w)
+        else:
+            def instancer(d):
+                # duplis sharing everything but matrix and name
+                h = None
+                if('extra_options' in d):
+                    h = d['extra_options'].get('hide')
+                return (d['mesh'].name, d['object'].name, d['parent']['object'].name, h, )
+            
+            for k, ds in batch(self._duplicates, instancer, ):
+                b = bases.get(k[0])
+                o = MXSMeshInstances(ds, b, )
                 self._write(o)
-            
-            if(self.use_wireframe):
-                w = MXSWireframeInstances(o, self.wireframe_base_name)
-                w.m_parent = self.wireframe_container_name
-                self._write(w)
         
         log("writing mxs references:", 1, LogStyles.MESSAGE, )
         for d in self._references:
             o = MXSReference(d)
             self._write(o)
         
+        if(self.static_path is not None):
+            o = MXSStaticReference(self.uuid, self.static_path, )
+            self._write(o)
+            utils.wipe_out_object(o.wipe_out_object, and_data=True, )
+        
         # log("writing asset references:", 1, LogStyles.MESSAGE, )
         # for d in self._asset_references:
         #     o = MXSAssetReference(d)
@@ -1360,10 +1776,13 @@ class MXSExport():
             o = MXSVolumetrics(d)
             self._write(o)
         
+        # object name > written mesh, first one wins
+        meshes_by_name = {}
+        for m in meshes:
+            meshes_by_name.setdefault(m.m_name, m)
+        
         def find_mesh(nm):
-            for m in meshes:
-                if(m.m_name == nm):
-                    return m
+            return meshes_by_name.get(nm)
         
         log("writing object modifiers:", 1, LogStyles.MESSAGE, )
         for d in self._modifiers:
@@ -1526,6 +1945,9 @@ class MXSExport():
         if(not o.skip):
             self.stats.add(o)
         
+        if(o.m_type == 'MESH_INSTANCES'):
+            # batch counts as many objects as it has instances
+            self.progress_current += len(o.m_names) - 1
         self._progress()
         
         if(system.PLATFORM == 'Darwin'):
@@ -1622,10 +2044,18 @@ class MXSExport():
                         self.part_data_paths.append(p)
                 a = o._repr()
                 self.serialized_data.append(a)
+            elif(o.m_type == 'MESH_INSTANCES'):
+                n = "{}-{}".format(o.m_name, uuid.uuid1())
+                p = os.path.join(self.tmp_dir, "{0}.bininst".format(n))
+                w = tmpio.MXSBinInstancesWriter(p, o.instance_matrices)
+                self.inst_data_paths.append(p)
+                a = o._repr()
+                a['instances_data'] = p
+                self.serialized_data.append(a)
             elif(o.m_type == 'WIREFRAME_INSTANCES'):
                 n = "{}-{}".format(o.m_name, uuid.uuid1())
                 p = os.path.join(self.tmp_dir, "{0}.binwire".format(n))
-                w = tmpio.MXSBinWireWriter(p, o.m_wire_matrices)
+                w = tmpio.MXSBinWireWriter(p, o.wire_matrices)
                 self.wire_data_paths.append(p)
                 a = o._repr()
                 a['wire_matrices'] = p
@@ -1637,6 +2067,9 @@ class MXSExport():
             allowed = ['EMPTY', 'MESH', 'MESH_INSTANCE', 'PARTICLES', 'HAIR', 'REFERENCE', 'VOLUMETRICS', 'SEA', ]
             if(o.m_type in allowed):
                 self.hierarchy.append((o.m_name, o.m_parent, o.m_type))
+            elif(o.m_type == 'MESH_INSTANCES'):
+                for n in o.m_names:
+                    self.hierarchy.append((n, o.m_parent, 'MESH_INSTANCE'))
             
         elif(system.PLATFORM == 'Linux' or system.PLATFORM == 'Windows'):
             if(o.skip):
@@ -1708,6 +2141,10 @@ class MXSExport():
             elif(o.m_type == 'MESH_INSTANCE'):
                 self.mxs.instance(o.m_name, o.m_instanced, pack_matrix(o), o.m_motion_blur, pack_object_props(o), o.m_materials, o.m_backface_material, )
                 self.hierarchy.append((o.m_name, o.m_parent, o.m_type))
+            elif(o.m_type == 'MESH_INSTANCES'):
+                self.mxs.instances(o.m_names, o.m_instanced, o.instance_matrices, o.m_motion_blur, pack_object_props(o), o.m_materials, o.m_backface_material, )
+                for n in o.m_names:
+                    self.hierarchy.append((n, o.m_parent, 'MESH_INSTANCE'))
             elif(o.m_type == 'SCENE'):
                 other = {'protect': o.m_export_protect_mxs,
                          'extra_sampling_enabled': o.m_extra_sampling_enabled,
@@ -1875,10 +2312,10 @@ class MXSExport():
                 e = self.wireframe_base_name
                 c = self.wireframe_container_name
                 p = pack_object_props(o)
-                wm = bpy.context.scene.maxwell_render.export_wire_wire_material
-                for i, m in enumerate(o.m_wire_matrices):
-                    n = "{0}-{1}".format(o.m_name, i)
-                    self.mxs.instance(n, e, m, p, wm, None, )
+                ns = ["{0}-{1}".format(o.m_name, i) for i in range(o.m_num_wires)]
+                # instances inherit wire material from base, same as on mac
+                self.mxs.instances(ns, e, o.wire_matrices_unpacked(), None, p, None, None, )
+                for n in ns:
                     self.hierarchy.append((n, c, 'MESH_INSTANCE'))
             else:
                 raise TypeError("{0} is unknown type".format(o.m_type))
@@ -1974,6 +2411,10 @@ class MXSExport():
             for p in self.wire_data_paths:
                 rm(p)
         
+        if(hasattr(self, 'inst_data_paths')):
+            for p in self.inst_data_paths:
+                rm(p)
+        
         if(os.path.exists(self.tmp_dir)):
             os.rmdir(self.tmp_dir)
         else:
@@ -1996,6 +2437,11 @@ class MXSDatabase():
     # TODO: use similar mechanism for materials to skip unused before actual export, this will require to check all materials possible uses, like in extensions.
     
     __objects = []
+    # (object, original name) > name and set of lowercase names, so lookups do not scan __objects, which is slow with lots of dupli instances
+    __names = {}
+    __lowercase_names = set()
+    # blender object name > export name, only objects exported under their own name, not dupli instances
+    __export_names = {}
     __valid_chars = "-_ {}{}".format(string.ascii_letters, string.digits)
     
     __objects_marked_to_export = []
@@ -2014,9 +2460,9 @@ class MXSDatabase():
     @classmethod
     def object_name(cls, ob, nm, ):
         orig = nm
-        for o, n, onm in cls.__objects:
-            if(o == ob and onm == orig):
-                return n
+        n = cls.__names.get((ob, orig, ))
+        if(n is not None):
+            return n
         
         nm = cls.__sanitize_name(nm)
         if(cls.__object_name_exists(nm)):
@@ -2024,15 +2470,16 @@ class MXSDatabase():
             log("Maxwell is not case sensitive: renamed to '{}'".format(nm), 3, LogStyles.WARNING, )
             
         cls.__objects.append((ob, nm, orig, ))
+        cls.__names[(ob, orig, )] = nm
+        cls.__lowercase_names.add(nm.lower())
+        if(isinstance(ob, bpy.types.Object) and ob.name == orig):
+            cls.__export_names.setdefault(orig, nm)
         
         return nm
     
     @classmethod
     def __object_name_exists(cls, nm, ):
-        for _, n, _ in cls.__objects:
-            if(n.lower() == nm.lower()):
-                return True
-        return False
+        return (nm.lower() in cls.__lowercase_names)
     
     @classmethod
     def __check_lowercase_duplicate(cls, nm, ):
@@ -2068,9 +2515,16 @@ class MXSDatabase():
             if(name == n):
                 return onm
     
+    @classmethod
+    def export_names(cls, ):
+        return dict(cls.__export_names)
+    
     @classmethod
     def clear(cls):
         cls.__objects = []
+        cls.__names = {}
+        cls.__lowercase_names = set()
+        cls.__export_names = {}
         cls.__objects_marked_to_export = []
 
 
@@ -2811,6 +3265,17 @@ class MXSObject(Serializable):
         
         return (b, p, l, r, s, )
     
+    def _matrices_to_base_and_pivot(self, ms, ):
+        """Like _matrix_to_base_and_pivot, but for many matrices at once (list of Matrix or (N, 4, 4) array), returns list of (b, p, l, r, s)"""
+        if(len(ms) == 0):
+            return []
+        ms = numpy.array(ms, dtype=numpy.float64, ).reshape(-1, 4, 4)
+        bs, ps, ls, rs, ss = matrices_to_base_and_pivot(ms)
+        r = []
+        for b, p, l, e, s in zip(bs.tolist(), ps.tolist(), ls.tolist(), rs.tolist(), ss.tolist(), ):
+            r.append((tuple(map(tuple, b)), tuple(map(tuple, p)), tuple(l), tuple(e), tuple(s), ))
+        return r
+    
     def _transformation(self):
         m = self.b_matrix_world.copy()
         if(self.b_parent):
@@ -2841,7 +3306,8 @@ class MXSObject(Serializable):
                     raise Exception("What's that? Something, somewhere is missing..")
             else:
                 position = 0
-            
+                
+                ms = []
                 for i, (frame, sub) in enumerate(steps):
                     # move timeline
                     sc.frame_set(frame, subframe=sub, )
@@ -2850,12 +3316,15 @@ class MXSObject(Serializable):
                     if(self.b_parent):
                         m = self.b_parent.matrix_world.copy().inverted() * m
                     m *= ROTATE_X_90
-                    b, p, l, r, s = self._matrix_to_base_and_pivot(m)
-                    self.m_motion_blur.append((sub, position, b, p))
-                
+                    ms.append(m)
+                    
                     log("movement: frame: {}, step: {}".format(frame, round(sub, 6)), 3, )
-            
+                
                 sc.frame_set(cf, subframe=sf, )
+                
+                # convert all steps at once
+                for (frame, sub), (b, p, l, r, s) in zip(steps, self._matrices_to_base_and_pivot(ms), ):
+                    self.m_motion_blur.append((sub, position, b, p))
         else:
             self.m_motion_blur = []
     
@@ -3523,6 +3992,39 @@ class MXSMeshInstance(MXSObject):
                     self.m_hide = self.o['extra_options']['hide']
 
 
+class MXSMeshInstances(MXSObject):
+    def __init__(self, ls, base, ):
+        """Dupli instances of one base with the same source object, parent and options, only names and matrices differ."""
+        o = ls[0]
+        log("'{}' > '{}': {} instances".format(o['parent']['object'].name, o['object'].name, len(ls)), 2, )
+        
+        super().__init__(o)
+        self.m_type = 'MESH_INSTANCES'
+        self.m_instanced = base.m_name
+        self.base_b_object = base.b_object
+        
+        self._materials()
+        
+        dpo = bpy.data.objects[o['parent']['object'].name]
+        self.m_parent = MXSDatabase.object_name(dpo, dpo.name)
+        # all instances in one name, it is used only for intermediate files
+        self.m_name = "{}-{}".format(self.m_parent, self.m_instanced)
+        self.m_names = [MXSDatabase.object_name(self.b_object, d['dupli_name']) for d in ls]
+        
+        if('extra_options' in o):
+            if('hide' in o['extra_options']):
+                self.m_hide = o['extra_options']['hide']
+        
+        # parent inverse * dupli matrix * rotate x 90 for all at once
+        pmi = numpy.array(dpo.matrix_world.inverted(), dtype=numpy.float64, )
+        rx = numpy.array(ROTATE_X_90, dtype=numpy.float64, )
+        dms = numpy.array([d['dupli_matrix'] for d in ls], dtype=numpy.float64, ).reshape(-1, 4, 4)
+        ms = numpy.matmul(numpy.matmul(pmi, dms), rx)
+        
+        # not serialized, goes to binary file or directly to writer
+        self.instance_matrices = self._matrices_to_base_and_pivot(ms)
+
+
 class MXSReference(MXSObject):
     def __init__(self, o, ):
         log("'{}' > '{}'".format(o['object'].name, bpy.path.abspath(o['object'].maxwell_render.reference.path), ), 2)
@@ -3566,6 +4068,20 @@ class MXSReference(MXSObject):
                 log("material '{}' does not exist.".format(self.ref.backface_material, ), 3, LogStyles.WARNING, )
 
 
+class MXSStaticReference(MXSReference):
+    def __init__(self, euuid, path, ):
+        n = 'STATIC_REFERENCE_{}'.format(euuid)
+        ob = utils.add_object2(n, None, )
+        mx = ob.maxwell_render.reference
+        mx.enabled = True
+        mx.path = path
+        
+        o = {'parent': None, 'type': 'EMPTY', 'object': ob, 'export_type': 'REFERENCE', 'mesh': None, 'converted': False, 'children': [], 'export': True, }
+        super().__init__(o)
+        
+        self.wipe_out_object = ob
+
+
 class MXSParticles(MXSObject):
     def __init__(self, o, ):
         log("'{}' > '{}' ({})".format(o['parent'].name, o['object'].name, 'PARTICLES', ), 2)
@@ -3625,59 +4141,20 @@ class MXSParticles(MXSObject):
             
             check(ps)
             
-            # i get particle locations in global coordinates, so need to fix that
-            mat = self.b_parent_matrix_world.copy()
-            mat.invert()
-            
-            locs = []
-            vels = []
-            sizes = []
-            
-            for part in ps.particles:
-                if(part.alive_state == "ALIVE"):
-                    l = part.location.copy()
-                    l = mat * l
-                    locs.append(l)
-                    if(mxex.bl_use_velocity):
-                        v = part.velocity.copy()
-                        v = mat * v
-                        vels.append(v)
-                    else:
-                        vels.append(Vector((0.0, 0.0, 0.0)))
-                    # size per particle
-                    if(mxex.bl_use_size):
-                        sizes.append(part.size / 2)
-                    else:
-                        sizes.append(mxex.bl_size / 2)
-            
-            # # fix rotation of .bin
-            # for i, l in enumerate(locs):
-            #     locs[i] = Vector(l * ROTATE_X_90).to_tuple()
-            # if(mxex.bl_use_velocity):
-            #     for i, v in enumerate(vels):
-            #         vels[i] = Vector(v * ROTATE_X_90).to_tuple()
-            
             rfms = Matrix.Scale(1.0, 4)
             rfms[0][0] = -1.0
             rfmr = Matrix.Rotation(math.radians(-90.0), 4, 'Z')
             rfm = rfms * rfmr * ROTATE_X_90
             
-            mry90 = Matrix.Rotation(math.radians(90.0), 4, 'Y')
-            
-            for i, l in enumerate(locs):
-                if(mxex.embed):
-                    locs[i] = Vector(l * ROTATE_X_90).to_tuple()
-                else:
-                    # locs[i] = Vector(l * ROTATE_X_90 * mry90).to_tuple()
-                    locs[i] = Vector(l * rfm).to_tuple()
+            # i get particle locations in global coordinates, so need to fix that
+            mat = self.b_parent_matrix_world.copy()
+            mat.invert()
             
-            if(mxex.bl_use_velocity):
-                for i, v in enumerate(vels):
-                    if(mxex.embed):
-                        vels[i] = Vector(v * ROTATE_X_90).to_tuple()
-                    else:
-                        # vels[i] = Vector(v * ROTATE_X_90 * mry90).to_tuple()
-                        vels[i] = Vector(v * rfm).to_tuple()
+            axes = ROTATE_X_90
+            if(not mxex.embed):
+                axes = rfm
+            b = particle_buffers(ps, mat, mxex.bl_use_velocity, mxex.bl_use_size, mxex.bl_size / 2, 0.5, axes, )
+            n = len(b['locations'])
             
             # particle uv
             if(mxex.uv_layer is not ""):
@@ -3692,7 +4169,7 @@ class MXSParticles(MXSObject):
                         uv_no = i
                         break
                 
-                uv_locs = tuple()
+                uv_locs = []
                 
                 if(len(ps.child_particles) > 0):
                     log("child particles uvs are not supported yet..", 3, LogStyles.WARNING, )
@@ -3711,13 +4188,13 @@ class MXSParticles(MXSObject):
                             if(m.particle_system == ps):
                                 mod = m
                                 break
-                    uv_locs = tuple()
+                    uv_locs = []
                     for i, p in enumerate(ps.particles):
                         co = ps.uv_on_emitter(mod, p, particle_no=i, uv_no=uv_no, )
                         # (x, y, 0.0, )
                         t = co.to_tuple() + (0.0, )
                         # uv_locs += (t[0], t[1] * -1.0, t[2], )
-                        uv_locs += (t[0], 1.0 - t[1], t[2], )
+                        uv_locs.extend((t[0], 1.0 - t[1], t[2], ))
                     if(nc1 != 0):
                         ex = int(nc1 / nc0)
                     for i in range(ex):
@@ -3727,34 +4204,21 @@ class MXSParticles(MXSObject):
                 uv_locs = [0.0] * (len(ps.particles) * 3)
                 log("emitter has no UVs or no UV is selected to be used.. root UVs will be exported all roots will be set to (0.0, 0.0)".format(self.mxex.material, ), 3, LogStyles.WARNING, )
             
-            flip_xy = Matrix(((-1.0, 0.0, 0.0, 0.0), (0.0, -1.0, 0.0, 0.0), (0.0, 0.0, 1.0, 0.0), (0.0, 0.0, 0.0, 1.0)))
-            fv = Vector((-1.0, -1.0, 0.0))
-            particles = []
-            for i, ploc in enumerate(locs):
-                # normal from velocity
-                pnor = Vector(vels[i])
-                pnor.normalize()
-                # particles.append((i, ) + tuple(ploc[:3]) + pnor.to_tuple() + tuple(vels[i][:3]) + (sizes[i], ) + uv_locs[i * 3:(i * 3) + 3], )
-                # particles.append((i, ) + tuple(ploc[:3]) + pnor.to_tuple() + tuple(vels[i][:3]) + (sizes[i], ))
-                uv = uv_locs[i * 3:(i * 3) + 3]
-                uvv = Vector(uv).reflect(fv) * flip_xy
-                uvt = (uvv.z, uvv.x, uvv.y, )
-                particles.append((i, ) + tuple(ploc[:3]) + pnor.to_tuple() + tuple(vels[i][:3]) + (sizes[i], ) + uvt, )
+            uv_locs = numpy.array(uv_locs, dtype=numpy.float64, )
+            
+            # uv reflected over (-1, -1, 0) and flipped in xy is (v, u, 0), then swizzled to (z, x, y)
+            uvs = numpy.zeros((n, 3), dtype=numpy.float64, )
+            u = uv_locs.reshape(-1, 3)[:n]
+            uvs[:len(u), 1] = u[:, 1]
+            uvs[:len(u), 2] = u[:, 0]
+            particles = particle_records(b, uvs, )
             
             if(mxex.embed):
-                plocs = [v for v in locs]
-                pvels = [v for v in vels]
-                pnors = []
-                for i, v in enumerate(pvels):
-                    n = Vector(v)
-                    n.normalize()
-                    pnors.append(n)
-                
-                pdata = {'PARTICLE_POSITIONS': [v for l in plocs for v in l],
-                         'PARTICLE_SPEEDS': [v for l in pvels for v in l],
-                         'PARTICLE_RADII': [v for v in sizes],
-                         'PARTICLE_IDS': [i for i in range(len(locs))],
-                         'PARTICLE_NORMALS': [v for l in pnors for v in l],
+                pdata = {'PARTICLE_POSITIONS': b['locations'].reshape(-1),
+                         'PARTICLE_SPEEDS': b['velocities'].reshape(-1),
+                         'PARTICLE_RADII': b['sizes'],
+                         'PARTICLE_IDS': numpy.arange(n, dtype=numpy.int32, ),
+                         'PARTICLE_NORMALS': b['normals'].reshape(-1),
                          # 'PARTICLE_FLAG_COLORS', [0], 0, 0, '8 BYTEARRAY', 1, 1, True)
                          # 'PARTICLE_COLORS', [0.0], 0.0, 0.0, '6 FLOATARRAY', 4, 1, True)
                          'PARTICLE_UVW': uv_locs,
@@ -3771,7 +4235,8 @@ class MXSParticles(MXSObject):
                         'particles': particles,
                         'fps': bpy.context.scene.render.fps,
                         'size': 1.0 if mxex.bl_use_size else mxex.bl_size / 2,
-                        'log_indent': 3, }
+                        'log_indent': 3,
+                        'reuse': True, }
                 rfbw = rfbin.RFBinWriter(**prms)
                 mxex.bin_filename = rfbw.path
                 
@@ -4283,75 +4748,26 @@ class MXSCloner(MXSModifier):
             
             check(ps)
             
-            locs = []
-            vels = []
-            sizes = []
-            
-            for part in ps.particles:
-                if(part.alive_state == "ALIVE"):
-                    l = part.location.copy()
-                    locs.append(l)
-                    if(mxex.bl_use_velocity):
-                        v = part.velocity.copy()
-                        vels.append(v)
-                    else:
-                        vels.append(Vector((0.0, 0.0, 0.0)))
-                    # size per particle
-                    # if(mxex.bl_use_size):
-                    #     sizes.append(part.size / 2)
-                    # else:
-                    #     sizes.append(mxex.bl_size / 2)
-                    if(mxex.bl_use_size):
-                        sizes.append(part.size)
-                    else:
-                        sizes.append(mxex.bl_size)
-            
             rfms = Matrix.Scale(1.0, 4)
             rfms[0][0] = -1.0
             rfmr = Matrix.Rotation(math.radians(-90.0), 4, 'Z')
             rfm = rfms * rfmr * ROTATE_X_90
             
-            mry90 = Matrix.Rotation(math.radians(90.0), 4, 'Y')
-            
-            for i, l in enumerate(locs):
-                if(mxex.embed):
-                    locs[i] = Vector(l * ROTATE_X_90).to_tuple()
-                else:
-                    # locs[i] = Vector(l * ROTATE_X_90 * mry90).to_tuple()
-                    locs[i] = Vector(l * rfm).to_tuple()
-            
-            if(mxex.bl_use_velocity):
-                for i, v in enumerate(vels):
-                    if(mxex.embed):
-                        vels[i] = Vector(v * ROTATE_X_90).to_tuple()
-                    else:
-                        # vels[i] = Vector(v * ROTATE_X_90 * mry90).to_tuple()
-                        vels[i] = Vector(v * rfm).to_tuple()
-            
-            particles = []
-            for i, ploc in enumerate(locs):
-                # normal from velocity
-                pnor = Vector(vels[i])
-                pnor.normalize()
-                particles.append((i, ) + tuple(ploc[:3]) + pnor.to_tuple() + tuple(vels[i][:3]) + (sizes[i], ) + (0.0, 0.0, 0.0, ))
+            axes = ROTATE_X_90
+            if(not mxex.embed):
+                axes = rfm
+            # size per particle, unlike particles, cloner takes size as it is
+            b = particle_buffers(ps, None, mxex.bl_use_velocity, mxex.bl_use_size, mxex.bl_size, 1.0, axes, )
+            n = len(b['locations'])
+            particles = particle_records(b, )
             
             if(mxex.embed):
-                plocs = [v for v in locs]
-                pvels = [v for v in vels]
-                pnors = []
-                for i, v in enumerate(pvels):
-                    n = Vector(v)
-                    n.normalize()
-                    pnors.append(n)
-                
-                uv_locs = [0.0] * (len(ps.particles) * 3)
-                
-                pdata = {'PARTICLE_POSITIONS': [v for l in plocs for v in l],
-                         'PARTICLE_SPEEDS': [v for l in pvels for v in l],
-                         'PARTICLE_RADII': [v for v in sizes],
-                         'PARTICLE_IDS': [i for i in range(len(locs))],
-                         'PARTICLE_NORMALS': [v for l in pnors for v in l],
-                         'PARTICLE_UVW': uv_locs, }
+                pdata = {'PARTICLE_POSITIONS': b['locations'].reshape(-1),
+                         'PARTICLE_SPEEDS': b['velocities'].reshape(-1),
+                         'PARTICLE_RADII': b['sizes'],
+                         'PARTICLE_IDS': numpy.arange(n, dtype=numpy.int32, ),
+                         'PARTICLE_NORMALS': b['normals'].reshape(-1),
+                         'PARTICLE_UVW': numpy.zeros(len(ps.particles) * 3, dtype=numpy.float64, ), }
             else:
                 if(os.path.exists(bpy.path.abspath(mxex.directory)) and not mxex.overwrite):
                     raise OSError("file: {} exists".format(bpy.path.abspath(mxex.directory)))
@@ -4364,7 +4780,8 @@ class MXSCloner(MXSModifier):
                         'fps': bpy.context.scene.render.fps,
                         # 'size': 1.0 if mxex.bl_use_size else mxex.bl_size / 2,
                         'size': 1.0 if mxex.bl_use_size else mxex.bl_size,
-                        'log_indent': 3, }
+                        'log_indent': 3,
+                        'reuse': True, }
                 rfbw = rfbin.RFBinWriter(**prms)
                 mxex.filename = rfbw.path
                 pdata = rfbw.path
@@ -5371,19 +5788,19 @@ class MXSWireframeInstances(MXSObject):
         
         me.transform(mw)
         
-        vs = tuple([v.co.copy() for v in me.vertices])
-        es = tuple([tuple([i for i in e.vertices]) for e in me.edges])
-        ms = self._calc_marices(vs=vs, es=es, )
-        
-        dt = []
-        for m in ms:
-            b, p, l, r, s = self._transformation2(m)
-            dt.append((b, p, l, r, s, ))
+        vs = numpy.zeros(len(me.vertices) * 3, dtype=numpy.float32, )
+        me.vertices.foreach_get('co', vs)
+        es = numpy.zeros(len(me.edges) * 2, dtype=numpy.int32, )
+        me.edges.foreach_get('vertices', es)
+        ms = self._calc_marices(vs=vs.reshape(-1, 3).astype(numpy.float64), es=es.reshape(-1, 2), )
         
         bpy.data.meshes.remove(me)
         
-        self.m_num_wires = len(dt)
-        self.m_wire_matrices = dt
+        b, p, l, r, s = self._transformation2(ms)
+        # compact (n, 18) array, base, rotation and scale, pivot is always the same and location is base origin
+        # not serialized, goes to binary file or directly to writer
+        self.wire_matrices = numpy.concatenate((b.reshape(-1, 12), r, s, ), axis=1, ).astype(numpy.float32)
+        self.m_num_wires = len(self.wire_matrices)
         
         self.m_name = MXSDatabase.object_name(self.b_object, 'wireframe-{}'.format(o.m_name))
         
@@ -5391,37 +5808,56 @@ class MXSWireframeInstances(MXSObject):
         # self.m_materials = [wire_material_name]
     
     def _calc_marices(self, vs, es, ):
-        """Calculate wire matrices."""
-        
-        def distance(a, b):
-            return ((a.x - b.x) ** 2 + (a.y - b.y) ** 2 + (a.z - b.z) ** 2) ** 0.5
-        
-        matrices = []
-        up = Vector((0, 0, 1))
-        for i, e in enumerate(es):
-            a = vs[e[0]]
-            b = vs[e[1]]
-            d = distance(a, b)
-            
-            # v1
-            quat = maths.rotation_to(Vector((0, 0, 1)), b - a)
-            mr = quat.to_matrix().to_4x4()
-            mt = Matrix.Translation(a)
-            mtr = mt * mr
-            
-            # # v2
-            # mtr = maths.look_at_matrix(a, Vector(maths.shift_vert_along_normal(a, b-a, -1.0)), up, )
-            
-            # add scale as well
-            ms = Matrix.Scale(d, 4, up)
-            m = mtr * ms
-            matrices.append(m)
-        
-        return matrices
+        """Calculate wire matrices, vs is (n, 3) array of vertex locations, es is (m, 2) array of edge vertex indices, returns (m, 4, 4) array."""
+        a = vs[es[:, 0]]
+        v = vs[es[:, 1]] - a
+        d = numpy.sqrt(numpy.sum(v * v, axis=1, ))
+        n = numpy.zeros(v.shape, dtype=numpy.float64, )
+        ok = d > 0.0
+        n[ok] = v[ok] / d[ok][:, None]
+        
+        # maths.rotation_to(Vector((0, 0, 1)), b - a) for all edges, quaternion as w, x, y, z
+        dot = n[:, 2]
+        q = numpy.zeros((len(n), 4), dtype=numpy.float64, )
+        q[:, 0] = 1.0 + dot
+        q[:, 1] = -n[:, 1]
+        q[:, 2] = n[:, 0]
+        ql = numpy.sqrt(numpy.sum(q * q, axis=1, ))
+        ql[ql == 0.0] = 1.0
+        q /= ql[:, None]
+        q[dot > 0.999999] = (1.0, 0.0, 0.0, 0.0, )
+        # half turn around -y
+        q[dot < -0.999999] = (0.0, 0.0, -1.0, 0.0, )
+        
+        w, x, y, z = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+        ms = numpy.zeros((len(n), 4, 4), dtype=numpy.float64, )
+        ms[:, 0, 0] = 1.0 - 2.0 * (y * y + z * z)
+        ms[:, 0, 1] = 2.0 * (x * y - w * z)
+        ms[:, 0, 2] = 2.0 * (x * z + w * y)
+        ms[:, 1, 0] = 2.0 * (x * y + w * z)
+        ms[:, 1, 1] = 1.0 - 2.0 * (x * x + z * z)
+        ms[:, 1, 2] = 2.0 * (y * z - w * x)
+        ms[:, 2, 0] = 2.0 * (x * z - w * y)
+        ms[:, 2, 1] = 2.0 * (y * z + w * x)
+        ms[:, 2, 2] = 1.0 - 2.0 * (x * x + y * y)
+        # scale along z to edge length
+        ms[:, :3, 2] *= d[:, None]
+        # translate to first vertex
+        ms[:, :3, 3] = a
+        ms[:, 3, 3] = 1.0
+        return ms
     
-    def _transformation2(self, m, ):
+    def _transformation2(self, ms, ):
+        # all wire matrices converted at once, returns arrays
         if(self.b_parent):
-            m = self.b_parent_matrix_world.copy().inverted() * m
-        m *= ROTATE_X_90
-        b, p, l, r, s = self._matrix_to_base_and_pivot(m)
-        return (b, p, l, r, s, )
+            pmi = numpy.array(self.b_parent_matrix_world.inverted(), dtype=numpy.float64, )
+            ms = numpy.matmul(pmi, ms)
+        ms = numpy.matmul(ms, numpy.array(ROTATE_X_90, dtype=numpy.float64, ))
+        return matrices_to_base_and_pivot(ms)
+    
+    def wire_matrices_unpacked(self):
+        """Yields (base, pivot, location, rotation, scale) for each wire."""
+        p = ((0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0), )
+        for w in self.wire_matrices.tolist():
+            b = (tuple(w[0:3]), tuple(w[3:6]), tuple(w[6:9]), tuple(w[9:12]), )
+            yield (b, p, b[0], tuple(w[12:15]), tuple(w[15:18]), )
@@ -27,6 +27,7 @@ import json
 import sys
 import re
 
+import numpy
 import bpy
 from mathutils import Matrix, Vector
 from bpy_extras import io_utils
@@ -38,6 +39,49 @@ from . import maths
 from . import system
 from . import rfbin
 from . import mxs
+from .support import read_mxs_arrays
+
+
+def mesh_from_arrays(name, vertices, triangles, uvs, ):
+    """Create mesh datablock in bulk with foreach_set.
+    vertices: (n, 3) float, triangles: (n, 6) int as (v0, v1, v2, n0, n1, n2), uvs: list of (n, 9) float as (u, v, w) per triangle corner."""
+    vs = numpy.asarray(vertices, dtype=numpy.float32, ).reshape(-1, 3)
+    ts = numpy.asarray(triangles, dtype=numpy.int32, ).reshape(-1, 6)
+    nv = len(vs)
+    nt = len(ts)
+    
+    me = bpy.data.meshes.new(name)
+    me.vertices.add(nv)
+    me.vertices.foreach_set('co', vs.ravel())
+    me.loops.add(nt * 3)
+    me.loops.foreach_set('vertex_index', ts[:, :3].ravel())
+    me.polygons.add(nt)
+    me.polygons.foreach_set('loop_start', numpy.arange(0, nt * 3, 3, dtype=numpy.int32, ))
+    me.polygons.foreach_set('loop_total', numpy.full(nt, 3, dtype=numpy.int32, ))
+    # flat shaded triangle has the same normal on all three corners
+    flat = (ts[:, 3] == ts[:, 4]) & (ts[:, 4] == ts[:, 5])
+    me.polygons.foreach_set('use_smooth', numpy.logical_not(flat))
+    me.update(calc_edges=True, )
+    
+    for i, uv in enumerate(uvs):
+        uv = numpy.asarray(uv, dtype=numpy.float32, ).reshape(-1, 9)
+        me.uv_textures.new(name="uv{0}".format(i))
+        # no need to loop, maxwell meshes are always(?) triangles, drop w and keep u, v per loop
+        me.uv_layers[i].data.foreach_set('uv', uv[:, (0, 1, 3, 4, 6, 7, )].ravel())
+    
+    return me
+
+
+def bbox_mesh(name, bbox, ):
+    """Wire box mesh standing in for not yet loaded geometry. bbox: ((min x, y, z), (max x, y, z)) or None."""
+    me = bpy.data.meshes.new(name)
+    if(bbox is None):
+        return me
+    (ax, ay, az), (bx, by, bz) = bbox
+    vs = ((ax, ay, az), (bx, ay, az), (bx, by, az), (ax, by, az), (ax, ay, bz), (bx, ay, bz), (bx, by, bz), (ax, by, bz), )
+    es = ((0, 1), (1, 2), (2, 3), (3, 0), (4, 5), (5, 6), (6, 7), (7, 4), (0, 4), (1, 5), (2, 6), (3, 7), )
+    me.from_pydata(vs, es, [])
+    return me
 
 
 class MXSImportMacOSX():
@@ -86,6 +130,14 @@ class MXSImportMacOSX():
         with open(self.scene_data_path, 'r') as f:
             data = json.load(f)
         
+        self._build(data)
+        log("finalizing..", 1, LogStyles.MESSAGE)
+        self._finalize()
+    
+    def _build(self, data):
+        """Create objects from one scene data list, set their transformations and hierarchy."""
+        # mxs name > created object, blender renames objects when name is taken (i.e. more files with the same names), instances have to use this
+        self._created = {}
         for d in data:
             t = None
             try:
@@ -114,6 +166,8 @@ class MXSImportMacOSX():
                 d['created'] = o
             else:
                 log("unknown type: {0}".format(t), 1, LogStyles.WARNING)
+            if(d.get('created') is not None):
+                self._created[d['name']] = d['created']
         
         # log("setting object hierarchy..", 1, LogStyles.MESSAGE)
         # self._hierarchy(data)
@@ -121,8 +175,6 @@ class MXSImportMacOSX():
         self._transformations(data)
         log("setting object hierarchy..", 1, LogStyles.MESSAGE)
         self._hierarchy(data)
-        log("finalizing..", 1, LogStyles.MESSAGE)
-        self._finalize()
     
     def _empty(self, d):
         n = d['name']
@@ -134,44 +186,7 @@ class MXSImportMacOSX():
         nm = d['name']
         log("mesh: {0}".format(nm), 2)
         
-        l = len(d['vertices']) + len(d['triangles'])
-        nuv = len(d['trianglesUVW'])
-        for i in range(nuv):
-            l += len(d['trianglesUVW'][i])
-        
-        # mesh
-        me = bpy.data.meshes.new(nm)
-        vs = []
-        fs = []
-        sf = []
-        for v in d['vertices']:
-            vs.append(v)
-        for t in d['triangles']:
-            fs.append((t[0], t[1], t[2]))
-            if(t[3] == t[4] == t[5]):
-                sf.append(False)
-            else:
-                sf.append(True)
-        
-        me.from_pydata(vs, [], fs)
-        for i, p in enumerate(me.polygons):
-            p.use_smooth = sf[i]
-        
-        nuv = len(d['trianglesUVW'])
-        for i in range(nuv):
-            muv = d['trianglesUVW'][i]
-            uv = me.uv_textures.new(name="uv{0}".format(i))
-            uvloops = me.uv_layers[i]
-            for j, p in enumerate(me.polygons):
-                li = p.loop_indices
-                t = muv[j]
-                v0 = (t[0], t[1])
-                v1 = (t[3], t[4])
-                v2 = (t[6], t[7])
-                # no need to loop, maxwell meshes are always(?) triangles
-                uvloops.data[li[0]].uv = v0
-                uvloops.data[li[1]].uv = v1
-                uvloops.data[li[2]].uv = v2
+        me = mesh_from_arrays(nm, d['vertices'], d['triangles'], d['trianglesUVW'], )
         
         # mr90 = Matrix.Rotation(math.radians(90.0), 4, 'X')
         # me.transform(mr90)
@@ -183,10 +198,12 @@ class MXSImportMacOSX():
     def _instance(self, d):
         log("instance: {0}".format(d['name']), 2)
         o = None
-        io = bpy.data.objects[d['instanced']]
+        io = self._created.get(d['instanced'])
+        if(io is None):
+            log("instanced object: {0} not found, using empty..".format(d['instanced']), 3, LogStyles.WARNING, )
+            return utils.add_object2(d['name'], None)
         if(io.type == 'MESH'):
-            m = bpy.data.meshes[d['instanced']]
-            o = utils.add_object2(d['name'], m)
+            o = utils.add_object2(d['name'], io.data)
         elif(io.type == 'EMPTY'):
             o = utils.add_object2(d['name'], None)
             if(d['referenced_mxs']):
@@ -436,9 +453,151 @@ class MXSImportMacOSX():
             log("_cleanup(): {} does not exist?".format(self.tmp_dir), 1, LogStyles.WARNING, )
 
 
+class MXSImportMulti(MXSImportMacOSX):
+    """Import several MXS files (or one large MXS split to object subsets) at once. Files are read by read_mxs.py helpers
+    running in parallel processes, each writes compact .npz arrays payload, blender objects are then created on main thread."""
+    def __init__(self, mxs_paths, emitters, objects, cameras, sun, split=1, processes=0, keep_intermediates=False, proxies=False, ):
+        self.TEMPLATE = system.check_for_import_template()
+        self.mxs_paths = [os.path.realpath(p) for p in mxs_paths]
+        # proxies are loaded by MXSProxyLoadWinLin, so only there
+        self.proxies = (proxies and system.PLATFORM in ('Linux', 'Windows', ))
+        self.import_emitters = emitters
+        self.import_objects = objects
+        self.import_cameras = cameras
+        self.import_sun = sun
+        self.split = max(split, 1)
+        self.processes = processes
+        self.keep_intermediates = keep_intermediates
+        self._import()
+    
+    def _import(self):
+        log("{0} {1} {0}".format("-" * 30, self.__class__.__name__), 0, LogStyles.MESSAGE, prefix="", )
+        
+        self.uuid = uuid.uuid1()
+        
+        if(bpy.data.filepath == ""):
+            h, t = os.path.split(self.mxs_paths[0])
+            p = os.path.join(h, 'tmp-import_scene-{}'.format(self.uuid))
+            self.tmp_dir = utils.tmp_dir(override_path=p)
+        else:
+            self.tmp_dir = utils.tmp_dir(purpose='import_scene', uid=self.uuid, use_blend_name=True, )
+        
+        self.script_name = "read_mxs-{0}.py".format(self.uuid)
+        
+        log("executing scripts..", 1, LogStyles.MESSAGE)
+        self._pymaxwell()
+        log("processing objects..", 1, LogStyles.MESSAGE)
+        self._process()
+        log("cleanup..", 1, LogStyles.MESSAGE)
+        self._cleanup()
+        log("done.", 1, LogStyles.MESSAGE)
+    
+    def _pymaxwell(self):
+        self.script_path = os.path.join(self.tmp_dir, self.script_name)
+        shutil.copyfile(self.TEMPLATE, self.script_path)
+        
+        self.jobs = []
+        for i, mp in enumerate(self.mxs_paths):
+            n, e = os.path.splitext(os.path.split(mp)[1])
+            for j in range(self.split):
+                subset = None
+                if(self.split > 1):
+                    subset = (j, self.split, )
+                # cameras and sun just once per file
+                job = {'script_path': self.script_path,
+                       'mxs_path': mp,
+                       'scene_data_path': os.path.join(self.tmp_dir, "{0}-{1}-{2}-{3}.json".format(n, i, j, self.uuid)),
+                       'emitters': self.import_emitters,
+                       'objects': self.import_objects,
+                       'cameras': self.import_cameras and j == 0,
+                       'sun': self.import_sun and j == 0,
+                       'subset': subset,
+                       'proxies': self.proxies,
+                       'file': i, }
+                self.jobs.append(job)
+        
+        failed = system.python34_run_script_helper_import_pool(self.jobs, self.processes, )
+        for job in failed:
+            log("reading '{}' failed..".format(job['mxs_path']), 1, LogStyles.WARNING, )
+    
+    def _load(self, job):
+        p = job['scene_data_path']
+        if(not os.path.exists(p)):
+            log("no data for '{}', protected MXS?".format(job['mxs_path']), 1, LogStyles.WARNING, )
+            return []
+        with open(p, 'r') as f:
+            data = json.load(f)
+        ap = "{0}.npz".format(p)
+        if(os.path.exists(ap)):
+            with numpy.load(ap) as arrays:
+                data = read_mxs_arrays.join_arrays(data, arrays)
+        return data
+    
+    def _process(self):
+        for i, mp in enumerate(self.mxs_paths):
+            log("{}".format(mp), 1, LogStyles.MESSAGE)
+            # proxies point to file they come from
+            self.mxs_path = mp
+            data = []
+            for job in self.jobs:
+                if(job['file'] == i):
+                    data.extend(self._load(job))
+            # subsets are interleaved, instanced objects must exist before their instances
+            data.sort(key=lambda d: d.get('type') == 'INSTANCE')
+            self._build(data)
+        log("finalizing..", 1, LogStyles.MESSAGE)
+        self._finalize()
+    
+    def _mesh(self, d):
+        if(self.proxies):
+            return self._proxy(d)
+        return super()._mesh(d)
+    
+    def _proxy(self, d):
+        nm = d['name']
+        log("proxy: {0}".format(nm), 2)
+        me = bbox_mesh(nm, d['bbox'], )
+        o = utils.add_object2(nm, me)
+        self._set_proxy(o, nm)
+        return o
+    
+    def _set_proxy(self, o, name):
+        o.draw_type = 'BOUNDS'
+        m = o.maxwell_render.proxy
+        m.enabled = True
+        m.path = self.mxs_path
+        m.object_name = name
+    
+    def _instance(self, d):
+        o = super()._instance(d)
+        if(self.proxies and o is not None and o.type == 'MESH'):
+            # instances share proxy mesh, loading geometry swaps it for all of them
+            self._set_proxy(o, d['instanced'])
+        return o
+    
+    def _cleanup(self):
+        if(self.keep_intermediates):
+            return
+        
+        def rm(p):
+            if(os.path.exists(p)):
+                os.remove(p)
+        
+        rm(self.script_path)
+        for job in self.jobs:
+            rm(job['scene_data_path'])
+            rm("{0}.npz".format(job['scene_data_path']))
+        
+        if(os.path.exists(self.tmp_dir)):
+            os.rmdir(self.tmp_dir)
+        else:
+            log("_cleanup(): {} does not exist?".format(self.tmp_dir), 1, LogStyles.WARNING, )
+
+
 class MXSImportWinLin():
-    def __init__(self, mxs_path, emitters=True, objects=True, cameras=True, sun=True, ):
+    def __init__(self, mxs_path, emitters=True, objects=True, cameras=True, sun=True, proxies=False, ):
         self.mxs_path = os.path.realpath(mxs_path)
+        self.proxies = proxies
         self.import_emitters = emitters
         self.import_objects = objects
         if(self.import_objects):
@@ -452,7 +611,10 @@ class MXSImportWinLin():
         reader = mxs.MXSReader(self.mxs_path)
         
         if(self.import_objects or self.import_emitters):
-            data = reader.objects(self.import_emitters)
+            # normals are not used, blender calculates its own
+            data = reader.objects(self.import_emitters, normals=False, geometry=not self.proxies, )
+            # mxs name > created object, scene can already have objects with the same names
+            self._created = {}
             for d in data:
                 t = None
                 try:
@@ -470,13 +632,18 @@ class MXSImportWinLin():
                     
                     d['created'] = o
                 elif(t == 'MESH'):
-                    o = self._mesh(d)
+                    if(self.proxies):
+                        o = self._proxy(d)
+                    else:
+                        o = self._mesh(d)
                     d['created'] = o
                 elif(t == 'INSTANCE'):
                     o = self._instance(d)
                     d['created'] = o
                 else:
                     log("unknown type: {0}".format(t), 1, LogStyles.WARNING)
+                if(d.get('created') is not None):
+                    self._created[d['name']] = d['created']
             
             log("setting object hierarchy..", 1, LogStyles.MESSAGE)
             self._hierarchy(data)
@@ -527,54 +694,38 @@ class MXSImportWinLin():
         nm = d['name']
         log("mesh: {0}".format(nm), 2)
         
-        l = len(d['vertices']) + len(d['triangles'])
-        nuv = len(d['trianglesUVW'])
-        for i in range(nuv):
-            l += len(d['trianglesUVW'][i])
-        
-        me = bpy.data.meshes.new(nm)
-        vs = []
-        fs = []
-        sf = []
-        for v in d['vertices']:
-            vs.append(v)
-        for t in d['triangles']:
-            fs.append((t[0], t[1], t[2]))
-            if(t[3] == t[4] == t[5]):
-                sf.append(False)
-            else:
-                sf.append(True)
-        
-        me.from_pydata(vs, [], fs)
-        for i, p in enumerate(me.polygons):
-            p.use_smooth = sf[i]
-        
-        nuv = len(d['trianglesUVW'])
-        for i in range(nuv):
-            muv = d['trianglesUVW'][i]
-            uv = me.uv_textures.new(name="uv{0}".format(i))
-            uvloops = me.uv_layers[i]
-            for j, p in enumerate(me.polygons):
-                li = p.loop_indices
-                t = muv[j]
-                v0 = (t[0], t[1])
-                v1 = (t[3], t[4])
-                v2 = (t[6], t[7])
-                # no need to loop, maxwell meshes are always(?) triangles
-                uvloops.data[li[0]].uv = v0
-                uvloops.data[li[1]].uv = v1
-                uvloops.data[li[2]].uv = v2
+        me = mesh_from_arrays(nm, d['vertices'], d['triangles'], d['trianglesUVW'], )
         
         o = utils.add_object2(nm, me)
         return o
     
+    def _proxy(self, d):
+        nm = d['name']
+        log("proxy: {0}".format(nm), 2)
+        me = bbox_mesh(nm, d['bbox'], )
+        o = utils.add_object2(nm, me)
+        self._set_proxy(o, nm)
+        return o
+    
+    def _set_proxy(self, o, name):
+        o.draw_type = 'BOUNDS'
+        m = o.maxwell_render.proxy
+        m.enabled = True
+        m.path = self.mxs_path
+        m.object_name = name
+    
     def _instance(self, d):
         log("instance: {0}".format(d['name']), 2)
         o = None
-        io = bpy.data.objects[d['instanced']]
+        io = self._created.get(d['instanced'])
+        if(io is None):
+            log("instanced object: {0} not found, using empty..".format(d['instanced']), 3, LogStyles.WARNING, )
+            return utils.add_object2(d['name'], None)
         if(io.type == 'MESH'):
-            m = bpy.data.meshes[d['instanced']]
-            o = utils.add_object2(d['name'], m)
+            o = utils.add_object2(d['name'], io.data)
+            if(self.proxies):
+                # instances share proxy mesh, loading geometry swaps it for all of them
+                self._set_proxy(o, d['instanced'])
         elif(io.type == 'EMPTY'):
             o = utils.add_object2(d['name'], None)
             if(d['referenced_mxs']):
@@ -757,6 +908,75 @@ class MXSImportWinLin():
                     cycled_meshes.append(o.data)
 
 
+class MXSProxyLoadWinLin():
+    """Load full geometry for proxy objects created by MXSImportWinLin with proxies=True, each MXS is read once."""
+    def __init__(self, objects, ):
+        self.objects = [o for o in objects if o.type == 'MESH' and o.maxwell_render.proxy.enabled]
+        self._load()
+    
+    def _load(self):
+        log("{0} {1} {0}".format("-" * 30, self.__class__.__name__), 0, LogStyles.MESSAGE, prefix="", )
+        
+        paths = {}
+        for o in self.objects:
+            p = os.path.realpath(bpy.path.abspath(o.maxwell_render.proxy.path))
+            paths.setdefault(p, []).append(o)
+        
+        # mesh > objects using it, proxy mesh is shared with instances, do not search all objects for each proxy
+        users = {}
+        for u in bpy.data.objects:
+            if(u.type == 'MESH'):
+                users.setdefault(u.data, []).append(u)
+        
+        mrx90 = Matrix.Rotation(math.radians(90.0), 4, 'X')
+        loaded = []
+        for p, obs in paths.items():
+            if(not os.path.exists(p)):
+                log("{}: file does not exist..".format(p), 1, LogStyles.WARNING, )
+                continue
+            reader = mxs.MXSReader(p)
+            for o in obs:
+                if(not o.maxwell_render.proxy.enabled):
+                    # instance of already loaded mesh
+                    continue
+                old = o.data
+                n = o.maxwell_render.proxy.object_name
+                d = reader.object(n, normals=False, )
+                if(d is None or d['type'] != 'MESH'):
+                    log("{}: not a mesh object in {}..".format(n, p), 1, LogStyles.WARNING, )
+                    continue
+                log("mesh: {0}".format(n), 2)
+                # keep proxy mesh name, it is free once proxy mesh is removed, mxs name might be taken by another mesh
+                nm = old.name
+                me = mesh_from_arrays(nm, d['vertices'], d['triangles'], d['trianglesUVW'], )
+                me.transform(mrx90)
+                # swap data on proxy and all its instances, users are found by mesh, not by name
+                us = users.pop(old, [])
+                old.user_remap(me)
+                bpy.data.meshes.remove(old)
+                me.name = nm
+                for u in us:
+                    u.draw_type = 'TEXTURED'
+                    u.maxwell_render.proxy.enabled = False
+                loaded.append(o)
+        log("finalizing..", 1, LogStyles.MESSAGE)
+        self._finalize(loaded)
+        log("done.", 1)
+    
+    def _finalize(self, objects, ):
+        # the same edit mode cycle as after import, only on loaded meshes, once per mesh
+        cycled_meshes = set()
+        for o in objects:
+            if(o.data in cycled_meshes):
+                continue
+            bpy.ops.object.select_all(action='DESELECT')
+            o.select = True
+            bpy.context.scene.objects.active = o
+            bpy.ops.object.mode_set(mode='EDIT')
+            bpy.ops.object.mode_set(mode='OBJECT')
+            cycled_meshes.add(o.data)
+
+
 class MXMImportMacOSX():
     def __init__(self, mxm_path, ):
         self.TEMPLATE = system.check_for_import_mxm_template()
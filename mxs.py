@@ -34,6 +34,7 @@ import numpy
 
 from .log import log, LogStyles
 from . import utils
+from .support import read_mxs_arrays
 
 s = platform.system()
 if(s == 'Darwin'):
@@ -146,13 +147,57 @@ def material_preview_mxi(tmp_dir):
     return a
 
 
-def viewport_render_scene(tmp_dir, quality, ):
+def viewport_render_patch(s, patch, ):
+    """Apply live viewport render changes to scene, patch is dict from engine, returns False if camera or some object is missing."""
+    c = patch['camera']
+    if(c is not None):
+        cam = s.getCamera(c['name'])
+        if(cam.isNull()):
+            log("camera '{}' is missing..".format(c['name']), 2, LogStyles.WARNING, )
+            return False
+        cam.setResolution(*c['resolution'])
+        cam.setFilmSize(*c['film'])
+        for st in c['steps']:
+            cam.setStep(st[0], Cvector(*st[1]), Cvector(*st[2]), Cvector(*st[3]), st[4], st[5], st[6], st[7], )
+        if(c['region'] is not None):
+            cam.setScreenRegion(*c['region'])
+        cam.setActive()
+    
+    for d in patch['objects']:
+        o = s.getObject(d['name'])
+        if(o.isNull()):
+            log("object '{}' is missing..".format(d['name']), 2, LogStyles.WARNING, )
+            return False
+        b = Cbase()
+        b.origin = Cvector(*d['base'][0])
+        b.xAxis = Cvector(*d['base'][1])
+        b.yAxis = Cvector(*d['base'][2])
+        b.zAxis = Cvector(*d['base'][3])
+        p = Cbase()
+        p.origin = Cvector(*d['pivot'][0])
+        p.xAxis = Cvector(*d['pivot'][1])
+        p.yAxis = Cvector(*d['pivot'][2])
+        p.zAxis = Cvector(*d['pivot'][3])
+        o.setBaseAndPivot(b, p)
+        o.setPivotPosition(Cvector(*d['location']))
+        o.setPivotRotation(Cvector(*d['rotation']))
+        o.setPosition(Cvector(*d['location']))
+        o.setRotation(Cvector(*d['rotation']))
+        o.setScale(Cvector(*d['scale']))
+    return True
+
+
+def viewport_render_scene(tmp_dir, quality, patch=None, ):
     s = Cmaxwell(mwcallback)
     p = os.path.join(tmp_dir, "scene.mxs")
     ok = s.readMXS(p)
     if(not ok):
         return False
     
+    if(patch is not None):
+        if(not viewport_render_patch(s, patch, )):
+            return False
+    
     s.setRenderParameter('ENGINE', bytes(quality, encoding='UTF-8'))
     
     mxi = os.path.join(tmp_dir, "render.mxi")
@@ -219,6 +264,11 @@ class MXSWriter():
         else:
             log("creating new scene..", 2, prefix="* ", )
         
+        # material name > material handle, filled as materials are created, see get_material
+        self._materials = {}
+        # new scene is empty, appended scene has materials this writer did not create
+        self._materials_indexed = not append
+        
         self.mgr = CextensionManager.instance()
         self.mgr.loadAllExtensions()
     
@@ -233,6 +283,9 @@ class MXSWriter():
     
     def erase_unused_materials(self):
         self.mxs.eraseUnusedMaterials()
+        # handles in registry might be gone now
+        self._materials = {}
+        self._materials_indexed = False
     
     def set_base_and_pivot(self, o, matrix=None, motion=None, ):
         """Convert float tuples to Cbases and set to object.
@@ -1460,27 +1513,34 @@ class MXSWriter():
             m = self.material_custom(d)
         else:
             raise TypeError("Material '{}' {} is unknown type".format(d['name'], d['subtype']))
+        
+        self._materials[m.getName()] = m
+        return m
+    
+    def _index_materials(self):
+        """put all scene materials to registry, only needed for materials not created by material()"""
+        s = self.mxs
+        it = CmaxwellMaterialIterator()
+        o = it.first(s)
+        names = []
+        while not o.isNull():
+            names.append(o.getName())
+            o = it.next()
+        for n in names:
+            if(n not in self._materials):
+                self._materials[n] = s.getMaterial(n)
+        self._materials_indexed = True
     
     def get_material(self, n, ):
         """get material by name from scene, if material is missing, create and return placeholder"""
-        def get_material_names(s):
-            it = CmaxwellMaterialIterator()
-            o = it.first(s)
-            l = []
-            while not o.isNull():
-                name = o.getName()
-                l.append(name)
-                o = it.next()
-            return l
-        
-        s = self.mxs
-        names = get_material_names(s)
-        m = None
-        if(n in names):
-            m = s.getMaterial(n)
+        m = self._materials.get(n)
+        if(m is None and not self._materials_indexed):
+            self._index_materials()
+            m = self._materials.get(n)
         if(m is None):
             # should not happen because i stopped changing material names.. but i leave it here
             m = self.material_placeholder()
+            self._materials[n] = m
         return m
     
     def camera(self, props, steps, active=False, lens_extra=None, response=None, region=None, custom_bokeh=(1.0, 0.0, False), cut_planes=(0.0, 1e7, False), shift_lens=(0.0, 0.0), ):
@@ -1701,6 +1761,42 @@ class MXSWriter():
         
         return o
     
+    def instances(self, names, instanced_name, matrices, motion=None, object_props=None, materials=None, backface_material=None, ):
+        """Create many instances of one mesh object at once, all sharing properties and materials. Instanced object must exist in scene.
+        names               list of strings
+        instanced_name      string
+        matrices            list of (base, pivot, location, rotation, scale), one for each name
+        object_props        (bool hide, float opacity, tuple cid=(int, int, int), bool hcam, bool hcamsc, bool hgi, bool hrr, bool hzcp, ) or None
+        materials           list of material names or None
+        backface_material   string or None
+        """
+        s = self.mxs
+        bo = s.getObject(instanced_name)
+        
+        # materials are looked up once for all instances
+        mat = None
+        if(materials is not None):
+            if(len(materials) == 1):
+                if(materials[0] != ''):
+                    mat = self.get_material(materials[0])
+        backface = None
+        if(backface_material is not None):
+            if(backface_material != ''):
+                backface = self.get_material(backface_material)
+        
+        r = []
+        for name, matrix in zip(names, matrices):
+            o = s.createInstancement(name, bo)
+            self.set_base_and_pivot(o, matrix, motion, )
+            if(object_props is not None):
+                self.set_object_props(o, *object_props)
+            if(mat is not None):
+                o.setMaterial(mat)
+            if(backface is not None):
+                o.setBackfaceMaterial(backface)
+            r.append(o)
+        return r
+    
     def reference(self, name, path, flags, matrix, motion=None, object_props=None, material=None, backface_material=None, ):
         """Create MXS reference object.
         name            string
@@ -2291,12 +2387,12 @@ class MXSWriter():
             c.xAxis = Cvector(1.0, 0.0, 0.0)
             c.yAxis = Cvector(0.0, 1.0, 0.0)
             c.zAxis = Cvector(0.0, 0.0, 1.0)
-            p.setFloatArray('PARTICLE_POSITIONS', list(d['pdata']['PARTICLE_POSITIONS']), c)
-            p.setFloatArray('PARTICLE_SPEEDS', list(d['pdata']['PARTICLE_SPEEDS']), c)
-            p.setFloatArray('PARTICLE_RADII', list(d['pdata']['PARTICLE_RADII']), c)
-            p.setIntArray('PARTICLE_IDS', list(d['pdata']['PARTICLE_IDS']))
-            p.setFloatArray('PARTICLE_NORMALS', list(d['pdata']['PARTICLE_NORMALS']), c)
-            p.setFloatArray('PARTICLE_UVW', list(d['pdata']['PARTICLE_UVW']), c)
+            p.setFloatArray('PARTICLE_POSITIONS', numpy.asarray(d['pdata']['PARTICLE_POSITIONS']).tolist(), c)
+            p.setFloatArray('PARTICLE_SPEEDS', numpy.asarray(d['pdata']['PARTICLE_SPEEDS']).tolist(), c)
+            p.setFloatArray('PARTICLE_RADII', numpy.asarray(d['pdata']['PARTICLE_RADII']).tolist(), c)
+            p.setIntArray('PARTICLE_IDS', numpy.asarray(d['pdata']['PARTICLE_IDS']).tolist())
+            p.setFloatArray('PARTICLE_NORMALS', numpy.asarray(d['pdata']['PARTICLE_NORMALS']).tolist(), c)
+            p.setFloatArray('PARTICLE_UVW', numpy.asarray(d['pdata']['PARTICLE_UVW']).tolist(), c)
         else:
             p.setString('FileName', d['filename'])
         
@@ -2734,10 +2830,10 @@ class MXSWriter():
             c.xAxis = Cvector(1.0, 0.0, 0.0)
             c.yAxis = Cvector(0.0, 1.0, 0.0)
             c.zAxis = Cvector(0.0, 0.0, 1.0)
-            p.setFloatArray('PARTICLE_POSITIONS', list(pdata['PARTICLE_POSITIONS']), c)
-            p.setFloatArray('PARTICLE_SPEEDS', list(pdata['PARTICLE_SPEEDS']), c)
-            p.setFloatArray('PARTICLE_RADII', list(pdata['PARTICLE_RADII']), c)
-            p.setIntArray('PARTICLE_IDS', list(pdata['PARTICLE_IDS']))
+            p.setFloatArray('PARTICLE_POSITIONS', numpy.asarray(pdata['PARTICLE_POSITIONS']).tolist(), c)
+            p.setFloatArray('PARTICLE_SPEEDS', numpy.asarray(pdata['PARTICLE_SPEEDS']).tolist(), c)
+            p.setFloatArray('PARTICLE_RADII', numpy.asarray(pdata['PARTICLE_RADII']).tolist(), c)
+            p.setIntArray('PARTICLE_IDS', numpy.asarray(pdata['PARTICLE_IDS']).tolist())
         else:
             p.setString('FileName', pdata)
         
@@ -4068,7 +4164,7 @@ class MXSReader():
             o = it.next()
         return l
     
-    def _mxs_object(self, o):
+    def _mxs_object(self, o, normals=True, uvs=True, geometry=True, ):
         object_name, _ = o.getName()
         is_instance, _ = o.isInstance()
         is_mesh, _ = o.isMesh()
@@ -4178,43 +4274,12 @@ class MXSReader():
         
         if(nppv - 1 != ppv and nv != 0):
             log("only one position per vertex is supported..", 2, LogStyles.WARNING, )
-        # vertices
-        for i in range(nv):
-            v, _ = o.getVertex(i, ppv)
-            # (float x, float y, float z)
-            r['vertices'].append((v.x(), v.y(), v.z()))
-        # normals
-        for i in range(nn):
-            v, _ = o.getNormal(i, ppv)
-            # (float x, float y, float z)
-            r['normals'].append((v.x(), v.y(), v.z()))
-        # triangles
-        for i in range(nt):
-            t = o.getTriangle(i)
-            # (int v1, int v2, int v3, int n1, int n2, int n3)
-            r['triangles'].append(t)
-        # materials
-        mats = []
-        for i in range(nt):
-            m, _ = o.getTriangleMaterial(i)
-            if(m.isNull() == 1):
-                n = None
-            else:
-                n = m.getName()
-            if(n not in mats):
-                mats.append(n)
-            r['materials'].append((i, n))
-        r['nmats'] = len(mats)
-        r['matnames'] = mats
-        # uv channels
-        ncuv, _ = o.getChannelsUVWCount()
-        for cuv in range(ncuv):
-            # uv triangles
-            r['trianglesUVW'].append([])
-            for i in range(nt):
-                t = o.getTriangleUVW(i, cuv)
-                # float u1, float v1, float w1, float u2, float v2, float w2, float u3, float v3, float w3
-                r['trianglesUVW'][cuv].append(t)
+        if(geometry):
+            # vertices, normals, triangles, materials and uv channels
+            r.update(read_mxs_arrays.mesh_arrays(o, nv, nn, nt, ppv, normals, uvs, ))
+        else:
+            # just enough to create proxy, geometry is loaded later with object()
+            r['bbox'] = read_mxs_arrays.bounding_box(o, nv, ppv, )
         # base and pivot to matrix
         b, p = self._base_and_pivot(o)
         r['base'] = b
@@ -4321,35 +4386,7 @@ class MXSReader():
         self.object_names = self._mxs_get_objects_names()
     
     def _is_emitter(self, o):
-        is_instance, _ = o.isInstance()
-        is_mesh, _ = o.isMesh()
-        if(not is_mesh and not is_instance):
-            return False
-        if(is_mesh):
-            nt, _ = o.getTrianglesCount()
-            mats = []
-            for i in range(nt):
-                m, _ = o.getTriangleMaterial(i)
-                if(not m.isNull()):
-                    if(m not in mats):
-                        mats.append(m)
-            for m in mats:
-                nl, _ = m.getNumLayers()
-                for i in range(nl):
-                    l = m.getLayer(i)
-                    e = l.getEmitter()
-                    if(not e.isNull()):
-                        return True
-        if(is_instance):
-            m, _ = o.getMaterial()
-            if(not m.isNull()):
-                nl, _ = m.getNumLayers()
-                for i in range(nl):
-                    l = m.getLayer(i)
-                    e = l.getEmitter()
-                    if(not e.isNull()):
-                        return True
-        return False
+        return read_mxs_arrays.is_emitter(o)
     
     def _global_transform(self, o):
         cb, _ = o.getWorldTransform()
@@ -4361,7 +4398,7 @@ class MXSReader():
         rp = ((0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0), )
         return rb, rp
     
-    def objects(self, only_emitters=False):
+    def objects(self, only_emitters=False, normals=True, uvs=True, geometry=True, ):
         if(only_emitters):
             s = self.mxs
             data = []
@@ -4370,7 +4407,7 @@ class MXSReader():
                 d = None
                 o = s.getObject(n)
                 if(self._is_emitter(o)):
-                    d = self._mxs_object(o)
+                    d = self._mxs_object(o, normals, uvs, geometry, )
                     if(d is not None):
                         b, p = self._global_transform(o)
                         d['base'] = b
@@ -4384,11 +4421,18 @@ class MXSReader():
             for n in self.object_names:
                 d = None
                 o = s.getObject(n)
-                d = self._mxs_object(o)
+                d = self._mxs_object(o, normals, uvs, geometry, )
                 if(d is not None):
                     data.append(d)
         return data
     
+    def object(self, name, normals=True, uvs=True, ):
+        """Single object by name with full geometry, used to load imported proxies."""
+        o = self.mxs.getObject(name)
+        if(o.isNull()):
+            return None
+        return self._mxs_object(o, normals, uvs, )
+    
     def cameras(self):
         s = self.mxs
         data = []
@@ -4888,7 +4932,11 @@ class MXSReferenceReader():
         if(not ok):
             raise RuntimeError("Error during reading scene {}".format(path))
         nms = self.get_objects_names(scene)
-        data = []
+        # vertices of each mesh are stored once, objects (meshes and instances) point to them by index
+        meshes = []
+        objects = []
+        # mesh name > index to meshes
+        index = {}
         log("reading meshes..", 2)
         for n in nms:
             d = None
@@ -4897,24 +4945,25 @@ class MXSReferenceReader():
                 if(o.isMesh()[0] == 1 and o.isInstance()[0] == 0):
                     d = self.object(o)
             if(d is not None):
-                data.append(d)
+                index.setdefault(d['name'], len(meshes))
+                d['mesh'] = len(meshes)
+                meshes.append(d.pop('vertices'))
+                objects.append(d)
         log("reading instances..", 2)
         for n in nms:
-            d = None
             o = scene.getObject(n)
             if(not o.isNull()):
                 if(o.isMesh()[0] == 0 and o.isInstance()[0] == 1):
                     io = o.getInstanced()
                     ion = io.getName()[0]
-                    for a in data:
-                        if(a['name'] == ion):
-                            b, p = self.global_transform(o)
-                            d = {'name': o.getName()[0],
-                                 'base': b,
-                                 'pivot': p,
-                                 'vertices': a['vertices'][:], }
-            if(d is not None):
-                data.append(d)
+                    if(ion in index):
+                        b, p = self.global_transform(o)
+                        objects.append({'name': o.getName()[0],
+                                        'base': b,
+                                        'pivot': p,
+                                        'mesh': index[ion], })
+        data = {'meshes': meshes,
+                'objects': objects, }
         self.data = data
         log("done.", 2)
     
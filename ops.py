@@ -20,22 +20,23 @@ import os
 import shlex
 import subprocess
 import math
-import random
-import uuid
+import hashlib
+import shutil
 
 import bpy
-from bpy.props import PointerProperty, FloatProperty, IntProperty, BoolProperty, StringProperty, EnumProperty, FloatVectorProperty, IntVectorProperty
-from bpy.types import Operator
+from bpy.props import PointerProperty, FloatProperty, IntProperty, BoolProperty, StringProperty, EnumProperty, FloatVectorProperty, IntVectorProperty, CollectionProperty
+from bpy.types import Operator, OperatorFileListElement
 from mathutils import Vector, Color, Matrix
 from bl_operators.presets import AddPresetBase
 from bpy_extras.io_utils import ImportHelper, ExportHelper
 import bgl
+import numpy
 
 from . import maths
 from . import system
 from . import impmxs
 from . import export
-from .log import LOG_FILE_PATH
+from .log import log, LogStyles, LOG_FILE_PATH
 
 
 class ImportMXS(Operator, ImportHelper):
@@ -53,6 +54,12 @@ class ImportMXS(Operator, ImportHelper):
     cameras = BoolProperty(name="Cameras", default=True, )
     sun = BoolProperty(name="Sun (as Sun Lamp)", default=True, )
     
+    files = CollectionProperty(name="Files", type=OperatorFileListElement, options={'HIDDEN', 'SKIP_SAVE'}, )
+    directory = StringProperty(subtype='DIR_PATH', options={'HIDDEN', 'SKIP_SAVE'}, )
+    split = IntProperty(name="Processes Per File", description="Read each file by this many parallel processes, each reading a subset of objects", default=1, min=1, max=64, )
+    proxies = BoolProperty(name="Proxies Only", description="Import meshes as bounding boxes, load full geometry later for selected objects", default=False, )
+    processes = IntProperty(name="Max Processes", description="Maximum of reading processes running at once, 0 for number of CPUs, used with multiple files or when file is split", default=0, min=0, max=256, )
+    
     def draw(self, context):
         l = self.layout
         
@@ -65,14 +72,38 @@ class ImportMXS(Operator, ImportHelper):
         sub.prop(self, 'cameras')
         sub.prop(self, 'sun')
         
+        l.separator()
+        sub = l.column()
+        sub.prop(self, 'split')
+        sub.prop(self, 'processes')
+        
         if(system.PLATFORM == 'Darwin'):
             l.separator()
             l.prop(self, 'keep_intermediates')
+        else:
+            l.separator()
+            l.prop(self, 'proxies')
     
     def execute(self, context):
         if(not self.objects and not self.cameras and not self.sun and not self.emitters):
             return {'CANCELLED'}
         
+        paths = [os.path.realpath(bpy.path.abspath(os.path.join(self.directory, f.name))) for f in self.files if f.name != ""]
+        if(len(paths) > 1 or self.split > 1):
+            d = {'mxs_paths': paths,
+                 'emitters': self.emitters,
+                 'objects': self.objects,
+                 'cameras': self.cameras,
+                 'sun': self.sun,
+                 'split': self.split,
+                 'processes': self.processes,
+                 'keep_intermediates': self.keep_intermediates,
+                 'proxies': self.proxies, }
+            if(len(paths) == 0):
+                d['mxs_paths'] = [os.path.realpath(bpy.path.abspath(self.filepath)), ]
+            im = impmxs.MXSImportMulti(**d)
+            return {'FINISHED'}
+        
         d = {'mxs_path': os.path.realpath(bpy.path.abspath(self.filepath)),
              'emitters': self.emitters,
              'objects': self.objects,
@@ -82,6 +113,7 @@ class ImportMXS(Operator, ImportHelper):
             d['keep_intermediates'] = self.keep_intermediates
             im = impmxs.MXSImportMacOSX(**d)
         elif(system.PLATFORM == 'Linux' or system.PLATFORM == 'Windows'):
+            d['proxies'] = self.proxies
             im = impmxs.MXSImportWinLin(**d)
         else:
             pass
@@ -97,6 +129,26 @@ class ImportMXS(Operator, ImportHelper):
         bpy.types.INFO_MT_file_import.remove(menu_func_import)
 
 
+class LoadMXSProxies(Operator):
+    bl_idname = "maxwell_render.load_mxs_proxies"
+    bl_label = "Load Proxy Geometry"
+    bl_description = "Load full geometry from MXS for selected proxy objects"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    @classmethod
+    def poll(cls, context):
+        if(system.PLATFORM == 'Darwin'):
+            return False
+        for o in context.selected_objects:
+            if(o.maxwell_render.proxy.enabled):
+                return True
+        return False
+    
+    def execute(self, context):
+        impmxs.MXSProxyLoadWinLin(context.selected_objects)
+        return {'FINISHED'}
+
+
 class ExportMXS(Operator, ExportHelper):
     bl_idname = "maxwell_render.export_mxs"
     bl_label = 'Export MXS'
@@ -2505,25 +2557,57 @@ class MaterialWizardTextured(Operator):
 
 
 class MXSReferenceCache():
-    __cache = {}
+    """Point clouds of referenced MXS files for viewport drawing.
+    Geometry is read once per file and shared by all objects referencing it, keyed by (realpath, modification time),
+    each object has only a small view entry with its path, geometry key and draw state."""
+    # (path, mtime) > {'vertices', 'count', 'bound_box', 'gl'}
+    __geometry = {}
+    # object > {'object', 'path', 'key', 'draw'}
+    __views = {}
     
     @classmethod
-    def add(cls, data, ):
-        cls.__cache[uuid.uuid1()] = data
+    def key(cls, path, ):
+        mtime = None
+        if(os.path.exists(path)):
+            mtime = os.stat(path).st_mtime
+        return (path, mtime, )
+    
+    @classmethod
+    def geometry(cls, key, ):
+        return cls.__geometry.get(key)
+    
+    @classmethod
+    def add_geometry(cls, key, data, ):
+        if(key in cls.__geometry):
+            # refreshed, previous display lists would be lost
+            free_reference_points(cls.__geometry[key].get('gl', {}))
+        cls.__geometry[key] = data
     
     @classmethod
     def get(cls, path, ob, ):
-        for k, v in cls.__cache.items():
-            if(v['path'] == path and v['object'] == ob):
-                return v
+        v = cls.__views.get(ob)
+        if(v is not None and v['path'] == path):
+            return v
         return None
     
     @classmethod
-    def set(cls, path, ob, data, ):
-        for k, v in cls.__cache.items():
-            if(v['path'] == path and v['object'] == ob):
-                break
-        cls.__cache[k] = data
+    def set(cls, path, ob, key, ):
+        v = cls.__views.get(ob)
+        if(v is None or v['path'] != path):
+            v = {'object': ob,
+                 'path': path,
+                 'key': key,
+                 'draw': False, }
+            cls.__views[ob] = v
+        else:
+            v['key'] = key
+        # drop geometry nobody is looking at anymore, i.e. older version of file or object switched to another file
+        used = set([v['key'] for v in cls.__views.values()])
+        for k in list(cls.__geometry.keys()):
+            if(k not in used):
+                free_reference_points(cls.__geometry[k].get('gl', {}))
+                del cls.__geometry[k]
+        return v
     
     @classmethod
     def draw(cls, path, value, context, refresh=False, ):
@@ -2544,7 +2628,6 @@ class MXSReferenceCache():
             return
         
         r['draw'] = value
-        cls.set(path, ob, r)
         
         if(value):
             cls.start()
@@ -2553,36 +2636,149 @@ class MXSReferenceCache():
     
     @classmethod
     def all(cls):
-        d = {}
-        for k, v in cls.__cache.items():
-            d[k] = v
-        return d
+        """Views as object > view, view geometry is MXSReferenceCache.geometry(view['key'])."""
+        return dict(cls.__views)
     
     @classmethod
     def start(cls):
-        a = cls.all()
-        b = [r['draw'] for p, r in a.items()]
+        b = [r['draw'] for r in cls.__views.values()]
         display = bpy.context.scene.maxwell_render.private_draw_references
         if(sum(b) > 0 and display < 1):
             bpy.ops.maxwell_render.modal_draw_mxs_references('INVOKE_DEFAULT')
     
     @classmethod
     def stop(cls):
-        a = cls.all()
-        b = [r['draw'] for p, r in a.items()]
+        b = [r['draw'] for r in cls.__views.values()]
         display = bpy.context.scene.maxwell_render.private_draw_references
         if(sum(b) == 0 and display == 1):
             bpy.ops.maxwell_render.modal_draw_mxs_references('INVOKE_DEFAULT')
     
     @classmethod
     def quit(cls):
-        for k, r in cls.__cache.items():
-            cls.__cache[k]['draw'] = False
+        for r in cls.__views.values():
+            r['draw'] = False
         display = bpy.context.scene.maxwell_render.private_draw_references
         if(display == 1):
             bpy.ops.maxwell_render.modal_draw_mxs_references('INVOKE_DEFAULT')
 
 
+class MXSReferenceDiskCache():
+    """Point clouds of referenced MXS files kept on disk between sessions, one .npz per MXS path.
+    Entry is valid while MXS modification time and size are the same, oldest entries are removed when cache grows over size set in preferences."""
+    # nothing more is drawn anyway (display_max_points maximum), points are in stratified order, so first n points cover whole reference
+    MAX_POINTS = 1000000
+    # bump when point order changes, so old entries are read again
+    VERSION = 2
+    
+    @classmethod
+    def _directory(cls):
+        p = system.prefs().reference_cache_path
+        if(p != ""):
+            p = os.path.realpath(bpy.path.abspath(p))
+            if(not os.path.exists(p)):
+                os.makedirs(p)
+            return p
+        a = os.path.split(os.path.split(os.path.realpath(__file__))[0])[1]
+        return bpy.utils.user_resource('DATAFILES', path=os.path.join(a, "reference_cache"), create=True, )
+    
+    @classmethod
+    def _entry(cls, path, ):
+        h = hashlib.sha1(path.encode('utf-8')).hexdigest()
+        return os.path.join(cls._directory(), "{}.npz".format(h))
+    
+    @classmethod
+    def _key(cls, path, ):
+        st = os.stat(path)
+        return numpy.array((st.st_mtime, st.st_size, cls.VERSION, ), dtype=numpy.float64, )
+    
+    @classmethod
+    def get(cls, path, ):
+        """Cached dict with vertices, bound_box and count or None when there is nothing valid."""
+        if(not system.prefs().reference_cache_use):
+            return None
+        e = cls._entry(path)
+        if(not os.path.exists(e) or not os.path.exists(path)):
+            return None
+        try:
+            with numpy.load(e) as f:
+                if(not numpy.array_equal(f['key'], cls._key(path))):
+                    return None
+                d = {'vertices': f['vertices'],
+                     'bound_box': f['bound_box'].tolist(),
+                     'count': int(f['count']), }
+        except Exception as ex:
+            log("reference cache: cannot read {} ({})".format(e, ex), 1, LogStyles.WARNING, )
+            return None
+        # mark as recently used for eviction
+        os.utime(e, None)
+        return d
+    
+    @classmethod
+    def put(cls, path, d, ):
+        if(not system.prefs().reference_cache_use):
+            return
+        e = cls._entry(path)
+        t = "{}.tmp".format(e)
+        with open(t, 'wb') as f:
+            numpy.savez(f,
+                        key=cls._key(path),
+                        vertices=numpy.asarray(d['vertices'][:cls.MAX_POINTS], dtype=numpy.float32, ),
+                        bound_box=numpy.asarray(d['bound_box'], dtype=numpy.float64, ),
+                        count=numpy.array(d['count'], ), )
+        if(os.path.exists(e)):
+            os.remove(e)
+        shutil.move(t, e)
+        cls._evict()
+    
+    @classmethod
+    def _evict(cls):
+        limit = system.prefs().reference_cache_size * 1024 * 1024
+        d = cls._directory()
+        es = []
+        for n in os.listdir(d):
+            if(n.endswith(".npz")):
+                st = os.stat(os.path.join(d, n))
+                es.append((st.st_mtime, st.st_size, os.path.join(d, n), ))
+        es.sort()
+        total = sum([e[1] for e in es])
+        # always keep the newest one, even if it is over limit on its own
+        while(total > limit and len(es) > 1):
+            _, size, p = es.pop(0)
+            os.remove(p)
+            total -= size
+
+
+def stratified_order(vs, seed=0, ):
+    """Order of points (n, 3) in which every prefix is spread evenly over whole point cloud.
+    Bounding box is divided into voxel grids of 1, 8, 64.. cells, each level adds one random point from each cell that has none yet, rest follows in random order."""
+    n = len(vs)
+    rng = numpy.random.RandomState(seed)
+    if(n == 0):
+        return numpy.zeros(0, dtype=numpy.int64, )
+    lo = vs.min(axis=0)
+    ext = vs.max(axis=0) - lo
+    ext[ext == 0.0] = 1.0
+    u = (vs - lo) / ext
+    # candidates are tried in random order, first one in a cell wins
+    perm = rng.permutation(n)
+    up = u[perm]
+    taken = numpy.zeros(n, dtype=numpy.bool_, )
+    order = []
+    r = 1
+    # stop when cells are much smaller than points, or on 2^20 cells per axis to fit in int64
+    while(r ** 3 <= n * 8 and r <= 2 ** 20):
+        c = numpy.minimum((up * r).astype(numpy.int64), r - 1, )
+        k = (c[:, 0] * r + c[:, 1]) * r + c[:, 2]
+        _, first = numpy.unique(k, return_index=True, )
+        idx = perm[first]
+        idx = idx[~taken[idx]]
+        taken[idx] = True
+        order.append(idx[rng.permutation(len(idx))])
+        r *= 2
+    order.append(perm[~taken[perm]])
+    return numpy.concatenate(order)
+
+
 class ReadMXSReference(Operator):
     bl_idname = "maxwell_render.read_mxs_reference"
     bl_label = 'Read MXS Reference'
@@ -2611,21 +2807,51 @@ class ReadMXSReference(Operator):
         return m
     
     def _process_data(self, context, data, path):
-        vertices = []
-        for ob in data:
-            vs = [Vector(v) for v in ob['vertices']]
+        meshes = [numpy.asarray(vs, dtype=numpy.float64, ).reshape(-1, 3) for vs in data['meshes']]
+        # mesh index > matrices of all objects using it
+        groups = {}
+        for ob in data['objects']:
             m = self._base_and_pivot_to_matrix(ob['base'], ob['pivot'])
-            mvs = [m * v for v in vs]
-            vertices.extend(mvs)
-        # shuffle point to get random points when limiting visibility
-        vertices = [v.to_tuple() for v in vertices]
-        random.shuffle(vertices)
-        
-        blocs = vertices[:]
-        a = list(map(min, zip(*blocs)))
-        b = list(map(max, zip(*blocs)))
+            groups.setdefault(ob['mesh'], []).append(m)
+        count = sum([len(meshes[i]) * len(ms) for i, ms in groups.items()])
+        # more points than can be drawn (heavily instanced meshes), each instance gets only its share of base mesh points,
+        # base mesh is ordered coarse to fine first, so even a few points cover whole instance
+        limit = MXSReferenceDiskCache.MAX_POINTS
+        vertices = []
+        corners = []
+        for i, ms in groups.items():
+            vs = meshes[i]
+            if(len(vs) == 0):
+                continue
+            ms = numpy.array(ms, dtype=numpy.float64, )
+            if(count > limit):
+                k = max(1, int(math.ceil(len(vs) * limit / count)))
+                if(k < len(vs)):
+                    vs = vs[stratified_order(vs)[:k]]
+            # (instances, points, 3)
+            vertices.append((numpy.einsum('nij,kj->nki', ms[:, :3, :3], vs, ) + ms[:, numpy.newaxis, :3, 3]).reshape(-1, 3))
+            # bounding box from transformed corners of base mesh bounding box, it stays whole even when points are sampled
+            lo = meshes[i].min(axis=0)
+            hi = meshes[i].max(axis=0)
+            c = numpy.array([[x, y, z] for x in (lo[0], hi[0]) for y in (lo[1], hi[1]) for z in (lo[2], hi[2])], dtype=numpy.float64, )
+            corners.append((numpy.einsum('nij,kj->nki', ms[:, :3, :3], c, ) + ms[:, numpy.newaxis, :3, 3]).reshape(-1, 3))
+        if(len(vertices) > 0):
+            vertices = numpy.concatenate(vertices)
+        else:
+            vertices = numpy.zeros((0, 3), dtype=numpy.float64, )
+        # order points coarse to fine, so any number of first points covers whole reference evenly
+        vertices = vertices[stratified_order(vertices)]
+        
+        if(len(corners) > 0):
+            corners = numpy.concatenate(corners)
+            a = corners.min(axis=0).tolist()
+            b = corners.max(axis=0).tolist()
+        else:
+            a = [0.0, 0.0, 0.0]
+            b = [0.0, 0.0, 0.0]
         
-        d = {'vertices': vertices,
+        d = {'vertices': vertices[:MXSReferenceDiskCache.MAX_POINTS],
+             'count': count,
              'bound_box': [[a[0], a[1], a[2]],
                            [a[0], a[1], b[2]],
                            [a[0], b[1], b[2]],
@@ -2633,12 +2859,19 @@ class ReadMXSReference(Operator):
                            [b[0], a[1], a[2]],
                            [b[0], a[1], b[2]],
                            [b[0], b[1], b[2]],
-                           [b[0], b[1], a[2]], ],
-             'object': context.active_object,
-             'path': path,
-             'draw': False, }
+                           [b[0], b[1], a[2]], ], }
         return d
     
+    def _read(self, path):
+        if(system.PLATFORM == 'Darwin'):
+            return system.python34_run_read_mxs_reference(path)
+        elif(system.PLATFORM == 'Linux' or system.PLATFORM == 'Windows'):
+            from . import mxs
+            r = mxs.MXSReferenceReader(path)
+            return r.data
+        else:
+            raise OSError("Unknown platform: {}.".format(system.PLATFORM))
+    
     def execute(self, context):
         o = context.active_object
         if(o is None):
@@ -2648,40 +2881,102 @@ class ReadMXSReference(Operator):
             return {'CANCELLED'}
         
         p = os.path.realpath(bpy.path.abspath(m.path))
+        k = MXSReferenceCache.key(p)
         
-        if(system.PLATFORM == 'Darwin'):
-            if(self.refresh):
-                data = system.python34_run_read_mxs_reference(p)
-                d = self._process_data(context, data, p)
-                MXSReferenceCache.add(d)
-            else:
-                if(MXSReferenceCache.get(p, o)):
-                    pass
-                else:
-                    data = system.python34_run_read_mxs_reference(p)
-                    d = self._process_data(context, data, p)
-                    MXSReferenceCache.add(d)
-        elif(system.PLATFORM == 'Linux' or system.PLATFORM == 'Windows'):
-            from . import mxs
-            if(self.refresh):
-                r = mxs.MXSReferenceReader(p)
-                data = r.data
-                d = self._process_data(context, data, p)
-                MXSReferenceCache.add(d)
-            else:
-                if(MXSReferenceCache.get(p, o)):
-                    pass
-                else:
-                    r = mxs.MXSReferenceReader(p)
-                    data = r.data
-                    d = self._process_data(context, data, p)
-                    MXSReferenceCache.add(d)
-        else:
-            pass
+        v = MXSReferenceCache.get(p, o)
+        if(not self.refresh and v is not None and v['key'] == k and MXSReferenceCache.geometry(k) is not None):
+            return {'FINISHED'}
+        
+        # another object referencing the same file might have it loaded already
+        d = None
+        if(not self.refresh):
+            d = MXSReferenceCache.geometry(k)
+        if(d is None and not self.refresh):
+            d = MXSReferenceDiskCache.get(p)
+        if(d is None):
+            data = self._read(p)
+            d = self._process_data(context, data, p)
+            MXSReferenceDiskCache.put(p, d)
+        
+        if(MXSReferenceCache.geometry(k) is not d):
+            MXSReferenceCache.add_geometry(k, d)
+        MXSReferenceCache.set(p, o, k)
         
         return {'FINISHED'}
 
 
+def screen_fraction(context, mat, bound_box, ):
+    """Approximate part of viewport covered by bounding box, 0.0 to 1.0, 1.0 if it can't be told (box behind or around viewer)."""
+    pm = context.region_data.perspective_matrix * mat
+    xs = []
+    ys = []
+    for b in bound_box:
+        v = pm * Vector((b[0], b[1], b[2], 1.0))
+        if(v.w <= 0.0):
+            return 1.0
+        xs.append(v.x / v.w)
+        ys.append(v.y / v.w)
+    # normalized device coordinates are -1.0 to 1.0
+    w = min(max(xs), 1.0) - max(min(xs), -1.0)
+    h = min(max(ys), 1.0) - max(min(ys), -1.0)
+    if(w <= 0.0 or h <= 0.0):
+        return 0.0
+    return min((w * h) / 4.0, 1.0)
+
+
+def free_reference_points(gs, ):
+    """Delete display lists of all entries in 'gl' dict of geometry cache entry and empty it."""
+    for o in gs.values():
+        for l in o['lists'].values():
+            bgl.glDeleteLists(l, 1)
+    gs.clear()
+
+
+def draw_reference_points(v, points, n, count=None, ):
+    """Draw first count (<= n) of first n points of reference, vertex data is prepared once in bgl.Buffer and kept in geometry cache entry v for each n.
+    With vertex arrays, count points are drawn from the same buffer. Display list (if bgl has no vertex arrays) can't draw only part of itself,
+    so there is one list for each power of two fraction of n (n, n / 2, n / 4, ..), compiled when needed, and the smallest one with at least count points is drawn."""
+    if(count is None or count > n):
+        count = n
+    if(n <= 0 or count <= 0):
+        return
+    arrays = (hasattr(bgl, 'glEnableClientState') and hasattr(bgl, 'glVertexPointer'))
+    # entry is shared by all objects referencing the same file, each of them can draw different number of points
+    gs = v.setdefault('gl', {})
+    g = gs.get(n)
+    if(g is None):
+        if(len(gs) >= 4):
+            free_reference_points(gs)
+        a = numpy.ascontiguousarray(points[:n], dtype=numpy.float32, ).reshape(-1)
+        g = {'n': n,
+             'buffer': bgl.Buffer(bgl.GL_FLOAT, len(a), a.tolist()),
+             'lists': {}, }
+        gs[n] = g
+    
+    if(arrays):
+        bgl.glEnableClientState(bgl.GL_VERTEX_ARRAY)
+        bgl.glVertexPointer(3, bgl.GL_FLOAT, 0, g['buffer'])
+        bgl.glDrawArrays(bgl.GL_POINTS, 0, count)
+        bgl.glDisableClientState(bgl.GL_VERTEX_ARRAY)
+    else:
+        # points are in stratified order, first part of them is spread over whole cloud
+        c = n
+        while(c // 2 >= count):
+            c //= 2
+        l = g['lists'].get(c)
+        if(l is None):
+            l = bgl.glGenLists(1)
+            bgl.glNewList(l, bgl.GL_COMPILE)
+            bgl.glBegin(bgl.GL_POINTS)
+            b = g['buffer']
+            for i in range(0, c * 3, 3):
+                bgl.glVertex3f(b[i], b[i + 1], b[i + 2])
+            bgl.glEnd()
+            bgl.glEndList()
+            g['lists'][c] = l
+        bgl.glCallList(l)
+
+
 def mxs_reference_draw_callback(self, context):
     ao = bpy.context.active_object
     sel = [o for o in bpy.context.scene.objects if o.select]
@@ -2717,6 +3012,9 @@ def mxs_reference_draw_callback(self, context):
         ob = v['object']
         if(not check_visibility(ob)):
             continue
+        g = MXSReferenceCache.geometry(v['key'])
+        if(g is None):
+            continue
         
         active = False
         selected = False
@@ -2728,17 +3026,19 @@ def mxs_reference_draw_callback(self, context):
         mx = ob.maxwell_render.reference
         mat = ob.matrix_world
         
-        points = v['vertices']
-        bound_box = v['bound_box']
+        points = g['vertices']
+        bound_box = g['bound_box']
         
-        percent = int((len(points) / 100) * mx.display_percent)
-        if(percent > mx.display_max_points):
-            points = points[:mx.display_max_points]
-        else:
-            points = points[:percent]
+        # percent of all points, cached cloud might be already shortened
+        percent = int((g.get('count', len(points)) / 100) * mx.display_percent)
+        n = min(percent, mx.display_max_points, len(points))
+        count = n
+        if(mx.display_adaptive):
+            count = int(n * screen_fraction(context, mat, bound_box, ))
         
-        locs = [mat * Vector(p) for p in points]
-        bbox = [mat * Vector(b) for b in bound_box]
+        # points stay in object space, object matrix is applied by gl
+        bgl.glPushMatrix()
+        bgl.glMultMatrixf(bgl.Buffer(bgl.GL_FLOAT, 16, [mat[r][c] for c in range(4) for r in range(4)]))
         
         # point cloud
         bgl.glPointSize(mx.point_size)
@@ -2748,10 +3048,7 @@ def mxs_reference_draw_callback(self, context):
             bgl.glColor3f(*mx.point_color_selected)
         else:
             bgl.glColor3f(*mx.point_color)
-        bgl.glBegin(bgl.GL_POINTS)
-        for l in locs:
-            bgl.glVertex3f(*l)
-        bgl.glEnd()
+        draw_reference_points(g, points, n, count, )
         
         # bounding box
         if(active):
@@ -2765,6 +3062,7 @@ def mxs_reference_draw_callback(self, context):
             bgl.glEnable(bgl.GL_LINE_STIPPLE)
             bgl.glLineStipple(4, 0xAAAA)
         
+        bbox = bound_box
         bgl.glBegin(bgl.GL_LINE_STRIP)
         bgl.glVertex3f(*bbox[0])
         bgl.glVertex3f(*bbox[1])
@@ -2787,6 +3085,8 @@ def mxs_reference_draw_callback(self, context):
         bgl.glVertex3f(*bbox[7])
         bgl.glEnd()
         
+        bgl.glPopMatrix()
+        
         # defaults..
         bgl.glLineWidth(1)
         bgl.glColor3f(0.0, 0.0, 0.0, )
@@ -782,8 +782,10 @@ class SceneProperties(PropertyGroup):
     export_warning_log_write = BoolProperty(name="Write Log", default=True, description="Write log file next to scene file on warnings. When running blender from terminal you can skip that and read warnings in it.", )
     export_suppress_warning_popups = BoolProperty(name="Suppress Warnings", default=False, description="Don't popup number of warnings next to mouse cursor.", )
     
+    export_used_materials_only = BoolProperty(name="Used Materials Only", default=False, description="Export only materials referenced by exported objects (slots, backface, extensions), instead of all materials with users", )
     export_remove_unused_materials = BoolProperty(name="Remove Unused Materials", default=False, description="Remove all materials that is not used by any object in scene. Might not work as intended in 3.1.99.9.", )
     export_use_subdivision = BoolProperty(name="Use Subdivision Modifiers", default=False, description="Export all Subdivision modifiers if they are Catmull-Clark type and at the end of modifier stack on regular mesh objects. Manually added Subdivision will override automatic one.", )
+    export_animation_split_static = BoolProperty(name="Split Static Objects", default=False, description="When exporting animation, export objects without any animation once to a shared scene file and only animated objects to each frame, static scene is referenced from frames", )
     
     exporting_animation_now = BoolProperty(default=False, options={'HIDDEN'}, )
     exporting_animation_frame_number = IntProperty(default=1, options={'HIDDEN'}, )
@@ -819,6 +821,7 @@ class SceneProperties(PropertyGroup):
     viewport_render_verbosity = IntProperty(name="Verbosity Level", default=1, min=0, max=4, description="0: no information given, 1: errors, 2: warnings, 3: info, 4: all", )
     viewport_render_autofocus = BoolProperty(name="Autofocus Viewport Camera", default=True, description="Focus camera on object in center if available, otherwise focus distance will be taken from active camera", )
     viewport_render_update_interval = FloatProperty(name="Update Interval (s)", default=3.0, min=1.0, max=15.0, precision=1, )
+    viewport_render_live = BoolProperty(name="Live Updates", default=False, description="Update running viewport render on scene changes, camera and object transform changes are patched into rendered scene, other changes are exported again", )
     
     @classmethod
     def register(cls):
@@ -1219,6 +1222,13 @@ class ReferenceProperties(PropertyGroup):
     
     display_percent = FloatProperty(name="Display Percent (%)", default=10.0, min=0.0, max=100.0, precision=0, subtype='PERCENTAGE', )
     display_max_points = IntProperty(name="Display Max. Points", default=10000, min=0, max=1000000, )
+    display_adaptive = BoolProperty(name="Adapt To Zoom", default=False, description="Draw less points when reference covers smaller part of viewport, percent and maximum are used when it fills whole viewport", )
+
+
+class ImportProxyProperties(PropertyGroup):
+    enabled = BoolProperty(name="Proxy", default=False, description="Object is imported as bounding box only, full geometry is loaded on demand", )
+    path = StringProperty(name="MXS File", default="", subtype='FILE_PATH', )
+    object_name = StringProperty(name="MXS Object", default="", )
 
 
 class ExtGrassProperties(PropertyGroup):
@@ -1405,6 +1415,7 @@ class ObjectProperties(PropertyGroup):
     
     blocked_emitters = PointerProperty(name="Blocked Emitters", type=ObjectBlockedEmitters, )
     reference = PointerProperty(name="Reference", type=ReferenceProperties, )
+    proxy = PointerProperty(name="Import Proxy", type=ImportProxyProperties, )
     grass = PointerProperty(name="Grass", type=ExtGrassProperties, )
     scatter = PointerProperty(name="Scatter", type=ExtScatterProperties, )
     subdivision = PointerProperty(name="Subdivision", type=ExtSubdivisionProperties, )
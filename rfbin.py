@@ -24,6 +24,11 @@ import string
 import time
 import datetime
 import math
+import json
+import hashlib
+import mmap
+
+import numpy
 
 import bpy
 from bpy.types import Operator
@@ -34,16 +39,55 @@ from mathutils import Matrix, Vector
 from .log import log, LogStyles
 
 
+# particle record as written by RFBinWriter, packed, native byte order, standard sizes (like struct "=")
+PARTICLE_DTYPE = numpy.dtype([('position', '=f4', (3, )),
+                              ('velocity', '=f4', (3, )),
+                              ('force', '=f4', (3, )),
+                              ('vorticity', '=f4', (3, )),
+                              ('normal', '=f4', (3, )),
+                              ('neighbors', '=i4'),
+                              ('texture', '=f4', (3, )),
+                              ('infobits', '=i2'),
+                              ('age', '=f4'),
+                              ('isolation_time', '=f4'),
+                              ('viscosity', '=f4'),
+                              ('density', '=f4'),
+                              ('pressure', '=f4'),
+                              ('mass', '=f4'),
+                              ('temperature', '=f4'),
+                              ('id', '=i4'), ])
+# additional data per particle in appendix, flag and particle size
+APPENDIX_DTYPE = numpy.dtype([('flag', '=?'), ('size', '=f4'), ])
+# file header as written by RFBinWriter
+HEADER_DTYPE = numpy.dtype([('magic', '=i4'),
+                            ('name', 'S250'),
+                            ('version', '=i2'),
+                            ('scale', '=f4'),
+                            ('fluid_type', '=i4'),
+                            ('simulation_time', '=f4'),
+                            ('frame', '=i4'),
+                            ('fps', '=i4'),
+                            ('count', '=i4'),
+                            ('size', '=f4'),
+                            ('pressure', '=f4', (3, )),
+                            ('speed', '=f4', (3, )),
+                            ('temperature', '=f4', (3, )),
+                            ('emitter_position', '=f4', (3, )),
+                            ('emitter_rotation', '=f4', (3, )),
+                            ('emitter_scale', '=f4', (3, )), ])
+
+
 class RFBinWriter():
     """RealFlow particle .bin writer"""
-    def __init__(self, directory, name, frame, particles, fps=24, size=0.001, log_indent=0, ):
+    def __init__(self, directory, name, frame, particles, fps=24, size=0.001, log_indent=0, reuse=False, ):
         """
         directory   string (path)
         name        string ascii
         frame       int >= 0
-        particles   list of (id int, x float, y float, z float, normal x float, normal y float, normal z float, velocity x float, velocity y float, velocity z float, radius float)
+        particles   list of (id int, x float, y float, z float, normal x float, normal y float, normal z float, velocity x float, velocity y float, velocity z float, radius float, u float, v float, w float) or (n, 14) array
         fps         int > 0
         size        float > 0
+        reuse       bool, keep existing file if its fingerprint sidecar matches data, size and fps
         """
         cn = self.__class__.__name__
         self.log_indent = log_indent
@@ -73,7 +117,10 @@ class RFBinWriter():
         self.path = os.path.join(self.directory, "{0}-{1}{2}".format(self.name, str(self.frame).zfill(5), self.extension))
         
         particle_length = 11 + 3
-        if(all(len(v) == particle_length for v in particles) is False):
+        try:
+            # list of tuples or (n, 14) array
+            particles = numpy.asarray(particles, dtype=numpy.float64, ).reshape(-1, particle_length)
+        except ValueError:
             raise ValueError("{}: bad particle data.".format(cn))
         self.particles = particles
         
@@ -87,7 +134,47 @@ class RFBinWriter():
         
         self.version = 11
         
+        self.fingerprint = self._fingerprint()
+        self.fingerprint_path = "{0}.fingerprint".format(self.path)
+        self.skipped = False
+        if(reuse and self._unchanged()):
+            log("{0} is up to date, skipping..".format(self.path), 1 + self.log_indent, )
+            self.skipped = True
+            return
+        
         self._write()
+        self._write_fingerprint()
+    
+    def _fingerprint(self):
+        h = hashlib.sha1()
+        h.update(json.dumps([self.version, self.name, self.frame, self.fps, self.size, len(self.particles), ]).encode('utf-8'))
+        h.update(numpy.ascontiguousarray(self.particles).tobytes())
+        return h.hexdigest()
+    
+    def _unchanged(self):
+        if(not os.path.exists(self.path) or not os.path.exists(self.fingerprint_path)):
+            return False
+        try:
+            with open(self.fingerprint_path, 'r', encoding='utf-8', ) as f:
+                d = json.load(f)
+        except (OSError, ValueError):
+            return False
+        # file might have been replaced by something else meanwhile
+        st = os.stat(self.path)
+        return (d.get('fingerprint') == self.fingerprint and d.get('mtime') == st.st_mtime and d.get('file_size') == st.st_size)
+    
+    def _write_fingerprint(self):
+        st = os.stat(self.path)
+        d = {'fingerprint': self.fingerprint,
+             'frame': self.frame,
+             'count': len(self.particles),
+             'mtime': st.st_mtime,
+             'file_size': st.st_size, }
+        with open("{0}.tmp".format(self.fingerprint_path), 'w', encoding='utf-8', ) as f:
+            json.dump(d, f, )
+        if(os.path.exists(self.fingerprint_path)):
+            os.remove(self.fingerprint_path)
+        shutil.move("{0}.tmp".format(self.fingerprint_path), self.fingerprint_path)
     
     def _write(self):
         self._t = time.time()
@@ -130,25 +217,18 @@ class RFBinWriter():
         fw(p("=9f", 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0, 1.0, 1.0))
     
     def _particles(self, f, ):
-        p = struct.pack
-        fw = f.write
-        for v in self.particles:
-            # 3 position
-            fw(p("=3f", *v[1:4]))
-            # 3 velocity
-            fw(p("=3f", *v[7:10]))
-            # 3 force, 3 vorticity
-            fw(p("=ffffff", 0.0, 0.0, 0.0, 0.0, 0.0, 0.0))
-            # 3 normal
-            fw(p("=3f", *v[4:7]))
-            # neighbors
-            fw(p("=i", 0, ))
-            # 3 texture
-            fw(p("=fff", *v[11:14]))
-            # infobits, age, isolationtime, viscosity, density, pressure, mass, temperature
-            fw(p("=hfffffff", 7, 0.0, 1.0, 1.0, 1.0, 1.0, 1.0, 1.0))
-            # id
-            fw(p("=i", v[0]))
+        v = self.particles
+        a = numpy.zeros(len(v), dtype=PARTICLE_DTYPE, )
+        a['position'] = v[:, 1:4]
+        a['velocity'] = v[:, 7:10]
+        a['normal'] = v[:, 4:7]
+        a['texture'] = v[:, 11:14]
+        # infobits, age, isolationtime, viscosity, density, pressure, mass, temperature
+        a['infobits'] = 7
+        for k in ('isolation_time', 'viscosity', 'density', 'pressure', 'mass', 'temperature', ):
+            a[k] = 1.0
+        a['id'] = v[:, 0]
+        f.write(a.tobytes())
     
     def _appendix(self, f, ):
         p = struct.pack
@@ -164,11 +244,11 @@ class RFBinWriter():
         # owner of the particle id
         fw(p("=i", 0))
         
-        for v in self.particles:
-            # additional data?
-            fw(p("=?", True))
-            # additional data
-            fw(p("=f", v[10]))
+        # additional data? and additional data
+        a = numpy.zeros(len(self.particles), dtype=APPENDIX_DTYPE, )
+        a['flag'] = True
+        a['size'] = self.particles[:, 10]
+        fw(a.tobytes())
         
         # RF4 internal data
         fw(p("=?", False))
@@ -176,6 +256,119 @@ class RFBinWriter():
         fw(p("=?", False))
 
 
+class RFBinReader():
+    """RealFlow particle .bin reader, file is memory mapped and particle data are read-only numpy views into it, nothing is copied until used"""
+    def __init__(self, path, log_indent=0, ):
+        """
+        path        string (path) to .bin written by RFBinWriter (version 11)
+        """
+        cn = self.__class__.__name__
+        self.log_indent = log_indent
+        
+        if(not os.path.exists(path)):
+            raise OSError("{}: file does not exist. ({})".format(cn, path))
+        if(os.path.getsize(path) < HEADER_DTYPE.itemsize):
+            raise ValueError("{}: file is too short to be a particle .bin. ({})".format(cn, path))
+        self.path = path
+        
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ, )
+        
+        try:
+            self._read()
+        except Exception:
+            self.close()
+            raise
+    
+    def _read(self):
+        cn = self.__class__.__name__
+        mm = self._mm
+        
+        h = numpy.frombuffer(mm, dtype=HEADER_DTYPE, count=1, )[0]
+        if(h['magic'] != 0xFABADA):
+            raise ValueError("{}: not a particle .bin, bad magic number. ({})".format(cn, self.path))
+        if(h['version'] != 11):
+            raise ValueError("{}: unsupported version {}. ({})".format(cn, int(h['version']), self.path))
+        self.header = h
+        self.name = h['name'].split(b'\x00', 1)[0].decode('utf-8')
+        self.version = int(h['version'])
+        self.frame = int(h['frame'])
+        self.fps = int(h['fps'])
+        self.count = int(h['count'])
+        self.size = float(h['size'])
+        
+        o = HEADER_DTYPE.itemsize
+        if(len(mm) < o + self.count * PARTICLE_DTYPE.itemsize):
+            raise ValueError("{}: file is truncated, expected {} particles. ({})".format(cn, self.count, self.path))
+        self.particles = numpy.frombuffer(mm, dtype=PARTICLE_DTYPE, count=self.count, offset=o, )
+        o += self.count * PARTICLE_DTYPE.itemsize
+        
+        # appendix is understood only in layout written by RFBinWriter, one float per particle (size), anything else is left alone
+        self.appendix = None
+        if(len(mm) >= o + 5 * 4):
+            n, i, t, s, _ = struct.unpack_from("=5i", mm, o)
+            o += 5 * 4
+            if((n, s) == (1, 4) and len(mm) >= o + self.count * APPENDIX_DTYPE.itemsize):
+                self.appendix = numpy.frombuffer(mm, dtype=APPENDIX_DTYPE, count=self.count, offset=o, )
+        
+        log("{}: {}, frame: {}, particles: {}".format(self.__class__.__name__, self.path, self.frame, self.count), 0 + self.log_indent, LogStyles.MESSAGE, )
+    
+    def __getitem__(self, field):
+        """particle field view, e.g. reader['position'] is (count, 3) float32 array, 'size' comes from appendix"""
+        if(field == 'size' and self.appendix is not None):
+            return self.appendix['size']
+        return self.particles[field]
+    
+    def __len__(self):
+        return self.count
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        self.header = None
+        self.particles = None
+        self.appendix = None
+        if(self._mm is not None):
+            try:
+                self._mm.close()
+            except BufferError:
+                # views are still referenced somewhere, mapping is released together with them
+                pass
+            self._mm = None
+    
+    @classmethod
+    def frames(cls, directory, name, ):
+        """sorted frame numbers of name-#####.bin files in directory"""
+        r = re.compile(r'^{}-(\d{{5}})\.bin$'.format(re.escape(name)))
+        fs = []
+        for f in os.listdir(directory):
+            m = r.match(f)
+            if(m):
+                fs.append(int(m.group(1)))
+        return sorted(fs)
+    
+    @classmethod
+    def sequence(cls, directory, name, frames=None, log_indent=0, ):
+        """lazily yield reader for each frame of name-#####.bin sequence, only one file is mapped at a time,
+        previous reader is closed when next is requested, missing frames are skipped"""
+        if(frames is None):
+            frames = cls.frames(directory, name)
+        for fr in frames:
+            p = os.path.join(directory, "{0}-{1}.bin".format(name, str(fr).zfill(5)))
+            if(not os.path.exists(p)):
+                log("cannot find .bin file for frame: {} at path: '{}'. skipping..".format(fr, p), 1 + log_indent, LogStyles.WARNING, )
+                continue
+            r = cls(p, log_indent, )
+            try:
+                yield r
+            finally:
+                r.close()
+
+
 class ExportRFBin(Operator, ExportHelper):
     bl_idname = "maxwell_render.export_bin"
     bl_label = 'Realflow Particles (.bin)'
@@ -199,7 +199,7 @@ def camera(c):
     return r
 
 
-def object(o):
+def object(o, normals=True, uvs=True, bbox_only=False, ):
     object_name, _ = o.getName()
     is_instance, _ = o.isInstance()
     is_mesh, _ = o.isMesh()
@@ -311,43 +311,12 @@ def object(o):
         
     if(nppv - 1 != ppv and nv != 0):
         log("WARNING: only one position per vertex is supported..", 2)
-    # vertices
-    for i in range(nv):
-        v, _ = o.getVertex(i, ppv)
-        # (float x, float y, float z)
-        r['vertices'].append((v.x(), v.y(), v.z()))
-    # normals
-    for i in range(nn):
-        v, _ = o.getNormal(i, ppv)
-        # (float x, float y, float z)
-        r['normals'].append((v.x(), v.y(), v.z()))
-    # triangles
-    for i in range(nt):
-        t = o.getTriangle(i)
-        # (int v1, int v2, int v3, int n1, int n2, int n3)
-        r['triangles'].append(t)
-    # materials
-    mats = []
-    for i in range(nt):
-        m, _ = o.getTriangleMaterial(i)
-        if(m.isNull() == 1):
-            n = None
-        else:
-            n = m.getName()
-        if(n not in mats):
-            mats.append(n)
-        r['materials'].append((i, n))
-    r['nmats'] = len(mats)
-    r['matnames'] = mats
-    # uv channels
-    ncuv, _ = o.getChannelsUVWCount()
-    for cuv in range(ncuv):
-        # uv triangles
-        r['trianglesUVW'].append([])
-        for i in range(nt):
-            t = o.getTriangleUVW(i, cuv)
-            # float u1, float v1, float w1, float u2, float v2, float w2, float u3, float v3, float w3
-            r['trianglesUVW'][cuv].append(t)
+    if(bbox_only):
+        # proxy, geometry is loaded later
+        r['bbox'] = read_mxs_arrays.bounding_box(o, nv, ppv, )
+    else:
+        # vertices, normals, triangles, materials and uv channels
+        r.update(read_mxs_arrays.mesh_arrays(o, nv, nn, nt, ppv, normals, uvs, ))
     # base and pivot to matrix
     b, p, loc, rot, sca = base_and_pivot(o)
     r['base'] = b
@@ -362,38 +331,6 @@ def object(o):
     return r
 
 
-def is_emitter(o):
-    is_instance, _ = o.isInstance()
-    is_mesh, _ = o.isMesh()
-    if(not is_mesh and not is_instance):
-        return False
-    if(is_mesh):
-        nt, _ = o.getTrianglesCount()
-        mats = []
-        for i in range(nt):
-            m, _ = o.getTriangleMaterial(i)
-            if(not m.isNull()):
-                if(m not in mats):
-                    mats.append(m)
-        for m in mats:
-            nl, _ = m.getNumLayers()
-            for i in range(nl):
-                l = m.getLayer(i)
-                e = l.getEmitter()
-                if(not e.isNull()):
-                    return True
-    if(is_instance):
-        m, _ = o.getMaterial()
-        if(not m.isNull()):
-            nl, _ = m.getNumLayers()
-            for i in range(nl):
-                l = m.getLayer(i)
-                e = l.getEmitter()
-                if(not e.isNull()):
-                    return True
-    return False
-
-
 def global_transform(o):
     cb, _ = o.getWorldTransform()
     o = cb.origin
@@ -420,6 +357,11 @@ def main(args):
         raise RuntimeError("Protected MXS ({})".format(mp))
     # objects
     nms = get_objects_names(scene)
+    if(args.subset is not None):
+        # every n-th object, so large scene can be read by several processes at once
+        i, n = args.subset
+        nms = nms[i::n]
+        log("reading objects subset {} of {}..".format(i + 1, n), 2)
     data = []
     if(args.emitters and not args.objects):
         # only emitter objects
@@ -427,8 +369,8 @@ def main(args):
         for n in nms:
             d = None
             o = scene.getObject(n)
-            if(is_emitter(o)):
-                d = object(o)
+            if(read_mxs_arrays.is_emitter(o)):
+                d = object(o, not args.skip_normals, not args.skip_uvs, args.bbox_only, )
                 if(d is not None):
                     b, p = global_transform(o)
                     d['base'] = b
@@ -442,7 +384,7 @@ def main(args):
         for n in nms:
             d = None
             o = scene.getObject(n)
-            d = object(o)
+            d = object(o, not args.skip_normals, not args.skip_uvs, args.bbox_only, )
             if(d is not None):
                 data.append(d)
             progress.step()
@@ -488,8 +430,17 @@ def main(args):
     # save data
     log("serializing..", 2)
     p = args.scene_data_path
+    if(args.arrays):
+        # mesh arrays to binary sidecar, json keeps just the rest
+        data, arrays = read_mxs_arrays.split_arrays(data)
+        ap = "{0}.npz".format(p)
+        with open("{0}.tmp".format(ap), 'wb', ) as f:
+            numpy.savez(f, **arrays)
+        if(os.path.exists(ap)):
+            os.remove(ap)
+        shutil.move("{0}.tmp".format(ap), ap)
     with open("{0}.tmp".format(p), 'w', encoding='utf-8', ) as f:
-        json.dump(data, f, skipkeys=False, ensure_ascii=False, indent=4, )
+        json.dump(data, f, skipkeys=False, ensure_ascii=False, indent=4, default=read_mxs_arrays.to_serializable, )
     if(os.path.exists(p)):
         os.remove(p)
     shutil.move("{0}.tmp".format(p), p)
@@ -504,13 +455,22 @@ if __name__ == "__main__":
     parser.add_argument('-o', '--objects', action='store_true', help='read objects')
     parser.add_argument('-c', '--cameras', action='store_true', help='read cameras')
     parser.add_argument('-s', '--sun', action='store_true', help='read sun')
+    parser.add_argument('-N', '--skip-normals', action='store_true', help='do not read mesh normals')
+    parser.add_argument('-U', '--skip-uvs', action='store_true', help='do not read mesh uv channels')
+    parser.add_argument('-a', '--arrays', action='store_true', help='write mesh arrays to .npz next to serialized data')
+    parser.add_argument('-B', '--bbox-only', action='store_true', help='read only mesh bounding boxes, for proxies')
+    parser.add_argument('--subset', type=int, nargs=2, default=None, metavar=('INDEX', 'COUNT', ), help='read only every COUNT-th object starting at INDEX')
     parser.add_argument('pymaxwell_path', type=str, help='path to directory containing pymaxwell')
+    parser.add_argument('numpy_path', type=str, help='path to directory containing numpy')
+    parser.add_argument('support_path', type=str, help='path to add-on support directory')
     parser.add_argument('log_file', type=str, help='path to log file')
     parser.add_argument('mxs_path', type=str, help='path to source .mxs')
     parser.add_argument('scene_data_path', type=str, help='path to serialized data')
     args = parser.parse_args()
     
     PYMAXWELL_PATH = args.pymaxwell_path
+    NUMPY_PATH = args.numpy_path
+    SUPPORT_PATH = args.support_path
     
     try:
         from pymaxwell import *
@@ -520,6 +480,16 @@ if __name__ == "__main__":
         sys.path.insert(0, PYMAXWELL_PATH)
         from pymaxwell import *
     
+    try:
+        import numpy
+    except ImportError:
+        sys.path.insert(0, NUMPY_PATH)
+        import numpy
+    
+    # shared with mxs.MXSReader, script itself is executed from temp directory
+    sys.path.insert(0, SUPPORT_PATH)
+    import read_mxs_arrays
+    
     quiet = args.quiet
     LOG_FILE_PATH = args.log_file
     
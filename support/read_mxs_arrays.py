@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Jakub Uhlík
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is furnished
+# to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+# IN THE SOFTWARE.
+
+# mesh data readers shared by mxs.MXSReader (windows, linux) and support/read_mxs.py (mac os x)
+# depends only on numpy, pymaxwell objects are passed in, so it can be imported from both sides
+
+import numpy
+
+
+def mesh_arrays(o, nv, nn, nt, ppv=0, normals=True, uvs=True, ):
+    """Read mesh data of CmaxwellObject into preallocated numpy arrays.
+    Returns dict with vertices (nv, 3), normals (nn, 3), triangles (nt, 6) as (v1, v2, v3, n1, n2, n3),
+    materials (nt, ) as indices to matnames and trianglesUVW as list of (nt, 9) arrays, one per channel."""
+    vs = numpy.zeros((nv, 3), dtype=numpy.float64, )
+    for i in range(nv):
+        v, _ = o.getVertex(i, ppv)
+        vs[i] = (v.x(), v.y(), v.z(), )
+    
+    if(normals):
+        ns = numpy.zeros((nn, 3), dtype=numpy.float64, )
+        for i in range(nn):
+            v, _ = o.getNormal(i, ppv)
+            ns[i] = (v.x(), v.y(), v.z(), )
+    else:
+        ns = numpy.zeros((0, 3), dtype=numpy.float64, )
+    
+    ts = numpy.zeros((nt, 6), dtype=numpy.int32, )
+    for i in range(nt):
+        t = o.getTriangle(i)
+        ts[i] = t[:6]
+    
+    # material name > index, first come first served, same order as before
+    mats = {}
+    ms = numpy.zeros(nt, dtype=numpy.int32, )
+    for i in range(nt):
+        m, _ = o.getTriangleMaterial(i)
+        if(m.isNull() == 1):
+            n = None
+        else:
+            n = m.getName()
+        mi = mats.get(n)
+        if(mi is None):
+            mi = len(mats)
+            mats[n] = mi
+        ms[i] = mi
+    matnames = sorted(mats, key=mats.get, )
+    
+    uvws = []
+    if(uvs):
+        ncuv, _ = o.getChannelsUVWCount()
+        for cuv in range(ncuv):
+            a = numpy.zeros((nt, 9), dtype=numpy.float64, )
+            for i in range(nt):
+                t = o.getTriangleUVW(i, cuv)
+                # float u1, float v1, float w1, float u2, float v2, float w2, float u3, float v3, float w3
+                a[i] = t[:9]
+            uvws.append(a)
+    
+    r = {'vertices': vs,
+         'normals': ns,
+         'triangles': ts,
+         'trianglesUVW': uvws,
+         'materials': ms,
+         'nmats': len(matnames),
+         'matnames': matnames, }
+    return r
+
+
+def is_emitter(o):
+    """True if instance material or any of mesh triangle materials has emitter layer."""
+    is_instance, _ = o.isInstance()
+    is_mesh, _ = o.isMesh()
+    if(not is_mesh and not is_instance):
+        return False
+    
+    def has_emitter(m):
+        nl, _ = m.getNumLayers()
+        for i in range(nl):
+            l = m.getLayer(i)
+            e = l.getEmitter()
+            if(not e.isNull()):
+                return True
+        return False
+    
+    if(is_mesh):
+        nt, _ = o.getTrianglesCount()
+        mats = {}
+        for i in range(nt):
+            m, _ = o.getTriangleMaterial(i)
+            if(not m.isNull()):
+                n = m.getName()
+                if(n not in mats):
+                    mats[n] = m
+        for m in mats.values():
+            if(has_emitter(m)):
+                return True
+    if(is_instance):
+        m, _ = o.getMaterial()
+        if(not m.isNull()):
+            if(has_emitter(m)):
+                return True
+    return False
+
+
+def to_serializable(a):
+    """json.dump default, numpy arrays and scalars to plain python types."""
+    if(isinstance(a, numpy.ndarray)):
+        return a.tolist()
+    if(isinstance(a, numpy.generic)):
+        return a.item()
+    raise TypeError("{} is not JSON serializable".format(repr(a)))
+
+
+def split_arrays(data):
+    """Move mesh arrays out of object dicts into flat dict for numpy.savez, objects keep just None placeholders (uv channels keep their count)."""
+    arrays = {}
+    for i, d in enumerate(data):
+        for k in ('vertices', 'normals', 'triangles', 'materials', ):
+            a = d.get(k)
+            if(isinstance(a, numpy.ndarray)):
+                arrays["{}-{}".format(i, k)] = a
+                d[k] = None
+        uvws = d.get('trianglesUVW')
+        if(isinstance(uvws, list)):
+            for j, a in enumerate(uvws):
+                arrays["{}-trianglesUVW-{}".format(i, j)] = numpy.asarray(a)
+            d['trianglesUVW'] = len(uvws)
+    return data, arrays
+
+
+def join_arrays(data, arrays):
+    """Reverse of split_arrays, arrays is anything indexable by key, like loaded .npz."""
+    for i, d in enumerate(data):
+        for k in ('vertices', 'normals', 'triangles', 'materials', ):
+            if(k in d and d[k] is None):
+                d[k] = arrays["{}-{}".format(i, k)]
+        uvws = d.get('trianglesUVW')
+        if(isinstance(uvws, int)):
+            d['trianglesUVW'] = [arrays["{}-trianglesUVW-{}".format(i, j)] for j in range(uvws)]
+    return data
+
+
+def bounding_box(o, nv, ppv=0, ):
+    """Local bounding box of CmaxwellObject as ((min x, y, z), (max x, y, z)), None for objects without vertices."""
+    if(nv == 0):
+        return None
+    # only vertices, still much cheaper than full mesh
+    vs = numpy.zeros((nv, 3), dtype=numpy.float64, )
+    for i in range(nv):
+        v, _ = o.getVertex(i, ppv)
+        vs[i] = (v.x(), v.y(), v.z(), )
+    return (tuple(vs.min(axis=0).tolist()), tuple(vs.max(axis=0).tolist()), )
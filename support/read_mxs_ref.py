@@ -79,30 +79,32 @@ class PercentDone():
 class MXSBinRefVertsWriter():
     def __init__(self, path, data, ):
         o = "@"
+        meshes = data['meshes']
+        objects = data['objects']
         with open("{0}.tmp".format(path), 'wb') as f:
             p = struct.pack
             fw = f.write
             # header
             fw(p(o + "7s", 'BINREFV'.encode('utf-8')))
             fw(p(o + "?", False))
-            # number of objects
-            fw(p(o + "i", len(data)))
-            for i in range(len(data)):
-                d = data[i]
-                name = d['name']
-                base = d['base']
-                pivot = d['pivot']
-                vertices = d['vertices']
-                # name
-                fw(p(o + "250s", name.encode('utf-8')))
-                # base and pivot
-                fw(p(o + "12d", *[a for b in base for a in b]))
-                fw(p(o + "12d", *[a for b in pivot for a in b]))
+            # number of meshes
+            fw(p(o + "i", len(meshes)))
+            for vertices in meshes:
                 # number of vertices
-                fw(p(o + "i", len(vertices) * 3))
-                # vertices
                 lv = len(vertices)
+                fw(p(o + "i", lv * 3))
+                # vertices, each mesh only once, no matter how many times it is instanced
                 fw(p(o + "{}d".format(lv * 3), *[f for v in vertices for f in v]))
+            # number of objects
+            fw(p(o + "i", len(objects)))
+            for d in objects:
+                # name
+                fw(p(o + "250s", d['name'].encode('utf-8')))
+                # base and pivot
+                fw(p(o + "12d", *[a for b in d['base'] for a in b]))
+                fw(p(o + "12d", *[a for b in d['pivot'] for a in b]))
+                # index to meshes
+                fw(p(o + "i", d['mesh']))
             fw(p(o + "?", False))
         # swap files
         if(os.path.exists(path)):
@@ -173,7 +175,11 @@ def main(args):
         raise RuntimeError("Error during reading scene {}".format(mp))
     # read meshes and instances
     nms = get_objects_names(scene)
-    data = []
+    # vertices of each mesh are stored once, objects (meshes and instances) point to them by index
+    meshes = []
+    objects = []
+    # mesh name > index to meshes
+    index = {}
     log("reading meshes..", 2)
     progress = PercentDone(len(nms), prefix="> ", indent=2, )
     for n in nms:
@@ -184,28 +190,29 @@ def main(args):
                 # is mesh, read its vertices
                 d = object(o)
         if(d is not None):
-            data.append(d)
+            index.setdefault(d['name'], len(meshes))
+            d['mesh'] = len(meshes)
+            meshes.append(d.pop('vertices'))
+            objects.append(d)
         progress.step()
     log("reading instances..", 2)
     progress = PercentDone(len(nms), prefix="> ", indent=2, )
     for n in nms:
-        d = None
         o = scene.getObject(n)
         if(not o.isNull()):
             if(o.isMesh()[0] == 0 and o.isInstance()[0] == 1):
-                # is instance, find instanced mesh and just copy vertices
+                # is instance, find instanced mesh and just point to its vertices
                 io = o.getInstanced()
                 ion = io.getName()[0]
-                for a in data:
-                    if(a['name'] == ion):
-                        b, p = global_transform(o)
-                        d = {'name': o.getName()[0],
-                             'base': b,
-                             'pivot': p,
-                             'vertices': a['vertices'][:], }
-        if(d is not None):
-            data.append(d)
+                if(ion in index):
+                    b, p = global_transform(o)
+                    objects.append({'name': o.getName()[0],
+                                    'base': b,
+                                    'pivot': p,
+                                    'mesh': index[ion], })
         progress.step()
+    data = {'meshes': meshes,
+            'objects': objects, }
     # save data
     log("serializing..", 2)
     p = args.scene_data_path
@@ -42,6 +42,51 @@ def log(msg, indent=0):
             f.write("{}{}".format(m, "\n"))
 
 
+def vector(v):
+    c = Cvector()
+    c.assign(*v)
+    return c
+
+
+def base(v):
+    b = Cbase()
+    b.origin = vector(v[0])
+    b.xAxis = vector(v[1])
+    b.yAxis = vector(v[2])
+    b.zAxis = vector(v[3])
+    return b
+
+
+def patch(s, d):
+    # live viewport render changes, camera and object transformations
+    c = d['camera']
+    if(c is not None):
+        cam = s.getCamera(c['name'])
+        if(cam.isNull()):
+            log("camera '{}' is missing..".format(c['name']), 2)
+            return False
+        cam.setResolution(*c['resolution'])
+        cam.setFilmSize(*c['film'])
+        for st in c['steps']:
+            cam.setStep(st[0], vector(st[1]), vector(st[2]), vector(st[3]), st[4], st[5], st[6], st[7], )
+        if(c['region'] is not None):
+            cam.setScreenRegion(*c['region'])
+        cam.setActive()
+    
+    for od in d['objects']:
+        o = s.getObject(od['name'])
+        if(o.isNull()):
+            log("object '{}' is missing..".format(od['name']), 2)
+            return False
+        o.setBaseAndPivot(base(od['base']), base(od['pivot']))
+        o.setPivotPosition(vector(od['location']))
+        o.setPivotRotation(vector(od['rotation']))
+        o.setPosition(vector(od['location']))
+        o.setRotation(vector(od['rotation']))
+        o.setScale(vector(od['scale']))
+    return True
+
+
 def main(args):
     s = Cmaxwell(mwcallback)
     p = os.path.join(args.directory, "scene.mxs")
@@ -50,6 +95,14 @@ def main(args):
     if(not ok):
         sys.exit(1)
     
+    if(args.patch is not None):
+        log('patching scene..', 2)
+        with open(args.patch, 'r', encoding='utf-8', ) as f:
+            d = json.load(f)
+        if(not patch(s, d)):
+            # scene has to be exported again
+            sys.exit(2)
+    
     log('setting parameters..', 2)
     # if draft engine is selected, no mxi will be created.. now what..
     s.setRenderParameter('ENGINE', args.quality)
@@ -85,6 +138,7 @@ if __name__ == "__main__":
     parser.add_argument('log_file', type=str, help='path to log file')
     parser.add_argument('directory', type=str, help='path to temp directory')
     parser.add_argument('quality', type=str, help='quality')
+    parser.add_argument('-p', '--patch', type=str, default=None, help='path to json with live update changes')
     args = parser.parse_args()
     
     PYMAXWELL_PATH = args.pymaxwell_path
@@ -29,6 +29,7 @@ import argparse
 import textwrap
 import json
 import struct
+import array
 import shutil
 import math
 import datetime
@@ -37,6 +38,9 @@ import os
 
 quiet = False
 LOG_FILE_PATH = None
+# material name > material handle, filled as materials are created, see get_material
+MATERIALS = {}
+MATERIALS_INDEXED = False
 
 
 def log(msg, indent=0):
@@ -223,24 +227,21 @@ class MXSBinParticlesReader():
         if(self.magic != 'BINPART'):
             raise RuntimeError()
         _ = r(o + "?")
-        # 'PARTICLE_POSITIONS'
-        n = r(o + "i")[0]
-        self.PARTICLE_POSITIONS = r(o + "{}d".format(n))
-        # 'PARTICLE_SPEEDS'
-        n = r(o + "i")[0]
-        self.PARTICLE_SPEEDS = r(o + "{}d".format(n))
-        # 'PARTICLE_RADII'
-        n = r(o + "i")[0]
-        self.PARTICLE_RADII = r(o + "{}d".format(n))
-        # 'PARTICLE_NORMALS'
-        n = r(o + "i")[0]
-        self.PARTICLE_NORMALS = r(o + "{}d".format(n))
-        # 'PARTICLE_IDS'
-        n = r(o + "i")[0]
-        self.PARTICLE_IDS = r(o + "{}i".format(n))
-        # 'PARTICLE_UVW'
-        n = r(o + "i")[0]
-        self.PARTICLE_UVW = r(o + "{}d".format(n))
+        
+        def arr(t):
+            # arrays are raw native values, read them at once, not through huge struct formats
+            n = r(o + "i")[0]
+            a = array.array(t)
+            a.frombytes(self.bindata[self.offset:self.offset + n * a.itemsize])
+            self.offset += n * a.itemsize
+            return a
+        
+        self.PARTICLE_POSITIONS = arr('d')
+        self.PARTICLE_SPEEDS = arr('d')
+        self.PARTICLE_RADII = arr('d')
+        self.PARTICLE_NORMALS = arr('d')
+        self.PARTICLE_IDS = arr('i')
+        self.PARTICLE_UVW = arr('d')
         # eof
         e = r(o + "?")
         if(self.offset != len(self.bindata)):
@@ -284,21 +285,68 @@ class MXSBinWireReader():
         self.num = r(o + "i")[0]
         _ = r(o + "?")
         self.data = []
+        pivot = [(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0), ]
+        ws = r(o + "{}f".format(self.num * 18))
         for i in range(self.num):
-            w = r(o + "33d")
-            base = w[0:12]
-            base = [base[i * 3:(i + 1) * 3] for i in range(4)]
-            pivot = w[12:24]
-            pivot = [pivot[i * 3:(i + 1) * 3] for i in range(4)]
-            loc = w[24:27]
-            rot = w[27:30]
-            sca = w[30:33]
+            w = ws[i * 18:(i + 1) * 18]
+            base = [w[j * 3:(j + 1) * 3] for j in range(4)]
+            loc = base[0]
+            rot = w[12:15]
+            sca = w[15:18]
             self.data.append((base, pivot, loc, rot, sca, ))
         e = r(o + "?")
         if(self.offset != len(self.bindata)):
             raise RuntimeError("expected EOF")
 
 
+class MXSBinInstancesReader():
+    def __init__(self, path):
+        self.offset = 0
+        with open(path, "rb") as bf:
+            self.bindata = bf.read()
+        
+        def r(f):
+            d = struct.unpack_from(f, self.bindata, self.offset)
+            self.offset += struct.calcsize(f)
+            return d
+        
+        # endianness?
+        signature = 23735493746116930
+        l = r("<q")[0]
+        self.offset = 0
+        b = r(">q")[0]
+        self.offset = 0
+        if(l == signature):
+            if(sys.byteorder != "little"):
+                raise RuntimeError()
+            self.order = "<"
+        elif(b == signature):
+            if(sys.byteorder != "big"):
+                raise RuntimeError()
+            self.order = ">"
+        else:
+            raise AssertionError("{}: not a MXSBinInstances file".format(self.__class__.__name__))
+        o = self.order
+        # magic
+        self.magic = r(o + "7s")[0].decode(encoding="utf-8")
+        if(self.magic != 'BININST'):
+            raise RuntimeError()
+        _ = r(o + "?")
+        # number of instances
+        self.num = r(o + "i")[0]
+        _ = r(o + "?")
+        w = r(o + "{}d".format(self.num * 33))
+        self.data = []
+        for i in range(self.num):
+            a = w[i * 33:(i + 1) * 33]
+            base = [a[j * 3:(j + 1) * 3] for j in range(4)]
+            pivot = [a[12 + j * 3:12 + (j + 1) * 3] for j in range(4)]
+            self.data.append((base, pivot, a[24:27], a[27:30], a[30:33], ))
+        e = r(o + "?")
+        if(self.offset != len(self.bindata)):
+            raise RuntimeError("expected EOF")
+
+
 class PercentDone():
     def __init__(self, total, prefix="> ", indent=0):
         self.current = 0
@@ -1080,30 +1128,47 @@ def material(d, s, ):
                 pass
             
     elif(d['subtype'] == 'CUSTOM'):
-        material_custom(d, s, )
+        m = material_custom(d, s, )
     else:
         raise TypeError("Material '{}' {} is unknown type".format(d['name'], d['subtype']))
+    
+    MATERIALS[m.getName()] = m
+    return m
+
+
+def index_materials(s, ):
+    """put all scene materials to registry, only needed for materials not created by material()"""
+    global MATERIALS_INDEXED
+    it = CmaxwellMaterialIterator()
+    o = it.first(s)
+    names = []
+    while not o.isNull():
+        names.append(o.getName())
+        o = it.next()
+    for n in names:
+        if(n not in MATERIALS):
+            MATERIALS[n] = s.getMaterial(n)
+    MATERIALS_INDEXED = True
+
+
+def erase_unused_materials(s, ):
+    """erase unused materials from scene, handles in registry are no longer valid after that"""
+    global MATERIALS_INDEXED
+    s.eraseUnusedMaterials()
+    MATERIALS.clear()
+    MATERIALS_INDEXED = False
 
 
 def get_material(n, s, ):
     """get material by name from scene, if material is missing, create and return placeholder"""
-    def get_material_names(s):
-        it = CmaxwellMaterialIterator()
-        o = it.first(s)
-        l = []
-        while not o.isNull():
-            name = o.getName()
-            l.append(name)
-            o = it.next()
-        return l
-    
-    names = get_material_names(s)
-    m = None
-    if(n in names):
-        m = s.getMaterial(n)
+    m = MATERIALS.get(n)
+    if(m is None and not MATERIALS_INDEXED):
+        index_materials(s)
+        m = MATERIALS.get(n)
     if(m is None):
         # should not happen because i stopped changing material names.. but i leave it here
         m = material_placeholder(s)
+        MATERIALS[n] = m
     return m
 
 
@@ -1656,6 +1721,39 @@ def instance(d, s, ):
     return o
 
 
+def instances(d, s, ):
+    """Batch of instances of one base, same materials and object properties, matrices are read from binary file."""
+    r = []
+    bo = s.getObject(d['instanced'])
+    
+    mat = None
+    if(d['num_materials'] <= 1):
+        if(len(d['materials']) == 1):
+            if(d['materials'][0] != ''):
+                mat = get_material(d['materials'][0], s, )
+    backface = None
+    if(d['backface_material'] != ''):
+        backface = get_material(d['backface_material'], s, )
+    
+    ir = MXSBinInstancesReader(d['instances_data'])
+    for n, m in zip(d['names'], ir.data):
+        o = s.createInstancement(n, bo)
+        if(mat is not None):
+            o.setMaterial(mat)
+        if(backface is not None):
+            o.setBackfaceMaterial(backface)
+        bp = {'base': m[0],
+              'pivot': m[1],
+              'location': m[2],
+              'rotation': m[3],
+              'scale': m[4],
+              'motion_blur': d['motion_blur'], }
+        base_and_pivot(o, bp)
+        object_props(o, d)
+        r.append(o)
+    return r
+
+
 def scene(d, s, ):
     h, t = os.path.split(d["output_mxi"])
     n, e = os.path.splitext(t)
@@ -2038,12 +2136,12 @@ def particles(d, s, ):
         c.yAxis = Cvector(0.0, 1.0, 0.0)
         c.zAxis = Cvector(0.0, 0.0, 1.0)
         
-        params.setFloatArray('PARTICLE_POSITIONS', list(r.PARTICLE_POSITIONS), c)
-        params.setFloatArray('PARTICLE_SPEEDS', list(r.PARTICLE_SPEEDS), c)
-        params.setFloatArray('PARTICLE_RADII', list(r.PARTICLE_RADII), c)
-        params.setIntArray('PARTICLE_IDS', list(r.PARTICLE_IDS))
-        params.setFloatArray('PARTICLE_NORMALS', list(r.PARTICLE_NORMALS), c)
-        params.setFloatArray('PARTICLE_UVW', list(r.PARTICLE_UVW), c)
+        params.setFloatArray('PARTICLE_POSITIONS', r.PARTICLE_POSITIONS.tolist(), c)
+        params.setFloatArray('PARTICLE_SPEEDS', r.PARTICLE_SPEEDS.tolist(), c)
+        params.setFloatArray('PARTICLE_RADII', r.PARTICLE_RADII.tolist(), c)
+        params.setIntArray('PARTICLE_IDS', r.PARTICLE_IDS.tolist())
+        params.setFloatArray('PARTICLE_NORMALS', r.PARTICLE_NORMALS.tolist(), c)
+        params.setFloatArray('PARTICLE_UVW', r.PARTICLE_UVW.tolist(), c)
         
     else:
         params.setString('FileName', d['bin_filename'])
@@ -2126,10 +2224,10 @@ def cloner(d, s, ):
         c.yAxis = Cvector(0.0, 1.0, 0.0)
         c.zAxis = Cvector(0.0, 0.0, 1.0)
         
-        p.setFloatArray('PARTICLE_POSITIONS', list(r.PARTICLE_POSITIONS), c)
-        p.setFloatArray('PARTICLE_SPEEDS', list(r.PARTICLE_SPEEDS), c)
-        p.setFloatArray('PARTICLE_RADII', list(r.PARTICLE_RADII), c)
-        p.setIntArray('PARTICLE_IDS', list(r.PARTICLE_IDS))
+        p.setFloatArray('PARTICLE_POSITIONS', r.PARTICLE_POSITIONS.tolist(), c)
+        p.setFloatArray('PARTICLE_SPEEDS', r.PARTICLE_SPEEDS.tolist(), c)
+        p.setFloatArray('PARTICLE_RADII', r.PARTICLE_RADII.tolist(), c)
+        p.setIntArray('PARTICLE_IDS', r.PARTICLE_IDS.tolist())
         
     else:
         p.setString('FileName', d['filename'])
@@ -2452,6 +2550,12 @@ def hierarchy(d, s, ):
                 ch = s.getObject(d[i]['name'])
                 p = s.getObject(d[i]['parent'])
                 ch.setParent(p)
+        elif(d[i]['type'] == 'MESH_INSTANCES'):
+            if(d[i]['parent'] is not None):
+                p = s.getObject(d[i]['parent'])
+                for n in d[i]['names']:
+                    ch = s.getObject(n)
+                    ch.setParent(p)
 
 
 def wireframe(d, s, ):
@@ -2557,6 +2661,8 @@ def main(args):
                     mesh(d, mxs)
             except KeyError:
                 instance(d, mxs)
+        elif(d['type'] == 'MESH_INSTANCES'):
+            instances(d, mxs)
         elif(d['type'] == 'SCENE'):
             scene(d, mxs)
             custom_alphas(d, mxs)
@@ -2659,7 +2765,7 @@ def main(args):
             if(d['export_remove_unused_materials']):
                 # optional, might also remove materials not supposed to be removed
                 log("removing unused materials..", 2)
-                mxs.eraseUnusedMaterials()
+                erase_unused_materials(mxs)
     # save mxs
     log("saving scene..", 2)
     ok = mxs.writeMXS(args.result_path)
@@ -23,6 +23,7 @@ import shlex
 import uuid
 import json
 import shutil
+import time
 
 import bpy
 
@@ -470,7 +471,7 @@ def python34_run_script_helper(script_path, scene_data_path, mxs_path, append, w
         raise OSError("Unknown platform: {}.".format(PLATFORM))
 
 
-def python34_run_script_helper_import(script_path, mxs_path, scene_data_path, import_emitters, import_objects, import_cameras, import_sun, ):
+def python34_run_script_helper_import(script_path, mxs_path, scene_data_path, import_emitters, import_objects, import_cameras, import_sun, skip_normals=True, skip_uvs=False, ):
     if(PLATFORM == 'Darwin'):
         PY = os.path.abspath(os.path.join(bpy.path.abspath(prefs().python_path), 'bin', 'python3.5', ))
         if(PY == ""):
@@ -491,17 +492,30 @@ def python34_run_script_helper_import(script_path, mxs_path, scene_data_path, im
             if(switches != ''):
                 switches += ' '
             switches += '-s'
+        if(skip_normals):
+            if(switches != ''):
+                switches += ' '
+            switches += '-N'
+        if(skip_uvs):
+            if(switches != ''):
+                switches += ' '
+            switches += '-U'
         
         PYMAXWELL_PATH = os.path.abspath(os.path.join(bpy.path.abspath(prefs().maxwell_path), 'Libs', 'pymaxwell', 'python3.5', ))
+        import numpy
+        NUMPY_PATH = os.path.split(os.path.split(numpy.__file__)[0])[0]
+        SUPPORT_PATH = os.path.join(os.path.split(os.path.realpath(__file__))[0], "support", )
         
         # execute the script
-        command_line = "{0} {1} {2} {3} {4} {5} {6}".format(shlex.quote(PY),
-                                                            shlex.quote(script_path),
-                                                            switches,
-                                                            shlex.quote(PYMAXWELL_PATH),
-                                                            shlex.quote(LOG_FILE_PATH),
-                                                            shlex.quote(mxs_path),
-                                                            shlex.quote(scene_data_path), )
+        command_line = "{0} {1} {2} {3} {4} {5} {6} {7} {8}".format(shlex.quote(PY),
+                                                                    shlex.quote(script_path),
+                                                                    switches,
+                                                                    shlex.quote(PYMAXWELL_PATH),
+                                                                    shlex.quote(NUMPY_PATH),
+                                                                    shlex.quote(SUPPORT_PATH),
+                                                                    shlex.quote(LOG_FILE_PATH),
+                                                                    shlex.quote(mxs_path),
+                                                                    shlex.quote(scene_data_path), )
         log("command:", 2)
         log("{0}".format(command_line), 0, LogStyles.MESSAGE, prefix="")
         args = shlex.split(command_line, )
@@ -513,6 +527,102 @@ def python34_run_script_helper_import(script_path, mxs_path, scene_data_path, im
         raise Exception("This is meant to be called on Mac OS X")
 
 
+def python34_run_script_helper_import_pool(jobs, processes=0, ):
+    """Run read_mxs.py helpers in parallel processes, each writing its json + .npz arrays payload.
+    jobs:       list of dicts with keys script_path, mxs_path, scene_data_path, emitters, objects, cameras, sun, proxies and subset (None or (index, count))
+    processes:  maximum of processes running at once, 0 for number of cpus
+    return      list of failed jobs
+    """
+    env = None
+    if(PLATFORM == 'Darwin'):
+        PY = os.path.abspath(os.path.join(bpy.path.abspath(prefs().python_path), 'bin', 'python3.5', ))
+        PYMAXWELL_PATH = os.path.abspath(os.path.join(bpy.path.abspath(prefs().maxwell_path), 'Libs', 'pymaxwell', 'python3.5', ))
+    elif(PLATFORM == 'Linux' or PLATFORM == 'Windows'):
+        # blender python is the same version pymaxwell is built for and pymaxwell is already importable here
+        PY = bpy.app.binary_path_python
+        import pymaxwell
+        PYMAXWELL_PATH = os.path.split(os.path.realpath(pymaxwell.__file__))[0]
+        if(os.path.splitext(os.path.split(pymaxwell.__file__)[1])[0] == '__init__'):
+            PYMAXWELL_PATH = os.path.split(PYMAXWELL_PATH)[0]
+        if(PLATFORM == 'Windows'):
+            mp = os.environ.get("MAXWELL3_ROOT")
+            if(mp):
+                env = dict(os.environ)
+                env['PATH'] = ';'.join([mp, env['PATH']])
+    else:
+        raise OSError("Unknown platform: {}.".format(PLATFORM))
+    
+    import numpy
+    NUMPY_PATH = os.path.split(os.path.split(numpy.__file__)[0])[0]
+    SUPPORT_PATH = os.path.join(os.path.split(os.path.realpath(__file__))[0], "support", )
+    
+    if(processes <= 0):
+        processes = os.cpu_count() or 1
+    
+    def command_line(job):
+        switches = ['-a', '-N', ]
+        if(job['emitters']):
+            switches.append('-e')
+        if(job['objects']):
+            switches.append('-o')
+        if(job['cameras']):
+            switches.append('-c')
+        if(job['sun']):
+            switches.append('-s')
+        if(job.get('proxies', False)):
+            switches.append('-B')
+        if(job['subset'] is not None):
+            switches.append('--subset {} {}'.format(*job['subset']))
+        l = "{0} {1} {2} {3} {4} {5} {6} {7} {8}".format(shlex.quote(PY),
+                                                         shlex.quote(job['script_path']),
+                                                         " ".join(switches),
+                                                         shlex.quote(PYMAXWELL_PATH),
+                                                         shlex.quote(NUMPY_PATH),
+                                                         shlex.quote(SUPPORT_PATH),
+                                                         shlex.quote(job_log(job)),
+                                                         shlex.quote(job['mxs_path']),
+                                                         shlex.quote(job['scene_data_path']), )
+        return l
+    
+    def job_log(job):
+        # each helper logs to its own file, running helpers writing to one log would mix their lines
+        return "{0}.log".format(job['scene_data_path'])
+    
+    def merge_log(job):
+        p = job_log(job)
+        if(not os.path.exists(p)):
+            return
+        with open(p, mode='r', encoding='utf-8', ) as f:
+            s = f.read()
+        with open(LOG_FILE_PATH, mode='a', encoding='utf-8', ) as f:
+            f.write(s)
+        os.remove(p)
+    
+    log("running {} helpers in {} processes..".format(len(jobs), processes), 2)
+    waiting = list(jobs)
+    running = []
+    failed = []
+    while(len(waiting) > 0 or len(running) > 0):
+        while(len(waiting) > 0 and len(running) < processes):
+            job = waiting.pop(0)
+            l = command_line(job)
+            log("{0}".format(l), 0, LogStyles.MESSAGE, prefix="")
+            running.append((subprocess.Popen(shlex.split(l, ), env=env, ), job, ))
+        done = [r for r in running if r[0].poll() is not None]
+        if(len(done) == 0):
+            # nothing finished yet, do not spin
+            time.sleep(0.05)
+            continue
+        for r in done:
+            running.remove(r)
+            p, job = r
+            merge_log(job)
+            if(p.returncode != 0):
+                log("error in {0} ({1})".format(job['script_path'], job['mxs_path']), 0, LogStyles.ERROR, )
+                failed.append(job)
+    return failed
+
+
 def python34_run_mxm_preview(mxm_path):
     if(PLATFORM == 'Darwin'):
         script_path = os.path.join(os.path.split(os.path.realpath(__file__))[0], "support", "read_mxm_preview.py", )
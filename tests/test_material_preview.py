@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+# material preview queue and cache with fake renderer, runs where addon can be imported (blender python with bpy)
+
+import os
+import sys
+import time
+import importlib
+
+import pytest
+
+pytest.importorskip('bpy')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))))
+engine = importlib.import_module("{}.engine".format(os.path.basename(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))))
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    engine.MaterialPreviewCache.clear()
+    yield
+    engine.MaterialPreviewCache.clear()
+
+
+def test_render_and_cache():
+    r = engine.FakeMaterialPreviewRenderer(color=(1.0, 0.0, 0.0, ), )
+    j = engine.MaterialPreviewQueue.submit('a', {'size': 8, }, r, )
+    assert j.done.wait(5)
+    assert j.result.shape == (8, 8, 3)
+    assert engine.MaterialPreviewCache.get('a') is j.result
+    # the same key again is served from cache by worker
+    j = engine.MaterialPreviewQueue.submit('a', {'size': 8, }, r, )
+    assert j.done.wait(5)
+    assert r.calls == 1
+
+
+def test_cancel_queued_job_does_not_wait():
+    r = engine.FakeMaterialPreviewRenderer(delay=0.5, )
+    a = engine.MaterialPreviewQueue.submit('a', {'size': 4, }, r, )
+    b = engine.MaterialPreviewQueue.submit('b', {'size': 4, }, r, )
+    t = time.time()
+    assert b.cancel()
+    assert b.done.is_set()
+    assert time.time() - t < 0.1
+    assert a.done.wait(5)
+    time.sleep(0.1)
+    assert r.calls == 1
+    assert engine.MaterialPreviewCache.get('b') is None
+
+
+def test_cancel_running_job():
+    r = engine.FakeMaterialPreviewRenderer(delay=5.0, )
+    j = engine.MaterialPreviewQueue.submit('a', {'size': 4, }, r, )
+    while(r.calls == 0):
+        time.sleep(0.01)
+    assert not j.cancel()
+    assert j.done.wait(1)
+    assert j.result is None
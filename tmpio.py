@@ -21,6 +21,8 @@ import shutil
 import struct
 import sys
 
+import numpy
+
 
 class MXSBinMeshWriter():
     def __init__(self, path, name, num_positions, vertices, normals, triangles, triangle_normals, uv_channels, num_materials, triangle_materials, ):
@@ -255,33 +257,22 @@ class MXSBinParticlesWriter():
         with open("{0}.tmp".format(path), 'wb') as f:
             p = struct.pack
             fw = f.write
+            
+            def arr(k, t):
+                # arrays (or lists) go in as raw native values, same layout as struct with "{}d" / "{}i"
+                a = numpy.ascontiguousarray(d[k], dtype=t, ).reshape(-1)
+                fw(p(o + "i", len(a)))
+                fw(a.tobytes())
+            
             # header
             fw(p(o + "7s", 'BINPART'.encode('utf-8')))
             fw(p(o + "?", False))
-            # 'PARTICLE_POSITIONS'
-            n = len(d['PARTICLE_POSITIONS'])
-            fw(p(o + "i", n))
-            fw(p(o + "{}d".format(n), *d['PARTICLE_POSITIONS']))
-            # 'PARTICLE_SPEEDS'
-            n = len(d['PARTICLE_SPEEDS'])
-            fw(p(o + "i", n))
-            fw(p(o + "{}d".format(n), *d['PARTICLE_SPEEDS']))
-            # 'PARTICLE_RADII'
-            n = len(d['PARTICLE_RADII'])
-            fw(p(o + "i", n))
-            fw(p(o + "{}d".format(n), *d['PARTICLE_RADII']))
-            # 'PARTICLE_NORMALS'
-            n = len(d['PARTICLE_NORMALS'])
-            fw(p(o + "i", n))
-            fw(p(o + "{}d".format(n), *d['PARTICLE_NORMALS']))
-            # 'PARTICLE_IDS'
-            n = len(d['PARTICLE_IDS'])
-            fw(p(o + "i", n))
-            fw(p(o + "{}i".format(n), *d['PARTICLE_IDS']))
-            # 'PARTICLE_UVW'
-            n = len(d['PARTICLE_UVW'])
-            fw(p(o + "i", n))
-            fw(p(o + "{}d".format(n), *d['PARTICLE_UVW']))
+            arr('PARTICLE_POSITIONS', numpy.float64, )
+            arr('PARTICLE_SPEEDS', numpy.float64, )
+            arr('PARTICLE_RADII', numpy.float64, )
+            arr('PARTICLE_NORMALS', numpy.float64, )
+            arr('PARTICLE_IDS', numpy.intc, )
+            arr('PARTICLE_UVW', numpy.float64, )
             # end
             fw(p(o + "?", False))
         if(os.path.exists(path)):
@@ -362,12 +353,9 @@ class MXSBinWireWriter():
             n = len(d)
             fw(p(o + "i", n))
             fw(p(o + "?", False))
-            # data
-            for base, pivot, loc, rot, sca in data:
-                base = tuple(sum(base, ()))
-                pivot = tuple(sum(pivot, ()))
-                w = base + pivot + loc + rot + sca
-                fw(p(o + "33d", *w))
+            # data, (n, 18) array of base (12), rotation (3) and scale (3) in one block,
+            # pivot is always identity and location is base origin, reader expands it back
+            fw(numpy.ascontiguousarray(data, dtype=numpy.float32, ).tobytes())
             # end
             fw(p(o + "?", False))
         if(os.path.exists(path)):
@@ -413,48 +401,131 @@ class MXSBinWireReader():
         self.num = r(o + "i")[0]
         _ = r(o + "?")
         self.data = []
+        pivot = [(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0), ]
+        ws = r(o + "{}f".format(self.num * 18))
         for i in range(self.num):
-            w = r(o + "33d")
-            base = w[0:12]
-            base = [base[i * 3:(i + 1) * 3] for i in range(4)]
-            pivot = w[12:24]
-            pivot = [pivot[i * 3:(i + 1) * 3] for i in range(4)]
-            loc = w[24:27]
-            rot = w[27:30]
-            sca = w[30:33]
+            w = ws[i * 18:(i + 1) * 18]
+            base = [w[j * 3:(j + 1) * 3] for j in range(4)]
+            loc = base[0]
+            rot = w[12:15]
+            sca = w[15:18]
             self.data.append((base, pivot, loc, rot, sca, ))
         e = r(o + "?")
         if(self.offset != len(self.bindata)):
             raise RuntimeError("expected EOF")
 
 
+class MXSBinInstancesWriter():
+    def __init__(self, path, data):
+        # same record as BINWIRE, but all written in one block
+        d = data
+        o = "@"
+        with open("{0}.tmp".format(path), 'wb') as f:
+            p = struct.pack
+            fw = f.write
+            # header
+            fw(p(o + "7s", 'BININST'.encode('utf-8')))
+            fw(p(o + "?", False))
+            # number of instances
+            n = len(d)
+            fw(p(o + "i", n))
+            fw(p(o + "?", False))
+            # data
+            a = []
+            for base, pivot, loc, rot, sca in data:
+                for v in base:
+                    a.extend(v)
+                for v in pivot:
+                    a.extend(v)
+                a.extend(loc)
+                a.extend(rot)
+                a.extend(sca)
+            fw(p(o + "{}d".format(n * 33), *a))
+            # end
+            fw(p(o + "?", False))
+        if(os.path.exists(path)):
+            os.remove(path)
+        shutil.move("{0}.tmp".format(path), path)
+        self.path = path
+
+
+class MXSBinInstancesReader():
+    def __init__(self, path):
+        self.offset = 0
+        with open(path, "rb") as bf:
+            self.bindata = bf.read()
+        
+        def r(f):
+            d = struct.unpack_from(f, self.bindata, self.offset)
+            self.offset += struct.calcsize(f)
+            return d
+        
+        # endianness?
+        signature = 23735493746116930
+        l = r("<q")[0]
+        self.offset = 0
+        b = r(">q")[0]
+        self.offset = 0
+        if(l == signature):
+            if(sys.byteorder != "little"):
+                raise RuntimeError()
+            self.order = "<"
+        elif(b == signature):
+            if(sys.byteorder != "big"):
+                raise RuntimeError()
+            self.order = ">"
+        else:
+            raise AssertionError("{}: not a MXSBinInstances file".format(self.__class__.__name__))
+        o = self.order
+        # magic
+        self.magic = r(o + "7s")[0].decode(encoding="utf-8")
+        if(self.magic != 'BININST'):
+            raise RuntimeError()
+        _ = r(o + "?")
+        # number of instances
+        self.num = r(o + "i")[0]
+        _ = r(o + "?")
+        w = r(o + "{}d".format(self.num * 33))
+        self.data = []
+        for i in range(self.num):
+            a = w[i * 33:(i + 1) * 33]
+            base = [a[j * 3:(j + 1) * 3] for j in range(4)]
+            pivot = [a[12 + j * 3:12 + (j + 1) * 3] for j in range(4)]
+            self.data.append((base, pivot, a[24:27], a[27:30], a[30:33], ))
+        e = r(o + "?")
+        if(self.offset != len(self.bindata)):
+            raise RuntimeError("expected EOF")
+
+
 class MXSBinRefVertsWriter():
     def __init__(self, path, data, ):
         o = "@"
+        meshes = data['meshes']
+        objects = data['objects']
         with open("{0}.tmp".format(path), 'wb') as f:
             p = struct.pack
             fw = f.write
             # header
             fw(p(o + "7s", 'BINREFV'.encode('utf-8')))
             fw(p(o + "?", False))
-            # number of objects
-            fw(p(o + "i", len(data)))
-            for i in range(len(data)):
-                d = data[i]
-                name = d['name']
-                base = d['base']
-                pivot = d['pivot']
-                vertices = d['vertices']
-                # name
-                fw(p(o + "250s", name.encode('utf-8')))
-                # base and pivot
-                fw(p(o + "12d", *[a for b in base for a in b]))
-                fw(p(o + "12d", *[a for b in pivot for a in b]))
+            # number of meshes
+            fw(p(o + "i", len(meshes)))
+            for vertices in meshes:
                 # number of vertices
-                fw(p(o + "i", len(vertices) * 3))
-                # vertices
                 lv = len(vertices)
+                fw(p(o + "i", lv * 3))
+                # vertices, each mesh only once, no matter how many times it is instanced
                 fw(p(o + "{}d".format(lv * 3), *[f for v in vertices for f in v]))
+            # number of objects
+            fw(p(o + "i", len(objects)))
+            for d in objects:
+                # name
+                fw(p(o + "250s", d['name'].encode('utf-8')))
+                # base and pivot
+                fw(p(o + "12d", *[a for b in d['base'] for a in b]))
+                fw(p(o + "12d", *[a for b in d['pivot'] for a in b]))
+                # index to meshes
+                fw(p(o + "i", d['mesh']))
             fw(p(o + "?", False))
         # swap files
         if(os.path.exists(path)):
@@ -500,9 +571,16 @@ class MXSBinRefVertsReader():
             raise RuntimeError()
         # throwaway
         _, offset = r(o + "?", buff, offset)
-        # number of objects
+        # meshes
+        num_meshes, offset = r0(o + "i", buff, offset)
+        meshes = []
+        for i in range(num_meshes):
+            lv, offset = r0(o + "i", buff, offset)
+            vs, offset = r(o + "{}d".format(lv), buff, offset)
+            meshes.append([vs[i:i + 3] for i in range(0, len(vs), 3)])
+        # objects, vertices are in meshes[object['mesh']]
         num_objects, offset = r0(o + "i", buff, offset)
-        self.data = []
+        objects = []
         for i in range(num_objects):
             name, offset = r0(o + "250s", buff, offset)
             name = name.decode(encoding="utf-8").replace('\x00', '')
@@ -510,13 +588,13 @@ class MXSBinRefVertsReader():
             base = [b[i:i + 3] for i in range(0, len(b), 3)]
             p, offset = r(o + "12d", buff, offset)
             pivot = [p[i:i + 3] for i in range(0, len(p), 3)]
-            lv, offset = r0(o + "i", buff, offset)
-            vs, offset = r(o + "{}d".format(lv), buff, offset)
-            vertices = [vs[i:i + 3] for i in range(0, len(vs), 3)]
-            self.data.append({'name': name,
-                              'base': base,
-                              'pivot': pivot,
-                              'vertices': vertices, })
+            m, offset = r0(o + "i", buff, offset)
+            objects.append({'name': name,
+                            'base': base,
+                            'pivot': pivot,
+                            'mesh': m, })
+        self.data = {'meshes': meshes,
+                     'objects': objects, }
         # throwaway
         _, offset = r(o + "?", buff, offset)
         # and now.. eof
@@ -549,6 +549,12 @@ class ExportOptionsPanel(RenderButtonsPanel, Panel):
         r.prop(m, 'export_remove_unused_materials')
         r.prop(m, 'export_protect_mxs')
         
+        r = sub.row()
+        r.prop(m, 'export_used_materials_only')
+        
+        r = sub.row()
+        r.prop(m, 'export_animation_split_static')
+        
         r = sub.row()
         r.prop(m, 'export_suppress_warning_popups')
         c = r.column()
@@ -1868,6 +1874,10 @@ class ObjectPanelUtilities(BMPanel, ObjectButtonsPanel, Panel):
         
         l.operator('maxwell_render.copy_active_object_properties_to_selected')
         
+        if(m.proxy.enabled):
+            l.label("Proxy of '{}' in '{}'".format(m.proxy.object_name, os.path.split(m.proxy.path)[1]))
+            l.operator('maxwell_render.load_mxs_proxies')
+        
         l.label("Set Object ID color to multiple objects:")
         r = l.row(align=True)
         p = r.operator('maxwell_render.set_object_id_color', text="R", )
@@ -1997,6 +2007,7 @@ class ObjectReferenceViewportPanel(Panel):
         l = l.column()
         l.prop(m, 'display_percent')
         l.prop(m, 'display_max_points')
+        l.prop(m, 'display_adaptive')
         
         l.separator()
         l.prop(m, 'draw_options')
@@ -2055,6 +2066,7 @@ class ViewportRenderPanel(Panel):
         l.prop(m, 'viewport_render_verbosity')
         l.prop(m, 'viewport_render_update_interval')
         l.prop(m, 'viewport_render_autofocus')
+        l.prop(m, 'viewport_render_live')
         if(not m.viewport_render_enabled):
             l.enabled = False
 